@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark da incorporação de legendas: burn-in com o pool de codificações
+e faixa de legenda sem recodificar (modo soft).
+
+Gera `--clips` vídeos sintéticos com a fonte de teste do ffmpeg (testsrc2,
+`--resolution`, `--seconds`) e uma legenda .srt para cada, e compara:
+  - sequencial: um vídeo por vez com as threads padrão do ffmpeg (-threads 0),
+    como antes do pool;
+  - plano automático: codificações simultâneas e -threads pelos núcleos e
+    pela resolução (VideoMerger.plan);
+  - combinações extras de `--configs` (ex.: 2x2 = 2 codificações com 2 threads);
+  - soft sequencial e soft em lote: o .srt vira uma faixa mov_text no MP4,
+    com vídeo e áudio copiados (-c copy), lado a lado com os tempos do burn-in.
+
+Mostra tempo total e fps agregado (frames processados / tempo total). Não usa a API.
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/bench_burn_in.py [--clips 8] [--resolution 1280x720] [--seconds 10] [--configs 2x2,4x1]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config_manager import ConfigManager
+from src.video_merger import VideoMerger, probe_video
+
+
+def make_clips(ffmpeg, directory, count, resolution, seconds, fps=30):
+    """Clipes testsrc2 (H.264) com uma legenda .srt de uma linha por segundo."""
+    jobs = []
+    for i in range(count):
+        video = os.path.join(directory, f'clip_{i:03d}.mp4')
+        subprocess.run([ffmpeg, '-v', 'error', '-f', 'lavfi', '-i', f'testsrc2=size={resolution}:rate={fps}',
+                        '-t', str(seconds), '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+                        video, '-y'], check=True)
+        subtitle = os.path.join(directory, f'clip_{i:03d}_legendas.srt')
+        with open(subtitle, 'w', encoding='utf-8') as f:
+            for s in range(seconds):
+                f.write(f"{s + 1}\n00:00:{s:02d},000 --> 00:00:{s:02d},900\n"
+                        f"Clipe {i}: vaca em pé no curral ({s}s)\n\n")
+        jobs.append((video, subtitle, os.path.join(directory, f'clip_{i:03d}_com_legendas.mp4')))
+    return jobs
+
+
+def run_sequential(merger, jobs, frames_per_clip, threads=0):
+    start = time.perf_counter()
+    ok = sum(bool(merger.add_subtitles_to_video(*job, threads=threads)) for job in jobs)
+    elapsed = time.perf_counter() - start
+    return elapsed, ok * frames_per_clip / elapsed, ok
+
+
+def run_pool(merger, jobs):
+    summary = merger.burn_in_many(jobs)
+    return summary['elapsed'], summary['fps'], len(summary['succeeded']), summary['workers'], summary['threads']
+
+
+def main():
+    config = ConfigManager()
+    parser = argparse.ArgumentParser(description="Benchmark do burn-in de legendas com pool de codificações")
+    parser.add_argument('--ffmpeg', default=config.get('ffmpeg_path', 'ffmpeg'))
+    parser.add_argument('--clips', type=int, default=8)
+    parser.add_argument('--resolution', default='1280x720')
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--configs', default='', help="Combinações extras workersxthreads, ex.: 2x2,4x1")
+    args = parser.parse_args()
+
+    if not shutil.which(args.ffmpeg):
+        print(f"ffmpeg não encontrado: {args.ffmpeg} (use --ffmpeg ou ffmpeg_path)")
+        return 1
+
+    work_dir = tempfile.mkdtemp(prefix='bench_burn_in_')
+    try:
+        jobs = make_clips(args.ffmpeg, work_dir, args.clips, args.resolution, args.seconds)
+        frames = probe_video(jobs[0][0])['frames']
+        print(f"{args.clips} clipes {args.resolution}, {args.seconds}s ({frames} frames cada), "
+              f"{os.cpu_count() or 1} núcleos\n")
+        print(f"{'modo':<28} {'workers':>7} {'threads':>7} {'tempo(s)':>9} {'fps agregado':>13} {'ok':>4}")
+
+        quiet = io.StringIO()
+        with contextlib.redirect_stdout(quiet):
+            elapsed, fps, ok = run_sequential(VideoMerger(args.ffmpeg), jobs, frames)
+        print(f"{'sequencial (-threads 0)':<28} {1:>7} {'auto':>7} {elapsed:>9.2f} {fps:>13.0f} {ok:>4}")
+
+        variants = [('plano automático', VideoMerger(args.ffmpeg))]
+        for spec in filter(None, args.configs.split(',')):
+            workers, threads = (int(x) for x in spec.lower().split('x'))
+            variants.append((f'fixo {workers}x{threads}', VideoMerger(args.ffmpeg, workers=workers, threads=threads)))
+        for name, merger in variants:
+            with contextlib.redirect_stdout(quiet):
+                elapsed, fps, ok, workers, threads = run_pool(merger, jobs)
+            print(f"{name:<28} {workers:>7} {threads:>7} {elapsed:>9.2f} {fps:>13.0f} {ok:>4}")
+        burn_elapsed = elapsed
+
+        soft = VideoMerger(args.ffmpeg, subtitle_mode='soft')
+        with contextlib.redirect_stdout(quiet):
+            elapsed, fps, ok = run_sequential(soft, jobs, frames, threads=None)
+        print(f"{'soft sequencial (-c copy)':<28} {1:>7} {'-':>7} {elapsed:>9.2f} {fps:>13.0f} {ok:>4}")
+        with contextlib.redirect_stdout(quiet):
+            elapsed, fps, ok, workers, _ = run_pool(soft, jobs)
+        print(f"{'soft em lote (-c copy)':<28} {workers:>7} {'-':>7} {elapsed:>9.2f} {fps:>13.0f} {ok:>4}")
+        print(f"\nsoft em lote: {burn_elapsed / elapsed:.0f}x mais rápido que o último burn-in")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
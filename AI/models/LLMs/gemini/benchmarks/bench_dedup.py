@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark da detecção de quase-duplicados contra as classificações existentes.
+
+Indexa os frames salvos em results/*_classificacao.jpg (pHash ou CLIP) e,
+percorrendo os vídeos na ordem do lote, simula o reaproveitamento: cada
+vídeo com um anterior acima do limiar teria a classificação copiada. Como
+todos os resultados existentes foram classificados de forma independente
+pelo Gemini, dá para medir, por limiar:
+  - chamadas à API evitadas;
+  - concordância exata de contagem_total entre o vídeo e a origem;
+  - diferença média no total de animais.
+
+Não usa a API. Resultados que já são duplicatas (duplicata_de) são ignorados.
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/bench_dedup.py [--method phash|clip] [--scope video|all] [--results-dir results]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.classification_schema import CLASSES
+from src.config_manager import ConfigManager
+from src.duplicate_index import ClipEmbedder, PerceptualHasher, source_group
+
+THRESHOLDS = [0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98]
+
+
+def load_results(results_dir):
+    """(nome, frame .jpg, contagem) dos resultados classificados pelo Gemini."""
+    items = []
+    for json_file in sorted(Path(results_dir).glob('*_classificacao.json')):
+        image = json_file.with_suffix('.jpg')
+        if not image.exists():
+            continue
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('duplicata_de'):
+            continue
+        counts = data.get('contagem_total', {})
+        items.append((json_file.stem.replace('_classificacao', ''), image,
+                      [int(counts.get(c, 0) or 0) for c in CLASSES]))
+    return items
+
+
+def main():
+    config = ConfigManager()
+    parser = argparse.ArgumentParser(description="Quase-duplicados: chamadas evitadas vs concordância")
+    parser.add_argument('--results-dir', default=config.get('output_dir', 'results'))
+    parser.add_argument('--method', choices=['phash', 'clip'], default=config.get('dedup_method', 'phash'))
+    parser.add_argument('--scope', choices=['video', 'all'], default=config.get('dedup_scope', 'video'))
+    args = parser.parse_args()
+
+    items = load_results(args.results_dir)
+    if len(items) < 2:
+        print(f"São necessários ao menos 2 resultados com frame salvo em {args.results_dir}.")
+        return 1
+
+    if args.method == 'clip':
+        from src.prescreen import ClipPrescreen
+        embedder = ClipEmbedder(ClipPrescreen(config.get('prescreen_model', 'ViT-B-32'),
+                                              config.get('prescreen_pretrained', 'laion2b_s34b_b79k')))
+    else:
+        embedder = PerceptualHasher()
+
+    start = time.perf_counter()
+    images = [Image.open(image) for _, image, _ in items]
+    vectors = np.concatenate([embedder.embed(images[i:i + 32]) for i in range(0, len(images), 32)])
+    embed_time = time.perf_counter() - start
+
+    # Similaridade de todos contra todos em uma multiplicação; só vale a origem anterior no lote
+    start = time.perf_counter()
+    sims = vectors @ vectors.T
+    sims[np.triu_indices(len(items))] = -np.inf
+    if args.scope == 'video':
+        groups = np.array([source_group(name) for name, _, _ in items])
+        sims[groups[:, None] != groups[None, :]] = -np.inf
+    search_time = time.perf_counter() - start
+
+    counts = np.array([c for _, _, c in items])
+    best = sims.argmax(axis=1)
+    best_sim = sims[np.arange(len(items)), best]
+    print(f"{len(items)} frames, método {args.method}, escopo {args.scope}: embeddings em {embed_time:.2f}s, "
+          f"busca em lote em {search_time * 1000:.1f} ms")
+    print(f"\n{'limiar':>6} {'evitadas':>9} {'% evitadas':>10} {'contagem igual':>15} {'dif. média total':>17}")
+    for threshold in THRESHOLDS:
+        dup = best_sim >= threshold
+        if not dup.any():
+            print(f"{threshold:>6.2f} {0:>9} {0:>10.0%} {'-':>15} {'-':>17}")
+            continue
+        same = (counts[dup] == counts[best[dup]]).all(axis=1)
+        diff = np.abs(counts[dup].sum(axis=1) - counts[best[dup]].sum(axis=1))
+        print(f"{threshold:>6.2f} {dup.sum():>9} {dup.mean():>10.0%} {same.mean():>15.0%} {diff.mean():>17.2f}")
+    print(f"Limiar configurado (dedup_threshold): {config.get('dedup_threshold', 0.9)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
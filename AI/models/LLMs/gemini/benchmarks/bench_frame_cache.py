@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cache de frames decodificados.
+
+Para cada vídeo do `video_dir` configurado, mede a extração como nas
+legendas (num_frames) e na classificação (1 frame) em três situações:
+- sem cache (seleção de keyframes + decodificação com OpenCV);
+- primeira passada com cache (decodifica e grava);
+- passadas seguintes (leitura do cache), como ao iterar sobre o prompt.
+
+Usa um diretório de cache temporário; não chama a API.
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/bench_frame_cache.py [--video-dir videos/] [--limit 10] [--format jpeg|npy]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config_manager import ConfigManager
+from src.frame_cache import FrameCache
+from src.frame_extractor import FrameExtractor
+from src.keyframe_selector import KeyframeSelector
+from src.model_backends import ReplayBackend
+from src.video_analyzer import VideoAnalyzer
+
+VIDEO_EXTENSIONS = ['*.mp4', '*.avi', '*.mov', '*.mkv']
+
+
+def timed_extract(analyzer, videos, num_frames):
+    start = time.perf_counter()
+    # Silencia as mensagens de extração de cada vídeo
+    with contextlib.redirect_stdout(io.StringIO()):
+        for video in videos:
+            analyzer.extract_frames(str(video), num_frames)
+    return time.perf_counter() - start
+
+
+def main():
+    config = ConfigManager()
+    parser = argparse.ArgumentParser(description="Benchmark do cache de frames decodificados")
+    parser.add_argument('--video-dir', default=config.get('video_dir', 'videos/'))
+    parser.add_argument('--limit', type=int, default=0, help="Máximo de vídeos (0 = todos)")
+    parser.add_argument('--format', choices=['jpeg', 'npy'], default=config.get('frame_cache_format', 'npy'))
+    parser.add_argument('--runs', type=int, default=3, help="Passadas com o cache já preenchido")
+    args = parser.parse_args()
+
+    videos = []
+    for ext in VIDEO_EXTENSIONS:
+        videos.extend(sorted(Path(args.video_dir).glob(ext)))
+    if args.limit:
+        videos = videos[:args.limit]
+    if not videos:
+        print(f"Nenhum vídeo encontrado em {args.video_dir}")
+        return 1
+
+    cache_dir = tempfile.mkdtemp(prefix='frame_cache_')
+    try:
+        frame_cache = FrameCache(cache_dir, max_bytes=10 * 1024 ** 3, format=args.format)
+
+        def analyzer(cache):
+            return VideoAnalyzer(None, prompt_template='-', model=ReplayBackend(args.video_dir),
+                                 frame_extractor=FrameExtractor(mode=config.get('frame_extraction_mode', 'auto')),
+                                 keyframe_selector=KeyframeSelector(), frame_cache=cache)
+
+        print(f"{len(videos)} vídeos, cache em formato {args.format}\n")
+        print(f"{'caminho':<14} {'frames':>6} {'sem cache(s)':>13} {'1ª passada(s)':>14} {'com cache(s)':>13} "
+              f"{'aceleração':>11}")
+        for name, num_frames in [('legendas', config.get('num_frames', 8)), ('classificação', 1)]:
+            uncached = timed_extract(analyzer(None), videos, num_frames)
+            cached_analyzer = analyzer(frame_cache)
+            first = timed_extract(cached_analyzer, videos, num_frames)
+            warm = min(timed_extract(cached_analyzer, videos, num_frames) for _ in range(args.runs))
+            print(f"{name:<14} {num_frames:>6} {uncached:>13.2f} {first:>14.2f} {warm:>13.2f} "
+                  f"{uncached / warm if warm > 0 else 0:>10.1f}x")
+
+        size = sum(f.stat().st_size for f in Path(cache_dir).rglob('*') if f.is_file())
+        print(f"\nTamanho do cache: {size / 1024 / 1024:.1f} MB")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
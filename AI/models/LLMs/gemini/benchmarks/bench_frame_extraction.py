@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark da extração de frames.
+
+Compara, para cada vídeo do `video_dir` configurado e para num_frames 1, 8 e 64:
+- legado: cap.set(CAP_PROP_POS_FRAMES) + read() por índice (comportamento antigo)
+- FrameExtractor nos modos auto, sequential e seek
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/bench_frame_extraction.py [--video-dir videos/] [--limit 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2
+from PIL import Image
+
+from src.config_manager import ConfigManager
+from src.frame_extractor import FrameExtractor
+
+NUM_FRAMES = [1, 8, 64]
+VIDEO_EXTENSIONS = ['*.mp4', '*.avi', '*.mov', '*.mkv']
+
+
+def legacy_extract(video_path, num_frames):
+    """Reproduz a extração antiga: um seek por frame amostrado."""
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    for idx in FrameExtractor.uniform_indices(total_frames, num_frames):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ret, frame = cap.read()
+        if ret:
+            frames.append(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+    cap.release()
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extração de frames")
+    parser.add_argument('--video-dir', help="Diretório de vídeos (padrão: video_dir do config.yaml)")
+    parser.add_argument('--limit', type=int, default=0, help="Máximo de vídeos (0 = todos)")
+    args = parser.parse_args()
+
+    video_dir = args.video_dir or ConfigManager().get('video_dir', 'videos/')
+    videos = []
+    for ext in VIDEO_EXTENSIONS:
+        videos.extend(sorted(Path(video_dir).glob(ext)))
+    if args.limit:
+        videos = videos[:args.limit]
+
+    if not videos:
+        print(f"Nenhum vídeo encontrado em {video_dir}")
+        return 1
+
+    extractors = {mode: FrameExtractor(mode=mode) for mode in ('auto', 'sequential', 'seek')}
+    totals = {}
+
+    print(f"{'vídeo':<30} {'n':>3} {'legado':>9} {'auto':>16} {'sequential':>11} {'seek':>9}")
+    for video in videos:
+        for n in NUM_FRAMES:
+            start = time.perf_counter()
+            legacy_extract(str(video), n)
+            legacy_time = time.perf_counter() - start
+            totals.setdefault((n, 'legado'), 0.0)
+            totals[(n, 'legado')] += legacy_time
+
+            row = {}
+            for mode, extractor in extractors.items():
+                start = time.perf_counter()
+                _, info = extractor.extract(str(video), num_frames=n)
+                elapsed = time.perf_counter() - start
+                row[mode] = (elapsed, info['mode'])
+                totals.setdefault((n, mode), 0.0)
+                totals[(n, mode)] += elapsed
+
+            auto_time, auto_mode = row['auto']
+            print(f"{video.name[:30]:<30} {n:>3} {legacy_time:>8.3f}s "
+                  f"{auto_time:>7.3f}s ({auto_mode[:3] if auto_mode else '-'}) "
+                  f"{row['sequential'][0]:>10.3f}s {row['seek'][0]:>8.3f}s")
+
+    print("\n=== Totais ===")
+    for n in NUM_FRAMES:
+        legacy_time = totals[(n, 'legado')]
+        parts = [f"legado {legacy_time:.2f}s"]
+        for mode in extractors:
+            t = totals[(n, mode)]
+            speedup = legacy_time / t if t > 0 else 0
+            parts.append(f"{mode} {t:.2f}s ({speedup:.1f}x)")
+        print(f"num_frames={n:<3} " + " | ".join(parts))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
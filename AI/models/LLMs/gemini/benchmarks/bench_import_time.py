@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de inicialização (estilo `python -X importtime`).
+
+Mede, em subprocessos limpos:
+  - o tempo cumulativo de importação de riot_gemini + construção do Menu,
+    com os módulos mais lentos;
+  - se algum módulo pesado (OpenCV, numpy, PIL, pandas, SDK do Gemini) foi
+    carregado antes do primeiro uso;
+  - o tempo total (wall) de comandos rápidos da CLI (config, report --help).
+
+Termina com código 1 se houver regressão: módulo pesado carregado na
+inicialização, tempo acima do orçamento ou acima da linha de base salva
+(--baseline) além da tolerância.
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --save-baseline benchmarks/import_baseline.json
+    python benchmarks/bench_import_time.py --baseline benchmarks/import_baseline.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Módulos que só devem ser carregados no primeiro uso
+HEAVY_MODULES = ['cv2', 'numpy', 'PIL', 'pandas', 'openpyxl', 'google.generativeai']
+
+STARTUP_CODE = (
+    "import sys, json\n"
+    "import riot_gemini\n"
+    "from src.menu import Menu\n"
+    "Menu()\n"
+    f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+)
+
+QUICK_COMMANDS = {
+    'config': ['config', '--summary', os.devnull],
+    'report --help': ['report', '--help'],
+}
+
+
+def parse_importtime(stderr):
+    """Retorna (tempo cumulativo total em ms, [(ms, módulo)] dos módulos de primeiro nível)."""
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Módulos de primeiro nível não têm indentação extra no nome
+        if not name[1:].startswith(' '):
+            top_level.append((int(cumulative) / 1000, name.strip()))
+    return sum(ms for ms, _ in top_level), top_level
+
+
+def measure_startup(runs):
+    totals = []
+    loaded = []
+    modules = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+                              cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stderr[-2000:])
+            raise SystemExit("Falha ao importar riot_gemini / criar o Menu.")
+        total, top_level = parse_importtime(proc.stderr)
+        totals.append(total)
+        loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+        modules = top_level
+    return statistics.median(totals), loaded, modules
+
+
+def measure_command(args, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, 'riot_gemini.py', *args], cwd=ROOT, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de inicialização e importações da ferramenta Gemini")
+    parser.add_argument('--runs', type=int, default=5, help="Execuções por medição (usa a mediana)")
+    parser.add_argument('--max-import-ms', type=float, default=300.0,
+                        help="Orçamento do tempo de importação + criação do Menu (ms)")
+    parser.add_argument('--max-command-s', type=float, default=0.5,
+                        help="Orçamento do tempo total de cada comando rápido (s)")
+    parser.add_argument('--baseline', help="JSON com uma medição anterior para comparar")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Piora relativa aceita em relação à linha de base")
+    parser.add_argument('--save-baseline', help="Grava a medição atual como linha de base")
+    parser.add_argument('--top', type=int, default=10, help="Módulos mais lentos exibidos")
+    args = parser.parse_args()
+
+    import_ms, loaded, modules = measure_startup(args.runs)
+    commands = {name: measure_command(command, args.runs) for name, command in QUICK_COMMANDS.items()}
+
+    print(f"Importação + Menu(): {import_ms:.0f} ms (mediana de {args.runs})")
+    print("Módulos de primeiro nível mais lentos:")
+    for ms, name in sorted(modules, reverse=True)[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+    for name, seconds in commands.items():
+        print(f"riot_gemini.py {name}: {seconds * 1000:.0f} ms")
+
+    failures = []
+    if loaded:
+        failures.append(f"módulos pesados carregados na inicialização: {', '.join(loaded)}")
+    if import_ms > args.max_import_ms:
+        failures.append(f"importação {import_ms:.0f} ms > orçamento {args.max_import_ms:.0f} ms")
+    for name, seconds in commands.items():
+        if seconds > args.max_command_s:
+            failures.append(f"'{name}' levou {seconds:.2f}s > orçamento {args.max_command_s:.2f}s")
+
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        limit = baseline['import_ms'] * (1 + args.tolerance)
+        if import_ms > limit:
+            failures.append(f"importação {import_ms:.0f} ms > linha de base {baseline['import_ms']:.0f} ms "
+                            f"(+{args.tolerance:.0%})")
+        for name, seconds in commands.items():
+            base = baseline.get('commands', {}).get(name)
+            if base and seconds > base * (1 + args.tolerance):
+                failures.append(f"'{name}' {seconds:.2f}s > linha de base {base:.2f}s (+{args.tolerance:.0%})")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'import_ms': import_ms, 'commands': commands}, f, indent=2)
+        print(f"Linha de base gravada em {args.save_baseline}")
+
+    if failures:
+        print("\nREGRESSÃO:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\nOK: inicialização dentro do orçamento.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark ponta a ponta dos modos de processamento em lote, sem API key.
+
+Gera um corpus sintético de vídeos com OpenCV e usa o ReplayBackend (respostas
+gravadas em results/*.json, latência/jitter configuráveis e 429s injetados)
+no lugar do Gemini. Para cada modo mede tempo total, vídeos/minuto e o custo
+das retentativas (429s e tempo com o limitador pausado).
+
+Modos:
+    classify-serial      classificação, 1 worker
+    classify-concurrent  classificação, --workers workers (BatchExecutor)
+    srt-serial           legendas + incorporação, um vídeo por vez
+    srt-pipeline         legendas + incorporação via VideoPipeline
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/bench_pipeline.py --videos 20 --latency 1.5 --rate-429 0.1 --workers 8
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2
+import numpy as np
+
+from src.batch_executor import BatchExecutor
+from src.config_manager import ConfigManager
+from src.model_backends import ReplayBackend
+from src.pipeline import VideoPipeline
+from src.rate_limiter import TokenBucketLimiter
+from src.video_analyzer import VideoAnalyzer
+from src.video_merger import VideoMerger
+
+MODES = ['classify-serial', 'classify-concurrent', 'srt-serial', 'srt-pipeline']
+
+
+def make_synthetic_corpus(directory, count, seconds, fps=15, size=(320, 240), seed=0):
+    """Gera vídeos com formas em movimento e um corte de cena no meio."""
+    rng = np.random.default_rng(seed)
+    paths = []
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    for i in range(count):
+        path = os.path.join(directory, f"vid{i + 1:04d}_cut_001.mp4")
+        writer = cv2.VideoWriter(path, fourcc, fps, size)
+        total = int(seconds * fps)
+        colors = [rng.integers(0, 255, 3).tolist() for _ in range(2)]
+        backgrounds = [rng.integers(0, 255, 3).tolist() for _ in range(2)]
+        for f in range(total):
+            scene = 0 if f < total // 2 else 1
+            frame = np.full((size[1], size[0], 3), backgrounds[scene], dtype=np.uint8)
+            x = int((f / total) * (size[0] - 60))
+            cv2.rectangle(frame, (x, 80), (x + 60, 160), colors[scene], -1)
+            writer.write(frame)
+        writer.release()
+        paths.append(Path(path))
+    return paths
+
+
+class SleepMerger:
+    """Substituto do VideoMerger quando o ffmpeg não está disponível."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def add_subtitles_to_video(self, video_path, subtitle_path, output_path, threads=None):
+        time.sleep(self.seconds)
+        shutil.copyfile(video_path, output_path)
+        return output_path
+
+
+def build_analyzer(config, backend, args, prompt):
+    limiter = TokenBucketLimiter(requests_per_minute=args.rpm, tokens_per_minute=0,
+                                 base_backoff=args.backoff, max_backoff=args.backoff * 8)
+    analyzer = VideoAnalyzer(None, config.get('model'), prompt, model=backend, rate_limiter=limiter,
+                             max_retries=10)
+    return analyzer, limiter
+
+
+def run_mode(mode, videos, work_dir, config, args):
+    backend = ReplayBackend(args.responses_dir, latency=args.latency, jitter=args.jitter,
+                            rate_limit_probability=args.rate_429, seed=args.seed)
+    out_dir = os.path.join(work_dir, mode)
+    os.makedirs(out_dir, exist_ok=True)
+
+    if mode.startswith('classify'):
+        prompt = config.get_prompt('classification') or "Retorne JSON."
+        analyzer, limiter = build_analyzer(config, backend, args, prompt)
+        workers = 1 if mode == 'classify-serial' else args.workers
+
+        def classify(video):
+            output = os.path.join(out_dir, f"{video.stem}_classificacao.json")
+            return analyzer.analyze_frame_classification(str(video), output, prompt)
+
+        start = time.perf_counter()
+        summary = BatchExecutor(workers).run(videos, classify, label=lambda v: v.name)
+        elapsed = time.perf_counter() - start
+        ok = len(summary['succeeded'])
+    else:
+        prompt = config.get_prompt('video_analysis') or "A duração do vídeo é de {duration} segundos"
+        analyzer, limiter = build_analyzer(config, backend, args, prompt)
+        merger = VideoMerger() if shutil.which('ffmpeg') and not args.fake_ffmpeg else SleepMerger(args.ffmpeg_seconds)
+        start = time.perf_counter()
+        if mode == 'srt-serial':
+            ok = 0
+            for video in videos:
+                srt = os.path.join(out_dir, f"{video.stem}_legendas.srt")
+                out = os.path.join(out_dir, f"{video.stem}_com_legendas.mp4")
+                if analyzer.analyze_video(str(video), srt) and merger.add_subtitles_to_video(str(video), srt, out):
+                    ok += 1
+        else:
+            pipeline = VideoPipeline(analyzer, merger, num_frames=8,
+                                     decode_options={'frame_selection': 'uniform'},
+                                     decode_workers=args.decode_workers, api_workers=args.workers,
+                                     ffmpeg_workers=args.ffmpeg_workers)
+            summary = pipeline.run(videos, out_dir, out_dir)
+            ok = len(summary['succeeded'])
+        elapsed = time.perf_counter() - start
+
+    limiter_stats = limiter.stats()
+    return {
+        'mode': mode,
+        'ok': ok,
+        'elapsed': elapsed,
+        'videos_per_min': ok / elapsed * 60 if elapsed > 0 else 0,
+        'calls': backend.stats()['calls'],
+        'rate_limited': backend.stats()['rate_limited'],
+        'pause': limiter_stats['total_pause'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta com o backend de replay")
+    parser.add_argument('--videos', type=int, default=12, help="Vídeos sintéticos no corpus")
+    parser.add_argument('--seconds', type=float, default=6.0, help="Duração de cada vídeo sintético")
+    parser.add_argument('--latency', type=float, default=1.0, help="Latência média simulada (s)")
+    parser.add_argument('--jitter', type=float, default=0.3, help="Jitter da latência (s)")
+    parser.add_argument('--rate-429', type=float, default=0.05, help="Probabilidade de 429 por chamada")
+    parser.add_argument('--backoff', type=float, default=2.0, help="Pausa inicial do limitador após 429 (s)")
+    parser.add_argument('--rpm', type=int, default=600, help="Cota simulada de requisições por minuto")
+    parser.add_argument('--workers', type=int, default=4, help="Requisições simultâneas nos modos concorrentes")
+    parser.add_argument('--decode-workers', type=int, default=2)
+    parser.add_argument('--ffmpeg-workers', type=int, default=2)
+    parser.add_argument('--fake-ffmpeg', action='store_true', help="Simula o ffmpeg com uma espera fixa")
+    parser.add_argument('--ffmpeg-seconds', type=float, default=0.5, help="Duração do ffmpeg simulado (s)")
+    parser.add_argument('--responses-dir', default='results/', help="Respostas gravadas (*_classificacao.json)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    args = parser.parse_args()
+
+    config = ConfigManager()
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        corpus_dir = os.path.join(work_dir, 'corpus')
+        os.makedirs(corpus_dir)
+        videos = make_synthetic_corpus(corpus_dir, args.videos, args.seconds, seed=args.seed)
+        print(f"Corpus sintético: {len(videos)} vídeos de {args.seconds:.0f}s")
+        for mode in args.modes:
+            print(f"\n--- {mode} ---")
+            results.append(run_mode(mode, videos, work_dir, config, args))
+
+    print(f"\n{'modo':<22} {'ok':>4} {'total(s)':>9} {'vídeos/min':>11} {'chamadas':>9} {'429s':>5} {'pausa(s)':>9}")
+    for r in results:
+        print(f"{r['mode']:<22} {r['ok']:>4} {r['elapsed']:>9.1f} {r['videos_per_min']:>11.1f} "
+              f"{r['calls']:>9} {r['rate_limited']:>5} {r['pause']:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark do pré-processamento de frames (tamanho, qualidade JPEG, recorte).
+
+Para cada configuração, classifica os vídeos que já possuem resultado em
+`output_dir` (results/*_classificacao.json) e compara a nova contagem com a
+de referência, registrando bytes enviados e latência por requisição.
+Requer API key configurada.
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/bench_preprocessing.py [--limit 5] [--csv bench_preprocessing.csv]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config_manager import ConfigManager
+from src.frame_preprocessor import FramePreprocessor
+from src.video_analyzer import VideoAnalyzer
+
+CLASSES = ['Bezerro', 'Novilha', 'Novilho', 'Garrote', 'Vaca', 'Touro']
+VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mov', '.mkv']
+
+# (max_side, jpeg_quality, crop)
+SETTINGS = [
+    (0, 95, None),
+    (1024, 85, None),
+    (768, 80, None),
+    (512, 75, None),
+    (384, 70, None),
+    (768, 80, 'center'),
+]
+
+
+def load_counts(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    counts = data.get('contagem_total', {})
+    return {c: int(counts.get(c, 0) or 0) for c in CLASSES}
+
+
+def find_reference_pairs(video_dir, results_dir):
+    """Vídeos de video_dir que já possuem JSON de referência em results_dir."""
+    pairs = []
+    for json_file in sorted(Path(results_dir).glob('*_classificacao.json')):
+        stem = json_file.stem.replace('_classificacao', '')
+        for ext in VIDEO_EXTENSIONS:
+            video = Path(video_dir) / f"{stem}{ext}"
+            if video.exists():
+                pairs.append((video, json_file))
+                break
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de pré-processamento de frames")
+    parser.add_argument('--limit', type=int, default=0, help="Máximo de vídeos (0 = todos)")
+    parser.add_argument('--csv', default='bench_preprocessing.csv', help="Arquivo CSV com os resultados")
+    args = parser.parse_args()
+
+    config = ConfigManager()
+    if not config.get('api_key'):
+        print("Erro: API key não configurada.")
+        return 1
+
+    pairs = find_reference_pairs(config.get('video_dir', 'videos/'), config.get('output_dir', 'results/'))
+    if args.limit:
+        pairs = pairs[:args.limit]
+    if not pairs:
+        print("Nenhum vídeo com resultado de referência encontrado.")
+        return 1
+
+    prompt = config.get_prompt('classification')
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for max_side, quality, crop in SETTINGS:
+            preprocessor = FramePreprocessor(max_side=max_side, jpeg_quality=quality, crop=crop)
+            analyzer = VideoAnalyzer(config.get('api_key'), config.get('model'), prompt,
+                                     frame_preprocessor=preprocessor)
+            exact = 0
+            abs_error = 0
+            evaluated = 0
+            for video, reference in pairs:
+                output = os.path.join(tmp_dir, f"{video.stem}_{max_side}_{quality}_{crop}.json")
+                if not analyzer.analyze_frame_classification(str(video), output, prompt):
+                    continue
+                try:
+                    got = load_counts(output)
+                except (ValueError, OSError):
+                    continue
+                expected = load_counts(reference)
+                evaluated += 1
+                exact += int(got == expected)
+                abs_error += sum(abs(got[c] - expected[c]) for c in CLASSES)
+
+            stats = analyzer.request_stats
+            mean_bytes = sum(s['bytes_uploaded'] for s in stats) / len(stats) if stats else 0
+            mean_latency = sum(s['latency'] for s in stats) / len(stats) if stats else 0
+            rows.append({
+                'max_side': max_side or 'original',
+                'jpeg_quality': quality,
+                'crop': crop or '',
+                'videos': evaluated,
+                'mean_kb': round(mean_bytes / 1024, 1),
+                'mean_latency_s': round(mean_latency, 2),
+                'exact_count_match': round(exact / evaluated, 3) if evaluated else 0,
+                'mean_abs_count_error': round(abs_error / evaluated, 2) if evaluated else 0,
+            })
+
+    print(f"\n{'max_side':>9} {'q':>3} {'crop':>7} {'KB':>8} {'lat(s)':>7} {'exato':>6} {'erro':>6}")
+    for r in rows:
+        print(f"{r['max_side']:>9} {r['jpeg_quality']:>3} {r['crop']:>7} {r['mean_kb']:>8} "
+              f"{r['mean_latency_s']:>7} {r['exact_count_match']:>6} {r['mean_abs_count_error']:>6}")
+
+    with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\nResultados salvos em: {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark da pré-triagem local (CLIP) contra as classificações existentes.
+
+Para cada results/*_classificacao.json com o frame salvo (.jpg), executa o
+zero-shot e compara com a resposta do Gemini:
+  - chamadas à API evitadas por limiar de "nenhum animal";
+  - pulos indevidos (frames pulados em que o Gemini encontrou animais);
+  - concordância entre a classe mais provável do CLIP e a classe mais contada
+    em contagem_total;
+  - tempo de CPU por frame.
+
+Não usa a API. Resultados gerados pela própria pré-triagem são ignorados.
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/bench_prescreen.py [--results-dir results] [--limit 200] [--csv bench_prescreen.csv]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image
+
+from src.classification_schema import CLASSES
+from src.config_manager import ConfigManager
+from src.prescreen import ClipPrescreen
+
+THRESHOLDS = [0.5, 0.7, 0.8, 0.85, 0.9, 0.95]
+
+
+def load_reference(results_dir, limit=None):
+    """Pares (frame .jpg, contagem_total) dos resultados vindos do Gemini."""
+    pairs = []
+    for json_file in sorted(Path(results_dir).glob('*_classificacao.json')):
+        image = json_file.with_suffix('.jpg')
+        if not image.exists():
+            continue
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if (data.get('pre_triagem') or {}).get('chamada_api_evitada'):
+            continue
+        counts = data.get('contagem_total', {})
+        counts = {c: int(counts.get(c, 0) or 0) for c in CLASSES}
+        has_animals = bool(data.get('animais_identificados')) or sum(counts.values()) > 0
+        pairs.append((image, counts, has_animals))
+        if limit and len(pairs) >= limit:
+            break
+    return pairs
+
+
+def main():
+    config = ConfigManager()
+    parser = argparse.ArgumentParser(description="Pré-triagem CLIP vs classificações do Gemini")
+    parser.add_argument('--results-dir', default=config.get('output_dir', 'results'))
+    parser.add_argument('--model', default=config.get('prescreen_model', 'ViT-B-32'))
+    parser.add_argument('--pretrained', default=config.get('prescreen_pretrained', 'laion2b_s34b_b79k'))
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--csv', help="Grava as probabilidades por frame")
+    args = parser.parse_args()
+
+    pairs = load_reference(args.results_dir, args.limit)
+    if not pairs:
+        print(f"Nenhum resultado com frame salvo em {args.results_dir}.")
+        return 1
+
+    prescreen = ClipPrescreen(args.model, args.pretrained)
+    rows = []
+    start = time.perf_counter()
+    for image_path, counts, has_animals in pairs:
+        with Image.open(image_path) as image:
+            scores = prescreen.score(image)
+        rows.append({
+            'frame': image_path.name,
+            'gemini_animais': sum(counts.values()),
+            'gemini_classe': max(counts, key=counts.get) if has_animals and any(counts.values()) else '',
+            'clip_sem_animal': round(scores['no_animal'], 4),
+            'clip_classe': max(scores['classes'], key=scores['classes'].get),
+            'has_animals': has_animals,
+        })
+    per_frame = (time.perf_counter() - start) / len(rows)
+
+    with_animals = [r for r in rows if r['has_animals']]
+    print(f"{len(rows)} frames ({len(with_animals)} com animais segundo o Gemini), "
+          f"{per_frame * 1000:.0f} ms/frame na CPU (inclui carga do modelo)")
+    print(f"\n{'limiar':>6} {'evitadas':>9} {'% evitadas':>10} {'pulos indevidos':>16} {'precisão':>9}")
+    for threshold in THRESHOLDS:
+        skipped = [r for r in rows if r['clip_sem_animal'] >= threshold]
+        wrong = [r for r in skipped if r['has_animals']]
+        precision = 1 - len(wrong) / len(skipped) if skipped else 1.0
+        print(f"{threshold:>6.2f} {len(skipped):>9} {len(skipped) / len(rows):>10.0%} "
+              f"{len(wrong):>16} {precision:>9.0%}")
+
+    labeled = [r for r in with_animals if r['gemini_classe']]
+    if labeled:
+        agree = sum(r['clip_classe'] == r['gemini_classe'] for r in labeled)
+        print(f"\nConcordância da classe predominante (CLIP vs Gemini): {agree}/{len(labeled)} "
+              f"({agree / len(labeled):.0%})")
+    print(f"Limiar configurado (prescreen_threshold): {config.get('prescreen_threshold', 0.85)}")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Resultados gravados em {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
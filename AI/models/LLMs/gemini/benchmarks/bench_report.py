@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark da geração incremental do relatório.
+
+Cria um diretório temporário com `--files` JSONs de classificação sintéticos
+(copiados de results/*_classificacao.json, com nomes distintos) e mede:
+  - primeira execução (índice vazio: todos os JSONs são lidos);
+  - execução sem mudanças (apenas o scan do diretório);
+  - execução após `--changed` arquivos novos ou alterados.
+
+Para cada execução mostra o tempo de atualização do índice e o total com a
+escrita do Excel (`--no-excel` mede só o índice). Não usa a API.
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/bench_report.py [--files 100000] [--changed 100] [--no-excel]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config_manager import ConfigManager
+from src.report_generator import ReportGenerator
+from src.result_index import RESULT_SUFFIX
+
+
+def load_templates(results_dir):
+    templates = []
+    for json_file in sorted(Path(results_dir).glob(f'*{RESULT_SUFFIX}')):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            templates.append(f.read())
+    return templates
+
+
+def make_results(directory, count, templates, start=0):
+    """Grava `count` JSONs sintéticos (synth_<n>_classificacao.json) a partir dos modelos."""
+    for i in range(start, start + count):
+        with open(os.path.join(directory, f'synth_{i:07d}{RESULT_SUFFIX}'), 'w', encoding='utf-8') as f:
+            f.write(templates[i % len(templates)])
+
+
+def timed_report(generator, output, excel):
+    quiet = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(quiet):
+        if excel:
+            generator.generate_excel_report(output)
+        else:
+            index = generator._open_index()
+            try:
+                generator.update_index(index)
+            finally:
+                index.close()
+    total = time.perf_counter() - start
+    # O tempo do índice vem do próprio relatório ("Índice de resultados: ...")
+    summary = next((line for line in quiet.getvalue().splitlines() if line.startswith('Índice')), '')
+    return total, summary
+
+
+def main():
+    config = ConfigManager()
+    parser = argparse.ArgumentParser(description="Benchmark da geração incremental do relatório")
+    parser.add_argument('--results-dir', default=config.get('output_dir', 'results'),
+                        help="JSONs usados como modelo para os sintéticos")
+    parser.add_argument('--files', type=int, default=100000)
+    parser.add_argument('--changed', type=int, default=100, help="Arquivos novos/alterados na 3ª execução")
+    parser.add_argument('--no-excel', action='store_true', help="Mede apenas a atualização do índice")
+    args = parser.parse_args()
+
+    templates = load_templates(args.results_dir)
+    if not templates:
+        print(f"Nenhum JSON de classificação em {args.results_dir} para usar como modelo.")
+        return 1
+
+    work_dir = tempfile.mkdtemp(prefix='bench_report_')
+    try:
+        start = time.perf_counter()
+        make_results(work_dir, args.files, templates)
+        print(f"{args.files} JSONs sintéticos gerados em {time.perf_counter() - start:.1f}s "
+              f"({len(templates)} modelos)\n")
+
+        generator = ReportGenerator(work_dir)
+        output = os.path.join(work_dir, 'relatorio.xlsx')
+        runs = [('primeira execução', None),
+                ('sem mudanças', None),
+                (f'{args.changed} novos/alterados', args.changed)]
+        for name, changed in runs:
+            if changed:
+                half = changed // 2
+                make_results(work_dir, changed - half, templates, start=args.files)
+                # Reescreve alguns existentes com outro conteúdo (mtime/tamanho mudam)
+                for i in range(half):
+                    path = os.path.join(work_dir, f'synth_{i:07d}{RESULT_SUFFIX}')
+                    data = json.loads(templates[(i + 1) % len(templates)])
+                    data['descricao_ambiente'] = f"{data.get('descricao_ambiente', '')} (revisado)"
+                    with open(path, 'w', encoding='utf-8') as f:
+                        json.dump(data, f, ensure_ascii=False)
+            total, summary = timed_report(generator, output, not args.no_excel)
+            print(f"{name:<24} {total:>8.2f}s  {summary}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
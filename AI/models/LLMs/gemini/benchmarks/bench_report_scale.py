@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark do relatório em escala: pico de memória (RSS) e tempo total.
+
+Gera `--files` JSONs sintéticos (ver bench_report.py) e constrói o relatório
+do zero, cada variante em um processo separado:
+  - pandas: leitura serial em listas de dicts, DataFrames e pd.ExcelWriter
+    (openpyxl em modo normal), como o relatório era gerado antes;
+  - streaming (1 processo): índice + escrita write-only, leitura serial;
+  - streaming (N processos): índice + escrita write-only, leitura em pool.
+
+O RSS informado é o maior entre o processo principal e os processos de
+leitura. Não usa a API.
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/bench_report_scale.py [--files 200000] [--workers 0] [--skip-pandas]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_report import load_templates, make_results
+from src.config_manager import ConfigManager
+from src.report_generator import ReportGenerator
+from src.result_index import ANIMAL_COLUMNS, RESULT_SUFFIX, VIDEO_COLUMNS, parse_result
+
+
+def report_pandas(results_dir, output):
+    import pandas as pd
+
+    rows_videos, rows_animals = [], []
+    for json_file in sorted(Path(results_dir).glob(f'*{RESULT_SUFFIX}')):
+        row_video, rows, error = parse_result(json_file)
+        if not error:
+            rows_videos.append(row_video)
+            rows_animals.extend(rows)
+    df_animals = pd.DataFrame(rows_animals, columns=ANIMAL_COLUMNS)
+    df_videos = pd.DataFrame(rows_videos, columns=VIDEO_COLUMNS)
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df_animals.to_excel(writer, sheet_name='Por Animal', index=False)
+        df_videos.to_excel(writer, sheet_name='Por Video (Resumo)', index=False)
+
+
+def run_child(mode, results_dir, workers):
+    """Executa uma variante e imprime {tempo, rss_mb} em JSON."""
+    output = os.path.join(results_dir, f'relatorio_{mode}.xlsx')
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == 'pandas':
+            report_pandas(results_dir, output)
+        else:
+            index_path = os.path.join(results_dir, f'index_{mode}.sqlite')
+            ReportGenerator(results_dir, index_path=index_path, workers=workers).generate_excel_report(output)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss em KB no Linux
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+              resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024
+    print(json.dumps({'time': elapsed, 'rss_mb': rss, 'size_mb': os.path.getsize(output) / 1024 / 1024}))
+
+
+def main():
+    config = ConfigManager()
+    parser = argparse.ArgumentParser(description="Relatório em escala: pico de RSS e tempo")
+    parser.add_argument('--results-dir', default=config.get('output_dir', 'results'),
+                        help="JSONs usados como modelo para os sintéticos")
+    parser.add_argument('--files', type=int, default=200000)
+    parser.add_argument('--workers', type=int, default=config.get('report_workers', 0),
+                        help="Processos de leitura da variante paralela (0 = um por núcleo)")
+    parser.add_argument('--skip-pandas', action='store_true', help="Não executa a variante pandas (lenta)")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.dir, args.workers)
+        return 0
+
+    templates = load_templates(args.results_dir)
+    if not templates:
+        print(f"Nenhum JSON de classificação em {args.results_dir} para usar como modelo.")
+        return 1
+
+    workers = args.workers or os.cpu_count() or 1
+    variants = [('pandas', 'pandas', 1)] if not args.skip_pandas else []
+    variants.append(('streaming (1 processo)', 'serial', 1))
+    if workers > 1:
+        variants.append((f'streaming ({workers} processos)', 'parallel', workers))
+
+    work_dir = tempfile.mkdtemp(prefix='bench_report_scale_')
+    try:
+        start = time.perf_counter()
+        make_results(work_dir, args.files, templates)
+        print(f"{args.files} JSONs sintéticos gerados em {time.perf_counter() - start:.1f}s\n")
+        print(f"{'variante':<26} {'tempo(s)':>9} {'pico RSS(MB)':>13} {'xlsx(MB)':>9}")
+        for name, mode, variant_workers in variants:
+            result = subprocess.run(
+                [sys.executable, __file__, '--child', mode, '--dir', work_dir, '--workers', str(variant_workers)],
+                capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"{name:<26} falhou: {result.stderr.strip().splitlines()[-1:]}")
+                continue
+            data = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{name:<26} {data['time']:>9.1f} {data['rss_mb']:>13.0f} {data['size_mb']:>9.1f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Verificação do SrtStreamWriter (src/srt_stream.py) com respostas divididas
+em pedaços, sem API.
+
+Cada caso é alimentado em todas as divisões possíveis em dois pedaços e em
+pedaços de 1 a 7 caracteres, e o arquivo gerado é comparado ao esperado:
+  - '\\r\\n' dividido entre dois pedaços (sem '\\r' perdido no texto);
+  - blocos separados por uma única quebra de linha (sem linha em branco);
+  - último bloco sem linha em branco final (gravado no close());
+  - resposta interrompida (close(complete=False) descarta o bloco incompleto);
+  - cercas de markdown ao redor das legendas.
+
+Termina com código 1 se alguma verificação falhar.
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/verify_srt_stream.py
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from src.srt_stream import SrtStreamWriter  # noqa: E402
+
+EXPECTED = ("1\n00:00:00,000 --> 00:00:02,000\nVaca em pé no curral\n\n"
+            "2\n00:00:02,000 --> 00:00:04,000\nBezerro mamando\nao lado da mãe\n")
+
+CASES = {
+    'lf': ("1\n00:00:00,000 --> 00:00:02,000\nVaca em pé no curral\n\n"
+           "2\n00:00:02,000 --> 00:00:04,000\nBezerro mamando\nao lado da mãe\n\n", True, EXPECTED),
+    'crlf': ("1\r\n00:00:00,000 --> 00:00:02,000\r\nVaca em pé no curral\r\n\r\n"
+             "2\r\n00:00:02,000 --> 00:00:04,000\r\nBezerro mamando\r\nao lado da mãe\r\n", True, EXPECTED),
+    'sem linha em branco': ("1\n00:00:00,000 --> 00:00:02,000\nVaca em pé no curral\n"
+                            "2\n00:00:02,000 --> 00:00:04,000\nBezerro mamando\nao lado da mãe", True, EXPECTED),
+    'markdown': ("```srt\n1\n00:00:00,000 --> 00:00:02,000\nVaca em pé no curral\n\n"
+                 "2\n00:00:02,000 --> 00:00:04,000\nBezerro mamando\nao lado da mãe\n```", True, EXPECTED),
+    'interrompida': ("1\r\n00:00:00,000 --> 00:00:02,000\r\nVaca em pé no curral\r\n\r\n"
+                     "2\r\n00:00:02,000 --> 00:00:04,000\r\nBezerro ma", False,
+                     "1\n00:00:00,000 --> 00:00:02,000\nVaca em pé no curral\n"),
+}
+
+
+def splits(text):
+    """Todas as divisões em dois pedaços e divisões em pedaços de tamanho fixo."""
+    for i in range(len(text) + 1):
+        yield [text[:i], text[i:]]
+    for size in range(1, 8):
+        yield [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def render(path, chunks, complete):
+    writer = SrtStreamWriter(path)
+    for chunk in chunks:
+        writer.feed(chunk)
+    writer.close(complete=complete)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def main():
+    failures = []
+    runs = 0
+    with tempfile.TemporaryDirectory(prefix='verify_srt_') as workdir:
+        path = os.path.join(workdir, 'legendas.srt')
+        for name, (text, complete, expected) in CASES.items():
+            for chunks in splits(text):
+                runs += 1
+                output = render(path, chunks, complete)
+                if output != expected:
+                    failures.append(f"{name}: pedaços {[len(c) for c in chunks][:6]}... -> {output!r}")
+                    break
+
+    print(f"{len(CASES)} casos, {runs} divisões em pedaços")
+    if failures:
+        print("\nFALHA:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\nOK: mesmo arquivo SRT em todas as divisões.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
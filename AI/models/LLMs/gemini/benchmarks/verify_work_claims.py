@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Verificação da classificação distribuída (src/work_claims.py), sem API.
+
+Inicia vários processos "nó" disputando o mesmo diretório de claims, com
+lease curto e trabalho simulado (sleep). Um dos nós trava no primeiro vídeo
+e é derrubado com SIGKILL no meio do lote; os demais devem recuperar o claim
+expirado. Ao final confere:
+  - todos os vídeos marcados como concluídos (.done);
+  - nenhum vídeo processado mais de uma vez;
+  - nenhum claim órfão restante.
+
+Termina com código 1 se alguma verificação falhar.
+
+Uso (a partir da pasta do gemini):
+    python benchmarks/verify_work_claims.py
+    python benchmarks/verify_work_claims.py --nodes 6 --videos 200 --workers 4
+"""
+
+import argparse
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from src.work_claims import WorkClaims  # noqa: E402
+
+
+def run_node(args):
+    """Processo de um nó: processa os vídeos reivindicados e registra cada um no log."""
+    claims = WorkClaims(args.claims_dir, node_id=args.node_id, lease_seconds=args.lease)
+    names = [f"video_{i:04d}.mp4" for i in range(args.videos)]
+
+    def process(name):
+        if args.hang:
+            # Nó "travado": nunca termina; será derrubado pelo processo principal
+            time.sleep(3600)
+        time.sleep(random.uniform(args.min_work, args.max_work))
+        with open(args.log, 'a', encoding='utf-8') as f:
+            f.write(f"{args.node_id} {name}\n")
+        return name
+
+    claims.run({n: n for n in names}, process, workers=args.workers)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica os claims distribuídos com vários processos")
+    parser.add_argument('--nodes', type=int, default=4, help="Processos disputando os vídeos")
+    parser.add_argument('--videos', type=int, default=120)
+    parser.add_argument('--workers', type=int, default=2, help="Threads por nó")
+    parser.add_argument('--lease', type=float, default=3.0, help="Lease dos claims (s)")
+    parser.add_argument('--min-work', type=float, default=0.02)
+    parser.add_argument('--max-work', type=float, default=0.1)
+    parser.add_argument('--kill-after', type=float, default=1.0, help="Segundos até derrubar o nó travado")
+    # Modo interno: execução de um nó
+    parser.add_argument('--node', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--node-id', help=argparse.SUPPRESS)
+    parser.add_argument('--claims-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--log', help=argparse.SUPPRESS)
+    parser.add_argument('--hang', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.node:
+        return run_node(args)
+
+    workdir = tempfile.mkdtemp(prefix='claims_')
+    claims_dir = os.path.join(workdir, 'claims')
+    log = os.path.join(workdir, 'processed.log')
+    common = [sys.executable, os.path.abspath(__file__), '--node', '--claims-dir', claims_dir, '--log', log,
+              '--videos', str(args.videos), '--workers', str(args.workers), '--lease', str(args.lease),
+              '--min-work', str(args.min_work), '--max-work', str(args.max_work)]
+    try:
+        start = time.perf_counter()
+        victim = subprocess.Popen(common + ['--node-id', 'no-travado', '--hang'],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # O nó travado pega seus claims antes dos demais
+        time.sleep(0.3)
+        nodes = [subprocess.Popen(common + ['--node-id', f'no-{i}'], stdout=subprocess.PIPE, text=True)
+                 for i in range(args.nodes - 1)]
+        time.sleep(args.kill_after)
+        victim.send_signal(signal.SIGKILL)
+        victim.wait()
+        print(f"Nó travado derrubado após {args.kill_after:.1f}s.")
+
+        reclaimed = 0
+        for proc in nodes:
+            out, _ = proc.communicate(timeout=args.lease * 10 + args.videos * args.max_work)
+            reclaimed += out.count('Claim expirado')
+            if proc.returncode != 0:
+                print(out[-2000:])
+        elapsed = time.perf_counter() - start
+
+        names = [f"video_{i:04d}.mp4" for i in range(args.videos)]
+        with open(log, 'r', encoding='utf-8') as f:
+            processed = Counter(line.split()[1] for line in f if line.strip())
+        claims = WorkClaims(claims_dir, lease_seconds=args.lease)
+        progress = claims.progress(names)
+        claims.print_progress(progress)
+
+        failures = []
+        missing = [n for n in names if not claims.is_done(n)]
+        if missing:
+            failures.append(f"{len(missing)} vídeos sem .done: {', '.join(missing[:5])}")
+        duplicates = {n: c for n, c in processed.items() if c > 1}
+        if duplicates:
+            failures.append(f"{len(duplicates)} vídeos processados mais de uma vez: "
+                            f"{', '.join(list(duplicates)[:5])}")
+        unprocessed = [n for n in names if n not in processed]
+        if unprocessed:
+            failures.append(f"{len(unprocessed)} vídeos nunca processados: {', '.join(unprocessed[:5])}")
+        leftovers = [e for e in os.listdir(claims_dir) if e.endswith('.claim') or e.endswith('.reclaim')]
+        if leftovers:
+            failures.append(f"{len(leftovers)} claims órfãos: {', '.join(leftovers[:5])}")
+        if not reclaimed:
+            failures.append("nenhum claim expirado foi recuperado do nó derrubado")
+
+        print(f"\n{args.videos} vídeos, {args.nodes} nós x {args.workers} threads em {elapsed:.1f}s; "
+              f"claims recuperados: {reclaimed}")
+        if failures:
+            print("\nFALHA:")
+            for failure in failures:
+                print(f"  - {failure}")
+            return 1
+        print("\nOK: cada vídeo processado exatamente uma vez.")
+        return 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,7 @@ Funcionalidades:
 - Mesclagem de vídeos
 - Adição de legendas aos vídeos
 - Configuração flexível via arquivo YAML
+- Modo não interativo: python riot_gemini.py {subtitles,classify,burn-in,report} --help
 
 Autor: Helton Maia
 Versão: 1.0
@@ -56,6 +57,10 @@ def main():
     menu.show_main_menu()
 
 if __name__ == "__main__":
+    # Com argumentos, roda em modo não interativo (cron / agendador de jobs)
+    if len(sys.argv) > 1:
+        from src.cli import main as cli_main
+        sys.exit(cli_main())
     try:
         main()
     except KeyboardInterrupt:
@@ -0,0 +1,59 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class BatchExecutor:
+    """
+    Executa uma função sobre uma lista de itens com N requisições em paralelo.
+
+    As chamadas à API são limitadas de fato pelo TokenBucketLimiter do
+    VideoAnalyzer; aqui apenas mantemos até `max_workers` itens em andamento
+    e consolidamos os resultados.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max(1, int(max_workers or 1))
+        self._print_lock = threading.Lock()
+
+    def log(self, message):
+        """Imprime sem intercalar linhas de threads diferentes."""
+        with self._print_lock:
+            print(message)
+
+    def run(self, items, func, label=str):
+        """
+        Aplica `func(item)` a cada item. Um resultado "falso" ou uma exceção
+        contam como falha.
+
+        Returns:
+            dict com 'succeeded', 'failed' (lista de (label, erro)) e 'elapsed'.
+        """
+        items = list(items)
+        total = len(items)
+        succeeded = []
+        failed = []
+        done = 0
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(func, item): item for item in items}
+            for future in as_completed(futures):
+                item = futures[future]
+                done += 1
+                try:
+                    ok = future.result()
+                    error = None if ok else "falha no processamento"
+                except Exception as e:
+                    ok = False
+                    error = str(e)
+
+                if ok:
+                    succeeded.append(label(item))
+                    self.log(f"[{done}/{total}] Concluído: {label(item)}")
+                else:
+                    failed.append((label(item), error))
+                    self.log(f"[{done}/{total}] Falhou: {label(item)} ({error})")
+
+        elapsed = time.perf_counter() - start
+        return {'succeeded': succeeded, 'failed': failed, 'elapsed': elapsed}
@@ -0,0 +1,147 @@
+import json
+import re
+
+# Classes contadas em contagem_total (as mesmas colunas do relatório)
+CLASSES = ['Bezerro', 'Novilha', 'Novilho', 'Garrote', 'Vaca', 'Touro']
+SEXOS = ['Macho', 'Fêmea']
+
+ANIMAL_FIELDS = ['classe', 'sexo', 'sinais_clinicos', 'comportamento', 'descricao_animal']
+
+# Esquema de resposta (subconjunto OpenAPI aceito pelo Gemini em response_schema)
+CLASSIFICATION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'descricao_ambiente': {'type': 'string'},
+        'animais_identificados': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'id': {'type': 'integer'},
+                    'classe': {'type': 'string', 'enum': CLASSES},
+                    'sexo': {'type': 'string', 'enum': SEXOS},
+                    'sinais_clinicos': {'type': 'string'},
+                    'comportamento': {'type': 'string'},
+                    'descricao_animal': {'type': 'string'},
+                },
+                'required': ['id', *ANIMAL_FIELDS],
+            },
+        },
+        'contagem_total': {
+            'type': 'object',
+            'properties': {name: {'type': 'integer'} for name in CLASSES},
+            'required': CLASSES,
+        },
+        'observacoes_gerais': {'type': 'string'},
+    },
+    'required': ['descricao_ambiente', 'animais_identificados', 'contagem_total'],
+}
+
+# Configuração de geração da classificação: JSON restrito ao esquema
+CLASSIFICATION_GENERATION_CONFIG = {
+    'response_mime_type': 'application/json',
+    'response_schema': CLASSIFICATION_SCHEMA,
+}
+
+REPAIR_PROMPT = """A resposta abaixo deveria ser um JSON de classificação de animais, mas não passou na validação.
+
+Erros encontrados:
+{errors}
+
+Corrija apenas o necessário para que o JSON seja válido e siga a estrutura
+{{"descricao_ambiente": str, "animais_identificados": [{{"id": int, "classe": {classes}, "sexo": {sexos},
+"sinais_clinicos": str, "comportamento": str, "descricao_animal": str}}], "contagem_total": {{{counts}}}}}.
+Não invente informações novas. Retorne APENAS o JSON.
+
+Resposta original:
+{response}
+"""
+
+
+def _strip_fences(text):
+    """Remove cercas de markdown (```json ... ```) e texto ao redor do objeto."""
+    text = re.sub(r'^\s*```(?:json)?\s*', '', text)
+    text = re.sub(r'\s*```\s*$', '', text)
+    start, end = text.find('{'), text.rfind('}')
+    if start != -1 and end > start:
+        text = text[start:end + 1]
+    return text.strip()
+
+
+def validate_classification(data):
+    """
+    Valida a estrutura da classificação. Retorna a lista de erros (vazia se válida).
+
+    Classes ausentes em contagem_total não são erro: são preenchidas com 0 por
+    normalize_classification.
+    """
+    if not isinstance(data, dict):
+        return ["o JSON deve ser um objeto"]
+
+    errors = []
+    if not isinstance(data.get('descricao_ambiente'), str):
+        errors.append("'descricao_ambiente' ausente ou não é texto")
+
+    animals = data.get('animais_identificados')
+    if not isinstance(animals, list):
+        errors.append("'animais_identificados' ausente ou não é lista")
+        animals = []
+    for i, animal in enumerate(animals, 1):
+        if not isinstance(animal, dict):
+            errors.append(f"animal {i}: não é objeto")
+            continue
+        missing = [field for field in ANIMAL_FIELDS if field not in animal]
+        if missing:
+            errors.append(f"animal {i}: campos ausentes {missing}")
+        if animal.get('classe') not in CLASSES:
+            errors.append(f"animal {i}: classe inválida {animal.get('classe')!r}")
+        if 'sexo' in animal and animal['sexo'] not in SEXOS:
+            errors.append(f"animal {i}: sexo inválido {animal['sexo']!r}")
+
+    counts = data.get('contagem_total')
+    if not isinstance(counts, dict):
+        errors.append("'contagem_total' ausente ou não é objeto")
+    else:
+        for name, value in counts.items():
+            if name not in CLASSES:
+                errors.append(f"contagem_total: classe desconhecida {name!r}")
+            elif isinstance(value, bool) or not isinstance(value, int) or value < 0:
+                errors.append(f"contagem_total: valor inválido para {name}: {value!r}")
+    return errors
+
+
+def normalize_classification(data):
+    """Preenche com 0 as classes ausentes em contagem_total."""
+    counts = data.setdefault('contagem_total', {})
+    for name in CLASSES:
+        counts.setdefault(name, 0)
+    return data
+
+
+def parse_classification(text):
+    """
+    Interpreta e valida a resposta do modelo.
+
+    Returns:
+        (data, errors): `data` normalizado quando a resposta é válida
+        (errors vazio); caso contrário, data=None e a lista de erros.
+    """
+    try:
+        data = json.loads(_strip_fences(text or ''))
+    except ValueError as e:
+        return None, [f"JSON inválido: {e}"]
+    errors = validate_classification(data)
+    if errors:
+        return None, errors
+    return normalize_classification(data), []
+
+
+def build_repair_prompt(response_text, errors):
+    """Prompt somente texto (sem imagem) para corrigir uma resposta malformada."""
+    return REPAIR_PROMPT.format(
+        errors="\n".join(f"- {e}" for e in errors),
+        classes=" | ".join(CLASSES),
+        sexos=" | ".join(SEXOS),
+        counts=", ".join(f'"{name}": int' for name in CLASSES),
+        response=response_text,
+    )
@@ -0,0 +1,377 @@
+import argparse
+import contextlib
+import fnmatch
+import json
+import os
+import re
+import sys
+import time
+import traceback
+from pathlib import Path
+
+from src.batch_executor import BatchExecutor
+
+# Códigos de saída (para cron / agendador de jobs)
+EXIT_OK = 0            # todos os vídeos selecionados foram processados (ou nada a fazer)
+EXIT_PARTIAL = 1       # parte dos vídeos falhou
+EXIT_USAGE = 2         # argumentos ou configuração inválidos
+EXIT_FAILED = 3        # nenhum vídeo processado com sucesso (ou erro inesperado)
+EXIT_INTERRUPTED = 130
+
+VIDEO_EXTENSIONS = ['*.mp4', '*.avi', '*.mov', '*.mkv']
+
+
+class CliError(Exception):
+    """Erro de uso/configuração: encerra com EXIT_USAGE."""
+
+
+def find_videos(video_dir, include=None, match=None):
+    """
+    Lista os vídeos do diretório (ordenados), filtrando opcionalmente por
+    padrões glob sobre o nome (`include`) e por expressão regular (`match`).
+    """
+    if not os.path.isdir(video_dir):
+        raise CliError(f"Diretório de vídeos não encontrado: {video_dir}")
+    videos = []
+    for ext in VIDEO_EXTENSIONS:
+        videos.extend(Path(video_dir).glob(ext))
+    videos = sorted(set(videos))
+    if include:
+        videos = [v for v in videos if any(fnmatch.fnmatch(v.name, pattern) for pattern in include)]
+    if match:
+        try:
+            regex = re.compile(match)
+        except re.error as e:
+            raise CliError(f"Expressão regular inválida em --match ({match!r}): {e}")
+        videos = [v for v in videos if regex.search(v.name)]
+    return videos
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='riot_gemini.py',
+        description="RIOT GEMINI em modo não interativo (sem argumentos, abre o menu).",
+    )
+
+    base = argparse.ArgumentParser(add_help=False)
+    base.add_argument('--config', default='config.yaml', help="Arquivo de configuração (padrão: config.yaml)")
+    base.add_argument('--summary', default='-', metavar='ARQUIVO',
+                      help="Grava o resumo JSON da execução no arquivo ('-' = stdout, padrão; "
+                           "o progresso vai para o stderr)")
+
+    common = argparse.ArgumentParser(add_help=False, parents=[base])
+    common.add_argument('--video-dir', help="Diretório de vídeos (padrão: video_dir da configuração)")
+    common.add_argument('--output-dir', help="Diretório de saída (padrão: output_dir da configuração)")
+    common.add_argument('--include', action='append', metavar='GLOB',
+                        help="Processa apenas vídeos cujo nome casa com o padrão (pode repetir)")
+    common.add_argument('--match', metavar='REGEX', help="Processa apenas vídeos cujo nome casa com a regex")
+    common.add_argument('--workers', type=int,
+                        help="Vídeos processados simultaneamente (max_workers; no burn-in, ffmpeg_workers)")
+    common.add_argument('--dry-run', action='store_true', help="Apenas lista o que seria processado")
+
+    api = argparse.ArgumentParser(add_help=False)
+    api.add_argument('--rpm', type=int, help="Limite de requisições por minuto (requests_per_minute)")
+    api.add_argument('--tpm', type=int, help="Limite de tokens por minuto (tokens_per_minute)")
+    api.add_argument('--cache-dir', help="Diretório do cache de respostas (cache_dir)")
+    api.add_argument('--backend', choices=['gemini', 'replay'], help="Backend do modelo (model_backend)")
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subtitles = subparsers.add_parser('subtitles', parents=[common, api],
+                                      help="Gera legendas SRT (opcionalmente já incorporadas aos vídeos)")
+    subtitles.add_argument('--subtitle-dir', help="Onde gravar os .srt (padrão: junto dos vídeos; "
+                                                  "com --burn-in, tmp_dir)")
+    subtitles.add_argument('--burn-in', action='store_true',
+                           help="Incorpora as legendas e gera os vídeos finais (pipeline)")
+    subtitles.add_argument('--subtitle-mode', choices=['burn', 'soft'],
+                           help="Com --burn-in: legenda desenhada (burn) ou faixa sem recodificar (soft)")
+    claims = argparse.ArgumentParser(add_help=False)
+    claims.add_argument('--claims-dir', help="Diretório de claims compartilhado entre as máquinas (claims_dir)")
+    claims.add_argument('--node-id', help="Identificação deste nó (padrão: hostname-pid)")
+
+    classify = subparsers.add_parser('classify', parents=[common, api, claims],
+                                     help="Classifica os animais (JSON por vídeo); com --claims-dir, distribuído entre nós")
+    classify.add_argument('--force', action='store_true', default=None,
+                          help="Reclassifica vídeos que já têm *_classificacao.json (reclassify)")
+    burn_in = subparsers.add_parser('burn-in', parents=[common], help="Incorpora legendas .srt existentes")
+    burn_in.add_argument('--subtitle-dir', help="Diretório dos .srt (padrão: mesmo diretório dos vídeos)")
+    burn_in.add_argument('--subtitle-mode', choices=['burn', 'soft'],
+                         help="Legenda desenhada no vídeo (burn) ou faixa de legenda sem recodificar (soft) "
+                              "(padrão: subtitle_mode)")
+    report = subparsers.add_parser('report', parents=[base], help="Gera o relatório Excel a partir dos JSONs de classificação")
+    report.add_argument('--results-dir', help="Diretório dos JSONs (padrão: output_dir da configuração)")
+    report.add_argument('--output', help="Arquivo .xlsx de saída")
+    report.add_argument('--export', help="Exportações colunares: parquet, csv ou parquet,csv (padrão: report_exports)")
+    report.add_argument('--exports-dir', help="Diretório das exportações (padrão: <results-dir>/analytics)")
+    subparsers.add_parser('config', parents=[base], help="Exibe a configuração efetiva (API key mascarada)")
+    progress = subparsers.add_parser('progress', parents=[base, claims],
+                                     help="Progresso da classificação distribuída (lido do diretório de claims)")
+    progress.add_argument('--video-dir', help="Considera apenas os vídeos deste diretório")
+    return parser
+
+
+def _apply_overrides(config_manager, args):
+    """Sobrescreve a configuração com as flags informadas (apenas nesta execução)."""
+    overrides = {
+        'max_workers': getattr(args, 'workers', None),
+        'requests_per_minute': getattr(args, 'rpm', None),
+        'tokens_per_minute': getattr(args, 'tpm', None),
+        'cache_dir': getattr(args, 'cache_dir', None),
+        'model_backend': getattr(args, 'backend', None),
+        'claims_dir': getattr(args, 'claims_dir', None),
+        'node_id': getattr(args, 'node_id', None),
+        'subtitle_mode': getattr(args, 'subtitle_mode', None),
+        'reclassify': getattr(args, 'force', None),
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            config_manager.set(key, value)
+
+
+class BatchCli:
+    """Executa os subcomandos reaproveitando o Menu (analisador, merger, manifesto e relatório)."""
+
+    def __init__(self, args):
+        from src.config_manager import ConfigManager
+        from src.menu import Menu
+
+        self.args = args
+        config_manager = ConfigManager(args.config)
+        _apply_overrides(config_manager, args)
+        self.config = config_manager
+        self.menu = Menu(config_manager)
+
+    def _videos(self):
+        video_dir = self.args.video_dir or self.config.get('video_dir', 'videos/')
+        videos = find_videos(video_dir, self.args.include, self.args.match)
+        print(f"{len(videos)} vídeos selecionados em {video_dir}.")
+        return videos
+
+    def _require_analyzer(self):
+        if not self.menu.video_analyzer:
+            raise CliError("API key não configurada (ou use --backend replay).")
+        return self.menu.video_analyzer
+
+    def _pending(self, kind, videos, prompt):
+        fingerprint = self.menu._job_fingerprint(prompt)
+        if self.args.dry_run:
+            # Consulta o manifesto sem registrar o lote
+            manifest = self.menu._get_manifest()
+            return manifest.unfinished(kind, videos)
+        return self.menu._pending_videos(kind, videos, fingerprint)
+
+    def _result(self, kind, videos, pending, summary=None, **extra):
+        """Resumo da execução; os erros vêm do manifesto quando o lote é rastreado."""
+        result = {
+            'selected': len(videos),
+            'already_done': len(videos) - len(pending),
+            'pending': [str(v) for v in pending] if self.args.dry_run else len(pending),
+        }
+        if summary is not None:
+            errors = {}
+            if kind:
+                errors = {os.path.basename(video): error for video, _, error in self.menu._get_manifest().failures(kind)}
+            result.update(
+                succeeded=summary['succeeded'],
+                failed=[{'video': name, 'error': errors.get(name, error)} for name, error in summary['failed']],
+                elapsed=round(summary['elapsed'], 3),
+            )
+        result.update(extra)
+        return result
+
+    def _run_batch(self, kind, videos, func):
+        self.menu._reset_cache_stats()
+        workers = self.config.get('max_workers', 4)
+        summary = BatchExecutor(workers).run(
+            videos, lambda v: self.menu._run_tracked(kind, v, lambda: func(v)), label=lambda v: v.name
+        )
+        self.menu._print_cache_stats()
+        self.menu._release_context_cache()
+        self.menu._print_manifest_summary(kind)
+        return summary
+
+    def subtitles(self):
+        analyzer = self._require_analyzer()
+        videos = self._videos()
+        kind = 'batch' if self.args.burn_in else 'subtitles'
+        pending = self._pending(kind, videos, analyzer.prompt_template)
+        if self.args.dry_run:
+            return self._result(kind, videos, pending)
+
+        if self.args.burn_in:
+            from src.pipeline import VideoPipeline
+            subtitle_dir = self.args.subtitle_dir or self.config.get('tmp_dir', 'tmp/')
+            output_dir = self.args.output_dir or self.config.get('output_dir', 'results/')
+            self.menu._reset_cache_stats()
+            pipeline = VideoPipeline(
+                analyzer, self.menu.video_merger,
+                num_frames=self.config.get('num_frames', 8),
+                decode_options=self.menu._decode_options(),
+                decode_workers=self.config.get('decode_workers', 2),
+                api_workers=self.config.get('max_workers', 4),
+                ffmpeg_workers=self.config.get('ffmpeg_workers', 0),
+                queue_size=self.config.get('pipeline_queue_size', 8),
+                manifest=self.menu._get_manifest(),
+                kind=kind,
+            )
+            summary = pipeline.run(pending, subtitle_dir, output_dir)
+            pipeline.print_summary(summary)
+            self.menu._print_cache_stats()
+            self.menu._release_context_cache()
+            return self._result(kind, videos, pending, summary, stages=summary['stages'])
+
+        subtitle_dir = self.args.subtitle_dir or self.args.output_dir
+        if subtitle_dir:
+            os.makedirs(subtitle_dir, exist_ok=True)
+
+        def analyze(video):
+            directory = Path(subtitle_dir) if subtitle_dir else video.parent
+            return analyzer.analyze_video(str(video), str(directory / f"{video.stem}_legendas.srt"))
+
+        return self._result(kind, videos, pending, self._run_batch(kind, pending, analyze))
+
+    def classify(self):
+        analyzer = self._require_analyzer()
+        prompt = self.config.get_prompt('classification')
+        if not prompt:
+            raise CliError("Prompt de classificação não encontrado em prompt_classificacao.yaml")
+        if self.args.output_dir:
+            self.config.set('output_dir', self.args.output_dir)
+        videos = self._videos()
+        claims = self.menu._create_work_claims()
+        if claims and not self.args.dry_run:
+            return self._classify_distributed(analyzer, claims, videos, prompt)
+        pending = self._pending('classify', videos, prompt)
+        if self.args.dry_run:
+            return self._result('classify', videos, pending)
+
+        summary = self._run_batch('classify', pending, lambda v: self.menu._run_classification(str(v)))
+        self.menu._print_classification_stats()
+        return self._result('classify', videos, pending, summary,
+                            classification=analyzer.classification_summary())
+
+    def _classify_distributed(self, analyzer, claims, videos, prompt):
+        """Classificação disputando os vídeos com os outros nós pelo diretório de claims."""
+        self.menu._get_manifest().register('classify', videos, self.menu._job_fingerprint(prompt))
+        self.menu._reset_cache_stats()
+        summary = self.menu._run_claimed('classify', claims, videos, self.menu._run_classification)
+        self.menu._print_cache_stats()
+        self.menu._release_context_cache()
+        self.menu._print_classification_stats()
+        progress = claims.progress([v.name for v in videos])
+        claims.print_progress(progress)
+        processed = [*summary['succeeded'], *summary['failed']]
+        return self._result('classify', videos, processed, summary, node=claims.node_id,
+                            classification=analyzer.classification_summary(), progress=progress)
+
+    def progress(self):
+        claims = self.menu._create_work_claims()
+        if not claims:
+            raise CliError("Execução distribuída desativada (configure 'claims_dir' ou use --claims-dir).")
+        names = None
+        if self.args.video_dir:
+            names = [v.name for v in find_videos(self.args.video_dir)]
+        progress = claims.progress(names)
+        claims.print_progress(progress)
+        return {'progress': progress}
+
+    def burn_in(self):
+        videos = self._videos()
+        subtitle_dir = Path(self.args.subtitle_dir) if self.args.subtitle_dir else None
+        output_dir = self.args.output_dir or self.config.get('output_dir', 'results/')
+
+        jobs, missing = [], []
+        for video in videos:
+            subtitle = (subtitle_dir or video.parent) / f"{video.stem}_legendas.srt"
+            (jobs if subtitle.exists() else missing).append((video, subtitle))
+        for video, _ in missing:
+            print(f"Legendas não encontradas para: {video.stem}")
+        if self.args.dry_run:
+            return {'selected': len(videos), 'pending': [str(v) for v, _ in jobs],
+                    'missing_subtitles': [str(v) for v, _ in missing]}
+
+        os.makedirs(output_dir, exist_ok=True)
+        if self.args.workers:
+            self.menu.video_merger.workers = self.args.workers
+        summary = self.menu.video_merger.burn_in_many(
+            [(video, subtitle, os.path.join(output_dir, f"{video.stem}_com_legendas.mp4")) for video, subtitle in jobs])
+        result = self._result(None, videos, jobs, summary, frames=summary['frames'], fps=round(summary['fps'], 1),
+                              ffmpeg_workers=summary['workers'], ffmpeg_threads=summary['threads'],
+                              subtitle_mode=self.menu.video_merger.subtitle_mode)
+        result['outputs'] = summary['outputs']
+        result['missing_subtitles'] = [str(v) for v, _ in missing]
+        return result
+
+    def report(self):
+        results_dir = self.args.results_dir or self.config.get('output_dir', 'results/')
+        generator = self.menu.report_generator
+        generator.results_dir = results_dir
+        if self.args.export:
+            generator.exports = [fmt.strip() for fmt in self.args.export.split(',') if fmt.strip()]
+        if self.args.exports_dir:
+            generator.exports_dir = self.args.exports_dir
+        output = generator.generate_excel_report(self.args.output)
+        return {'results_dir': results_dir, 'output': output, 'exports': generator.exported,
+                'succeeded': [output] if output else [], 'failed': [] if output else [{'error': 'relatório não gerado'}]}
+
+
+def show_config(args):
+    """Configuração efetiva, sem criar o Menu nem carregar os módulos de vídeo."""
+    from src.config_manager import ConfigManager
+
+    config = dict(ConfigManager(args.config).config)
+    api_key = config.get('api_key') or ''
+    if api_key:
+        config['api_key'] = api_key[:8] + '*' * (len(api_key) - 8)
+    return {'config_file': os.path.abspath(args.config), 'config': config}
+
+
+def _exit_code(result):
+    if 'failed' not in result:
+        return EXIT_OK
+    if not result['failed']:
+        return EXIT_OK
+    return EXIT_PARTIAL if result['succeeded'] else EXIT_FAILED
+
+
+def _write_summary(path, result):
+    text = json.dumps(result, ensure_ascii=False, indent=2, default=str)
+    if path == '-':
+        print(text)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+
+def main(argv=None):
+    """Ponto de entrada da CLI; retorna o código de saída."""
+    args = build_parser().parse_args(argv)
+    start = time.perf_counter()
+    result = {'command': args.command, 'dry_run': bool(getattr(args, 'dry_run', False))}
+    # Com o resumo no stdout, as mensagens de progresso vão para o stderr:
+    # o stdout fica só com o JSON, legível por scripts
+    progress_output = sys.stderr if args.summary == '-' else sys.stdout
+    try:
+        with contextlib.redirect_stdout(progress_output):
+            if args.command == 'config':
+                result.update(show_config(args))
+            else:
+                cli = BatchCli(args)
+                result.update(getattr(cli, args.command.replace('-', '_'))())
+        code = _exit_code(result)
+    except CliError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        result['error'] = str(e)
+        code = EXIT_USAGE
+    except KeyboardInterrupt:
+        print("\nInterrompido; o manifesto permite retomar de onde parou.", file=sys.stderr)
+        result['error'] = 'interrompido'
+        code = EXIT_INTERRUPTED
+    except Exception as e:
+        # Erro inesperado não pode sair com 1 (EXIT_PARTIAL = "alguns vídeos falharam")
+        traceback.print_exc()
+        result['error'] = f"{type(e).__name__}: {e}"
+        code = EXIT_FAILED
+    result['exit_code'] = code
+    result['wall_time'] = round(time.perf_counter() - start, 3)
+    _write_summary(args.summary, result)
+    return code
@@ -15,12 +15,62 @@ class ConfigManager:
         default_config = {
             'api_key': '',
             'model': 'gemini-2.5-flash',
+            'model_backend': 'gemini',
+            'replay_dir': '',
+            'replay_latency': 1.0,
+            'replay_jitter': 0.5,
+            'replay_429_rate': 0.0,
             'prompts_file': 'prompts.yaml',
             'classification_prompt_file': 'prompt_classificacao.yaml',
             'video_dir': 'videos/',
             'output_dir': 'results/',
             'tmp_dir': 'tmp/',
             'num_frames': 8,
+            'frame_extraction_mode': 'auto',
+            'frame_selection': 'uniform',
+            'frame_max_side': 0,
+            'jpeg_quality': 85,
+            'frame_crop': None,
+            'frame_center_crop_ratio': 0.8,
+            'stream_srt': True,
+            'structured_output': True,
+            'prescreen': False,
+            'prescreen_model': 'ViT-B-32',
+            'prescreen_pretrained': 'laion2b_s34b_b79k',
+            'prescreen_threshold': 0.85,
+            'dedup': False,
+            'dedup_method': 'phash',
+            'dedup_threshold': 0.9,
+            'dedup_scope': 'video',
+            'dedup_index': 'cache/dedup_index.sqlite',
+            'max_workers': 4,
+            'decode_workers': 2,
+            'ffmpeg_workers': 0,
+            'ffmpeg_threads': 0,
+            'subtitle_mode': 'burn',
+            'pipeline_queue_size': 8,
+            'requests_per_minute': 60,
+            'tokens_per_minute': 1000000,
+            'cache_dir': 'cache/',
+            'cache_max_mb': 1024,
+            'frame_cache_mb': 2048,
+            'frame_cache_format': 'npy',
+            'context_cache': False,
+            'context_cache_ttl': 3600,
+            'job_manifest': 'jobs.sqlite',
+            'reclassify': False,
+            'report_index': '',
+            'report_workers': 0,
+            'report_exports': [],
+            'report_exports_dir': '',
+            'trace_file': 'traces/requests.jsonl',
+            # None = preço do modelo de cada chamada (tracing.MODEL_PRICES_PER_MTOK)
+            'price_input_per_mtok': None,
+            'price_output_per_mtok': None,
+            'claims_dir': '',
+            'node_id': '',
+            'claim_lease_seconds': 600,
+            'claim_max_attempts': 3,
             'ffmpeg_path': 'ffmpeg'
         }
         
@@ -102,7 +152,8 @@ class ConfigManager:
         directories = [
             self.config.get('video_dir', 'videos/'),
             self.config.get('output_dir', 'results/'),
-            self.config.get('tmp_dir', 'tmp/')
+            self.config.get('tmp_dir', 'tmp/'),
+            self.config.get('cache_dir', 'cache/')
         ]
         
         for directory in directories:
@@ -113,8 +164,8 @@ class ConfigManager:
         """Valida se a configuração está correta."""
         errors = []
         
-        # Verificar API key
-        if not self.config.get('api_key'):
+        # Verificar API key (dispensável com o backend local de replay)
+        if not self.config.get('api_key') and self.config.get('model_backend') != 'replay':
             errors.append("API key não configurada")
         
         # Verificar diretórios
@@ -0,0 +1,127 @@
+import re
+import threading
+import time
+
+from src.rate_limiter import estimate_request_tokens
+
+# Campos variáveis dos prompts e como são informados fora do prefixo em cache
+DYNAMIC_FIELDS = {
+    'duration': "A duração do vídeo é de {duration} segundos.",
+}
+
+PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+
+def split_prompt(template):
+    """
+    Separa um template de prompt em prefixo estático e parte variável.
+
+    Os campos do template ({duration}...) são trocados no prefixo por uma
+    referência ao final da requisição; a parte variável traz os valores.
+
+    Returns:
+        (prefix, fields): texto estático e lista dos campos variáveis.
+    """
+    fields = []
+    for name in PLACEHOLDER.findall(template):
+        if name not in fields:
+            fields.append(name)
+    prefix = PLACEHOLDER.sub(lambda m: f"(informado ao final: {m.group(1)})", template)
+    return prefix, fields
+
+
+def dynamic_text(fields, values):
+    """Texto enviado a cada requisição com os valores dos campos variáveis."""
+    lines = []
+    for name in fields:
+        line = DYNAMIC_FIELDS.get(name, f"{name}: {{{name}}}")
+        lines.append(line.format(**{name: values.get(name, '')}))
+    return "\n".join(lines)
+
+
+class PromptContextCache:
+    """
+    Prefixos de prompt registrados uma única vez como contexto em cache no backend.
+
+    As instruções longas de prompts.yaml / prompt_classificacao.yaml são iguais
+    para todos os vídeos de um lote; com o cache de contexto, cada requisição
+    envia apenas os frames e os campos variáveis (ex.: duração). Se o backend
+    não suportar o cache ou recusar o prefixo (ex.: abaixo do mínimo de tokens),
+    o prefixo é marcado como indisponível e as requisições seguem com o prompt
+    completo.
+    """
+
+    def __init__(self, backend, ttl_seconds=3600):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._handles = {}
+        # Contextos substituídos na renovação, removidos só em release()
+        self._retired = []
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.requests = 0
+        self.fallbacks = 0
+        self.tokens_saved = 0
+
+    def handle_for(self, prefix):
+        """
+        Retorna o contexto em cache do prefixo, criando-o na primeira chamada (ou None).
+        Um contexto perto de expirar (90% do TTL) é recriado. O anterior não é
+        removido agora: outras threads podem estar usando-o (inclusive em espera
+        por um 429); ele expira pelo TTL ou é removido em release().
+        """
+        with self._lock:
+            if prefix in self._handles:
+                handle, created = self._handles[prefix]
+                if handle is None or time.monotonic() - created < self.ttl_seconds * 0.9:
+                    return handle
+                self._retired.append(handle)
+            try:
+                handle = self.backend.create_context_cache(prefix, self.ttl_seconds)
+                print(f"Contexto em cache registrado (~{estimate_request_tokens(prefix, 0)} tokens).")
+            except Exception as e:
+                handle = None
+                print(f"Cache de contexto indisponível, usando prompt completo: {e}")
+            # Falhas também são lembradas, para não repetir a tentativa a cada vídeo
+            self._handles[prefix] = (handle, time.monotonic())
+        return handle
+
+    def _delete(self, handle):
+        try:
+            self.backend.delete_context_cache(handle)
+        except Exception as e:
+            print(f"Aviso: falha ao remover contexto em cache: {e}")
+
+    def record_request(self, handle):
+        """Contabiliza uma requisição montada com (handle) ou sem (None) o contexto em cache."""
+        with self._lock:
+            self.requests += 1
+            if handle is None:
+                self.fallbacks += 1
+
+    def record_saved(self, handle, cached_tokens=None):
+        """Tokens do prefixo não reenviados; cached_tokens vem do usage_metadata quando disponível."""
+        if cached_tokens is None:
+            cached_tokens = estimate_request_tokens(handle.prefix, 0)
+        with self._lock:
+            self.tokens_saved += cached_tokens
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'cached_requests': self.requests - self.fallbacks,
+                'fallbacks': self.fallbacks,
+                'tokens_saved': self.tokens_saved,
+            }
+
+    def release(self):
+        """Remove os contextos criados (eles também expiram pelo TTL)."""
+        with self._lock:
+            handles = [h for h, _ in self._handles.values() if h is not None] + self._retired
+            self._handles.clear()
+            self._retired = []
+        for handle in handles:
+            self._delete(handle)
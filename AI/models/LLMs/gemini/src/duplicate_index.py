@@ -0,0 +1,230 @@
+import os
+import re
+import sqlite3
+import threading
+
+import numpy as np
+from PIL import Image
+
+# Cortes de um mesmo vídeo: vid0003_cut_001 ... vid0003_cut_005
+CUT_SUFFIX = re.compile(r'_cut_\d+$')
+
+
+def source_group(name):
+    """Vídeo de origem de um corte (nome sem o sufixo _cut_NNN)."""
+    return CUT_SUFFIX.sub('', name)
+
+
+def _dct_matrix(n):
+    k = np.arange(n)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+class PerceptualHasher:
+    """
+    pHash de 64 bits (DCT 32x32 da imagem em tons de cinza, 8x8 de baixa
+    frequência comparados à mediana), representado como vetor ±1 normalizado:
+    a similaridade de cosseno entre dois hashes é 1 - 2 * hamming / 64.
+    """
+
+    name = 'phash'
+
+    def __init__(self, size=32, hash_size=8):
+        self.size = size
+        self.hash_size = hash_size
+        self._dct = _dct_matrix(size)
+
+    def embed(self, images):
+        vectors = []
+        for image in images:
+            gray = np.asarray(image.convert('L').resize((self.size, self.size), Image.LANCZOS), dtype=np.float64)
+            low = (self._dct @ gray @ self._dct.T)[:self.hash_size, :self.hash_size].ravel()
+            bits = low > np.median(low[1:])
+            vectors.append(np.where(bits, 1.0, -1.0) / np.sqrt(bits.size))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class ClipEmbedder:
+    """Embeddings CLIP (via ClipPrescreen.embed), mais robustos a pequenas mudanças de enquadramento."""
+
+    name = 'clip'
+
+    def __init__(self, prescreen):
+        self.prescreen = prescreen
+
+    def embed(self, images):
+        return self.prescreen.embed(images).astype(np.float32)
+
+
+class _Pending:
+    """Vídeo sendo classificado: quem encontrar um quase-duplicado dele aguarda o resultado."""
+
+    def __init__(self, name, group, vector):
+        self.name = name
+        self.group = group
+        self.vector = vector
+        self.output = None
+        self.event = threading.Event()
+
+
+class DuplicateIndex:
+    """
+    Índice de embeddings dos frames representativos para detectar clipes quase idênticos.
+
+    Os vetores (normalizados) ficam em uma matriz NumPy em memória e cada busca
+    é um único produto matricial (similaridade de cosseno) contra todo o
+    índice, persistido em SQLite (uma linha por vídeo classificado). Com scope='video',
+    só são comparados cortes do mesmo vídeo de origem (vid0003_cut_001,
+    vid0003_cut_002...), evitando reaproveitar a classificação de outra
+    gravação feita no mesmo cenário.
+
+    Clipes em classificação também entram na busca: um quase-duplicado de um
+    vídeo ainda em andamento aguarda o resultado dele em vez de chamar a API
+    em paralelo.
+    """
+
+    def __init__(self, db_path, embedder, threshold=0.9, scope='video'):
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.embedder = embedder
+        self.threshold = threshold
+        self.scope = scope
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS frames ('
+            ' method TEXT NOT NULL,'
+            ' name TEXT NOT NULL,'
+            ' grp TEXT NOT NULL,'
+            ' output TEXT NOT NULL,'
+            ' vector BLOB NOT NULL,'
+            ' PRIMARY KEY (method, name))'
+        )
+        self._conn.commit()
+
+        self._names = []
+        self._groups = []
+        self._outputs = []
+        self._positions = {}
+        self._matrix = None
+        self._count = 0
+        self._pending = {}
+        rows = self._conn.execute('SELECT name, grp, output, vector FROM frames WHERE method = ?',
+                                  (embedder.name,)).fetchall()
+        for name, group, output, blob in rows:
+            self._append(name, group, output, np.frombuffer(blob, dtype=np.float32))
+        self.reset_stats()
+
+    @classmethod
+    def from_config(cls, config_manager, prescreen=None):
+        """Cria o índice a partir das chaves dedup_* (None se desativado)."""
+        if not config_manager.get('dedup', False):
+            return None
+        if config_manager.get('dedup_method', 'phash') == 'clip':
+            from src.prescreen import ClipPrescreen
+            embedder = ClipEmbedder(prescreen or ClipPrescreen(
+                model_name=config_manager.get('prescreen_model', 'ViT-B-32'),
+                pretrained=config_manager.get('prescreen_pretrained', 'laion2b_s34b_b79k'),
+            ))
+        else:
+            embedder = PerceptualHasher()
+        return cls(
+            config_manager.get('dedup_index', 'cache/dedup_index.sqlite'),
+            embedder,
+            threshold=config_manager.get('dedup_threshold', 0.9),
+            scope=config_manager.get('dedup_scope', 'video'),
+        )
+
+    def reset_stats(self):
+        self.lookups = 0
+        self.duplicates = 0
+
+    def stats(self):
+        with self._lock:
+            return {'indexed': self._count, 'lookups': self.lookups, 'duplicates': self.duplicates}
+
+    def _append(self, name, group, output, vector):
+        """Adiciona (ou substitui) uma linha da matriz; a capacidade dobra quando cheia."""
+        if name in self._positions:
+            i = self._positions[name]
+            self._matrix[i] = vector
+            self._outputs[i] = output
+            return
+        if self._matrix is None:
+            self._matrix = np.empty((64, vector.size), dtype=np.float32)
+        elif self._count == len(self._matrix):
+            self._matrix = np.concatenate([self._matrix, np.empty_like(self._matrix)])
+        self._matrix[self._count] = vector
+        self._positions[name] = self._count
+        self._names.append(name)
+        self._groups.append(group)
+        self._outputs.append(output)
+        self._count += 1
+
+    def embed(self, image):
+        return self.embedder.embed([image])[0]
+
+    def match(self, name, vector):
+        """
+        Procura um quase-duplicado (similaridade >= threshold) entre os vídeos
+        indexados e os em classificação.
+
+        Returns:
+            (origem, similaridade, pendente): `origem` é o JSON de saída do
+            vídeo encontrado; se ele ainda estiver em classificação, `pendente`
+            é o registro a aguardar (wait). Sem quase-duplicado, o vídeo é
+            registrado como em classificação e o retorno é (None, sim, None);
+            chame commit() ou discard() ao terminar.
+        """
+        group = source_group(name)
+        with self._lock:
+            best_sim, best = -1.0, None
+            if self._count:
+                sims = self._matrix[:self._count] @ vector
+                candidates = np.nonzero(sims >= self.threshold)[0]
+                for j in candidates[np.argsort(-sims[candidates])]:
+                    if self._names[j] == name or (self.scope == 'video' and self._groups[j] != group):
+                        continue
+                    if os.path.exists(self._outputs[j]):
+                        best_sim, best = float(sims[j]), self._outputs[j]
+                        break
+            for pending in self._pending.values():
+                if pending.name == name or (self.scope == 'video' and pending.group != group):
+                    continue
+                sim = float(pending.vector @ vector)
+                if sim >= self.threshold and sim > best_sim:
+                    best_sim, best = sim, pending
+            if best is not None:
+                if isinstance(best, _Pending):
+                    return None, best_sim, best
+                return best, best_sim, None
+            self._pending[name] = _Pending(name, group, vector)
+            return None, best_sim, None
+
+    def record(self, duplicate):
+        """Contabiliza a busca de um vídeo (e se ele reaproveitou outro resultado)."""
+        with self._lock:
+            self.lookups += 1
+            self.duplicates += bool(duplicate)
+
+    def commit(self, name, output):
+        """Indexa o vídeo classificado e libera quem aguardava o resultado dele."""
+        with self._lock:
+            pending = self._pending.pop(name, None)
+            if pending is None:
+                return
+            self._append(name, pending.group, output, pending.vector)
+            self._conn.execute('INSERT OR REPLACE INTO frames VALUES (?, ?, ?, ?, ?)',
+                               (self.embedder.name, name, pending.group, output, pending.vector.tobytes()))
+            self._conn.commit()
+        pending.output = output
+        pending.event.set()
+
+    def discard(self, name):
+        """Classificação falhou: os que aguardavam seguem para a API."""
+        with self._lock:
+            pending = self._pending.pop(name, None)
+        if pending:
+            pending.event.set()
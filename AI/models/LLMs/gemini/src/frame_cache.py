@@ -0,0 +1,245 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+from PIL import Image
+
+# Trechos lidos para a impressão digital do conteúdo do vídeo (início, meio e fim)
+FINGERPRINT_CHUNK = 1024 * 1024
+
+_fingerprints = {}
+_fingerprints_lock = threading.Lock()
+
+
+def video_fingerprint(video_path):
+    """
+    Hash do conteúdo do vídeo: tamanho + SHA-256 de 1 MiB do início, do meio e
+    do fim do arquivo. Renomear ou copiar o vídeo mantém o hash; reescrevê-lo
+    (ex.: novo corte com o mesmo nome) gera outro. Memorizado por caminho,
+    tamanho e mtime.
+    """
+    stat = os.stat(video_path)
+    memo_key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+    with _fingerprints_lock:
+        if memo_key in _fingerprints:
+            return _fingerprints[memo_key]
+
+    digest = hashlib.sha256(str(stat.st_size).encode('utf-8'))
+    with open(video_path, 'rb') as f:
+        for offset in sorted({0, max(0, stat.st_size // 2 - FINGERPRINT_CHUNK // 2),
+                              max(0, stat.st_size - FINGERPRINT_CHUNK)}):
+            f.seek(offset)
+            digest.update(f.read(FINGERPRINT_CHUNK))
+    fingerprint = digest.hexdigest()
+    with _fingerprints_lock:
+        _fingerprints[memo_key] = fingerprint
+    return fingerprint
+
+
+def sample_plan(num_frames, frame_selection, extraction_mode, selector=None):
+    """
+    Parâmetros que determinam quais frames são decodificados (parte da chave do cache).
+
+    O pré-processamento (redução, recorte, JPEG de envio) é aplicado depois do
+    cache, então mudá-lo reaproveita os frames já decodificados.
+    """
+    return {
+        'num_frames': num_frames,
+        'frame_selection': frame_selection,
+        'selector': selector if frame_selection == 'scene' else None,
+        'extraction_mode': extraction_mode,
+    }
+
+
+class FrameCache:
+    """
+    Cache em disco dos frames decodificados, compartilhado por legendas,
+    classificação (e pré-triagem/duplicados, que usam o mesmo frame) e pela
+    etapa de decodificação do pipeline, inclusive entre processos.
+
+    A chave é o SHA-256 de (hash do conteúdo do vídeo, plano de amostragem,
+    formato). Cada entrada é um diretório com os frames (JPEG ou .npy) e as
+    informações da extração; um índice SQLite guarda tamanho e último acesso
+    para remover as entradas menos usadas quando o total passa de `max_bytes`.
+
+    format='npy' (padrão) é sem perdas: os frames enviados são os mesmos de
+    uma execução sem cache. format='jpeg' ocupa bem menos disco; nele, os
+    frames devolvidos na primeira extração já são os relidos do cache, então
+    execuções com e sem cache enviam os mesmos pixels (e o cache de respostas
+    continua acertando).
+    """
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 * 1024 * 1024, format='npy', jpeg_quality=95):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.format = format
+        self.jpeg_quality = jpeg_quality
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # timeout: o índice é compartilhado com os processos de decodificação do pipeline
+        self._conn = sqlite3.connect(os.path.join(cache_dir, 'frames.sqlite'), timeout=30,
+                                     check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS frames ('
+            ' key TEXT PRIMARY KEY,'
+            ' size INTEGER NOT NULL,'
+            ' created REAL NOT NULL,'
+            ' last_access REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_frames_access ON frames(last_access)')
+        self._conn.commit()
+        self.reset_stats()
+
+    @classmethod
+    def from_config(cls, config_manager):
+        """Cria o cache a partir das chaves frame_cache_* (None se frame_cache_mb = 0)."""
+        options = cls.options_from_config(config_manager)
+        return cls(**options) if options else None
+
+    @staticmethod
+    def options_from_config(config_manager):
+        """Parâmetros serializáveis do cache (repassados aos processos do pipeline)."""
+        max_mb = config_manager.get('frame_cache_mb', 0)
+        if not max_mb:
+            return None
+        return {
+            'cache_dir': os.path.join(config_manager.get('cache_dir', 'cache/'), 'frames'),
+            'max_bytes': int(max_mb * 1024 * 1024),
+            'format': config_manager.get('frame_cache_format', 'npy'),
+        }
+
+    def options(self):
+        return {'cache_dir': self.cache_dir, 'max_bytes': self.max_bytes, 'format': self.format,
+                'jpeg_quality': self.jpeg_quality}
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.decode_saved = 0.0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'decode_saved': self.decode_saved,
+            }
+
+    def make_key(self, video_path, plan):
+        payload = json.dumps({'video': video_fingerprint(video_path), 'plan': plan, 'format': self.format,
+                              'quality': self.jpeg_quality if self.format == 'jpeg' else None},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, video_path, plan):
+        """
+        Frames em cache para o vídeo e o plano de amostragem.
+
+        Returns:
+            (frames PIL, info da extração) ou None.
+        """
+        key = self.make_key(video_path, plan)
+        entry = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry, 'info.json'), 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            frames = self._load_frames(entry, info['count'])
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self._conn.execute('UPDATE frames SET last_access = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            self.decode_saved += info['extraction'].get('decode_time', 0.0)
+        return frames, info['extraction']
+
+    def put(self, video_path, plan, frames, info):
+        """
+        Grava os frames extraídos. Retorna os frames como serão lidos do cache
+        (no formato JPEG, relidos do arquivo), para que a primeira execução envie
+        os mesmos pixels.
+        """
+        key = self.make_key(video_path, plan)
+        entry = self._entry_dir(key)
+        tmp = f"{entry}.{uuid.uuid4().hex[:8]}.tmp"
+        os.makedirs(tmp)
+        try:
+            size = self._save_frames(tmp, frames)
+            with open(os.path.join(tmp, 'info.json'), 'w', encoding='utf-8') as f:
+                json.dump({'count': len(frames), 'extraction': info}, f, default=str)
+            try:
+                os.replace(tmp, entry)
+            except OSError:
+                # Outro processo gravou a mesma entrada primeiro
+                shutil.rmtree(tmp, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO frames VALUES (?, ?, ?, ?)', (key, size, now, now))
+            self._conn.commit()
+            self._evict()
+        try:
+            return self._load_frames(entry, len(frames))
+        except OSError:
+            # Removida pela limpeza (cache menor que a própria entrada)
+            return frames
+
+    def _save_frames(self, directory, frames):
+        size = 0
+        for i, frame in enumerate(frames):
+            if self.format == 'npy':
+                import numpy as np
+                path = os.path.join(directory, f"{i:03d}.npy")
+                np.save(path, np.asarray(frame.convert('RGB')))
+            else:
+                path = os.path.join(directory, f"{i:03d}.jpg")
+                frame.convert('RGB').save(path, format='JPEG', quality=self.jpeg_quality)
+            size += os.path.getsize(path)
+        return size
+
+    def _load_frames(self, directory, count):
+        frames = []
+        for i in range(count):
+            if self.format == 'npy':
+                import numpy as np
+                frames.append(Image.fromarray(np.load(os.path.join(directory, f"{i:03d}.npy"))))
+            else:
+                with open(os.path.join(directory, f"{i:03d}.jpg"), 'rb') as f:
+                    image = Image.open(io.BytesIO(f.read()))
+                    image.load()
+                frames.append(image)
+        return frames
+
+    def _evict(self):
+        """Remove as entradas menos usadas até 90% de max_bytes (chamado sob o lock)."""
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM frames').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        removed = []
+        for key, size in self._conn.execute('SELECT key, size FROM frames ORDER BY last_access'):
+            if total <= target:
+                break
+            removed.append(key)
+            total -= size
+        for key in removed:
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+        self._conn.executemany('DELETE FROM frames WHERE key = ?', [(key,) for key in removed])
+        self._conn.commit()
@@ -0,0 +1,223 @@
+import shutil
+import subprocess
+import time
+
+import cv2
+from PIL import Image
+
+
+class FrameExtractor:
+    """
+    Motor de extração de frames com escolha automática de estratégia.
+
+    - 'sequential': decodifica o vídeo em uma única passada, usando grab() para
+      pular frames e retrieve() apenas nos índices amostrados.
+    - 'seek': posiciona o vídeo em cada índice (alinhado ao keyframe mais próximo
+      quando a lista de keyframes é conhecida), decodificando pouco por amostra.
+
+    Quando o intervalo entre amostras é menor que o GOP, cada seek decodificaria
+    desde o keyframe anterior o mesmo trecho que a passada sequencial, então a
+    passada sequencial vence. Com amostras esparsas em GOPs curtos, o seek vence.
+    """
+
+    # GOP assumido quando não é possível sondar o vídeo (keyint padrão do x264)
+    DEFAULT_GOP = 250
+
+    def __init__(self, mode='auto', ffprobe_path=None, probe_seconds=20):
+        """
+        Args:
+            mode: 'auto', 'sequential' ou 'seek'.
+            ffprobe_path: Executável do ffprobe (usado para descobrir keyframes).
+            probe_seconds: Trecho inicial do vídeo sondado em busca de keyframes.
+        """
+        self.mode = mode
+        self.ffprobe_path = ffprobe_path or shutil.which('ffprobe')
+        self.probe_seconds = probe_seconds
+
+    @staticmethod
+    def uniform_indices(total_frames, num_frames):
+        """Índices uniformemente espaçados (mesmo critério usado historicamente)."""
+        return [int(i * total_frames / num_frames) for i in range(num_frames)]
+
+    def probe_keyframes(self, video_path, fps):
+        """
+        Retorna os índices dos keyframes no trecho inicial do vídeo, ou None se o
+        ffprobe não estiver disponível.
+        """
+        if not self.ffprobe_path or fps <= 0:
+            return None
+
+        cmd = [
+            self.ffprobe_path, '-v', 'error',
+            '-select_streams', 'v:0',
+            '-skip_frame', 'nokey',
+            '-read_intervals', f'%+{self.probe_seconds}',
+            '-show_entries', 'frame=best_effort_timestamp_time',
+            '-of', 'csv=p=0',
+            video_path
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        if result.returncode != 0:
+            return None
+
+        keyframes = []
+        for line in result.stdout.split():
+            try:
+                keyframes.append(int(round(float(line.strip(',')) * fps)))
+            except ValueError:
+                continue
+        return sorted(set(keyframes)) or None
+
+    @staticmethod
+    def estimate_gop(keyframes, total_frames):
+        """Estima o tamanho do GOP a partir dos keyframes sondados."""
+        if not keyframes:
+            return FrameExtractor.DEFAULT_GOP
+        if len(keyframes) == 1:
+            # Um único keyframe no trecho sondado: GOP ao menos do tamanho do trecho
+            return max(FrameExtractor.DEFAULT_GOP, total_frames)
+        gaps = sorted(b - a for a, b in zip(keyframes, keyframes[1:]))
+        return max(1, gaps[len(gaps) // 2])
+
+    def choose_mode(self, frame_indices, gop):
+        """Escolhe a estratégia pela densidade de amostragem em relação ao GOP."""
+        if self.mode in ('sequential', 'seek'):
+            return self.mode
+        if len(frame_indices) <= 1:
+            return 'seek'
+        span = frame_indices[-1] - frame_indices[0]
+        stride = span / (len(frame_indices) - 1)
+        return 'sequential' if stride <= gop else 'seek'
+
+    @staticmethod
+    def _snap_to_keyframes(frame_indices, keyframes, tolerance, limit):
+        """
+        Move cada índice para o keyframe mais próximo, se estiver dentro da
+        tolerância. Índices além de `limit` (fora do trecho sondado) ficam intactos,
+        assim como os que se juntariam a outro no mesmo frame: a quantidade de
+        índices nunca diminui.
+        """
+        nearest = {}
+        for idx in frame_indices:
+            if idx <= limit:
+                keyframe = min(keyframes, key=lambda k: abs(k - idx))
+                if abs(keyframe - idx) <= tolerance:
+                    nearest[idx] = keyframe
+        claims = {}
+        for keyframe in nearest.values():
+            claims[keyframe] = claims.get(keyframe, 0) + 1
+        wanted = set(frame_indices)
+        return [nearest[idx] if idx in nearest and claims[nearest[idx]] == 1
+                and (nearest[idx] == idx or nearest[idx] not in wanted) else idx
+                for idx in frame_indices]
+
+    @staticmethod
+    def _to_output(frame, as_pil):
+        # Conversão BGR -> RGB apenas para frames mantidos
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return Image.fromarray(frame_rgb) if as_pil else frame_rgb
+
+    def _read_sequential(self, cap, frame_indices, as_pil):
+        frames, kept = [], []
+        wanted = sorted(set(frame_indices))
+        pos = 0
+        for idx in wanted:
+            while pos < idx:
+                if not cap.grab():
+                    return frames, kept
+                pos += 1
+            if not cap.grab():
+                break
+            pos += 1
+            ret, frame = cap.retrieve()
+            if ret:
+                frames.append(self._to_output(frame, as_pil))
+                kept.append(idx)
+        return frames, kept
+
+    def _read_seek(self, cap, frame_indices, as_pil):
+        frames, kept = [], []
+        for idx in frame_indices:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            ret, frame = cap.read()
+            if ret:
+                frames.append(self._to_output(frame, as_pil))
+                kept.append(idx)
+            else:
+                print(f"Aviso: Não foi possível ler o frame {idx}")
+        return frames, kept
+
+    def extract(self, video_path, num_frames=8, frame_indices=None, as_pil=True, approximate=None):
+        """
+        Extrai frames do vídeo.
+
+        Args:
+            video_path: Caminho do vídeo.
+            num_frames: Quantidade de frames uniformes (ignorado se frame_indices for dado).
+            frame_indices: Índices explícitos a extrair.
+            as_pil: Se True retorna PIL.Image (RGB), senão arrays numpy RGB.
+            approximate: Permite trocar, no modo seek, índices por keyframes próximos
+                (mais rápido). Padrão: só na amostragem uniforme; índices explícitos
+                (ex.: escolhidos pelo KeyframeSelector) são lidos exatamente.
+
+        Returns:
+            (frames, info) onde info contém total_frames, fps, duration, indices,
+            timestamps (s), mode, gop e decode_time. frames é None em caso de falha.
+        """
+        info = {'total_frames': 0, 'fps': 0.0, 'duration': 0, 'indices': [], 'timestamps': [],
+                'mode': None, 'gop': None, 'decode_time': 0.0}
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print(f"Erro: Não foi possível abrir o vídeo {video_path}")
+            return None, info
+
+        try:
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            info['total_frames'] = total_frames
+            info['fps'] = fps
+            info['duration'] = total_frames / fps if fps > 0 else 0
+
+            if total_frames <= 0:
+                print("Aviso: O vídeo parece estar vazio ou danificado")
+                return None, info
+
+            if approximate is None:
+                approximate = frame_indices is None
+            if frame_indices is None:
+                frame_indices = self.uniform_indices(total_frames, num_frames)
+            frame_indices = sorted(i for i in frame_indices if 0 <= i < total_frames)
+            if not frame_indices:
+                return None, info
+
+            keyframes = None
+            if self.mode != 'sequential':
+                keyframes = self.probe_keyframes(video_path, fps)
+            gop = self.estimate_gop(keyframes, total_frames)
+            mode = self.choose_mode(frame_indices, gop)
+
+            start = time.perf_counter()
+            if mode == 'sequential':
+                frames, kept = self._read_sequential(cap, frame_indices, as_pil)
+            else:
+                targets = frame_indices
+                if approximate and keyframes and len(frame_indices) > 1:
+                    stride = (frame_indices[-1] - frame_indices[0]) / (len(frame_indices) - 1)
+                    targets = sorted(set(self._snap_to_keyframes(
+                        frame_indices, keyframes, stride / 2, keyframes[-1] + gop)))
+                frames, kept = self._read_seek(cap, targets, as_pil)
+            info['decode_time'] = time.perf_counter() - start
+            info['mode'] = mode
+            info['gop'] = gop
+            info['indices'] = kept
+            info['timestamps'] = [idx / fps if fps > 0 else 0.0 for idx in kept]
+        finally:
+            cap.release()
+
+        if not frames:
+            return None, info
+        return frames, info
@@ -0,0 +1,92 @@
+import io
+
+from PIL import Image
+
+
+class FramePreprocessor:
+    """
+    Prepara os frames antes do envio ao modelo: recorte opcional (central ou ROI),
+    redução para um lado máximo e codificação JPEG.
+
+    Frames menores reduzem o tamanho do upload, a latência e os tokens de imagem
+    cobrados por requisição.
+    """
+
+    def __init__(self, max_side=1024, jpeg_quality=85, crop=None, center_crop_ratio=0.8):
+        """
+        Args:
+            max_side: Maior lado (px) após o redimensionamento (0/None = sem redução).
+            jpeg_quality: Qualidade JPEG (1-95).
+            crop: None, 'center' ou [x0, y0, x1, y1] em frações da imagem (ROI).
+            center_crop_ratio: Fração de cada dimensão mantida no recorte central.
+        """
+        self.max_side = max_side
+        self.jpeg_quality = jpeg_quality
+        self.crop = crop
+        self.center_crop_ratio = center_crop_ratio
+
+    @classmethod
+    def from_config(cls, config_manager):
+        """
+        Cria o pré-processador a partir das chaves frame_* da configuração.
+
+        Sem redução (frame_max_side = 0) nem recorte retorna None: os frames
+        seguem como imagens PIL, sem recodificação, como antes do pré-processamento.
+        """
+        max_side = config_manager.get('frame_max_side', 0)
+        crop = config_manager.get('frame_crop')
+        if not max_side and not crop:
+            return None
+        return cls(
+            max_side=max_side,
+            jpeg_quality=config_manager.get('jpeg_quality', 85),
+            crop=crop,
+            center_crop_ratio=config_manager.get('frame_center_crop_ratio', 0.8)
+        )
+
+    def describe(self):
+        """Parâmetros em forma serializável (usado em chaves de cache e relatórios)."""
+        return {
+            'max_side': self.max_side,
+            'jpeg_quality': self.jpeg_quality,
+            'crop': self.crop,
+            'center_crop_ratio': self.center_crop_ratio,
+        }
+
+    def _crop_box(self, width, height):
+        if not self.crop:
+            return None
+        if self.crop == 'center':
+            r = self.center_crop_ratio
+            x0 = width * (1 - r) / 2
+            y0 = height * (1 - r) / 2
+            return (int(x0), int(y0), int(width - x0), int(height - y0))
+        x0, y0, x1, y1 = self.crop
+        return (int(x0 * width), int(y0 * height), int(x1 * width), int(y1 * height))
+
+    def process(self, image):
+        """Aplica recorte e redução; retorna uma nova PIL.Image RGB."""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        box = self._crop_box(*image.size)
+        if box:
+            image = image.crop(box)
+
+        if self.max_side:
+            width, height = image.size
+            scale = self.max_side / max(width, height)
+            if scale < 1:
+                image = image.resize((max(1, round(width * scale)), max(1, round(height * scale))),
+                                     Image.LANCZOS)
+        return image
+
+    def encode(self, image):
+        """Codifica a imagem como JPEG no formato de blob aceito pelo Gemini."""
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=self.jpeg_quality, optimize=True)
+        return {'mime_type': 'image/jpeg', 'data': buffer.getvalue()}
+
+    def prepare(self, frames):
+        """Processa e codifica uma lista de frames PIL."""
+        return [self.encode(self.process(frame)) for frame in frames]
@@ -0,0 +1,233 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobManifest:
+    """
+    Manifesto persistente dos processamentos em lote (SQLite em modo WAL).
+
+    Cada vídeo de um tipo de lote ('subtitles', 'classify', 'batch') tem estado
+    (pending/running/done/failed), número de tentativas, último erro, tempos e
+    caminho de saída. Cada transição é gravada imediatamente, então uma queda
+    ou Ctrl-C no meio do lote não perde o progresso: ao retomar, apenas os
+    vídeos não concluídos são processados. Os tempos por etapa (extração, API,
+    ffmpeg...) ficam na mesma base e alimentam os relatórios de tempo.
+
+    Cada job em execução guarda o dono (`run_id` desta instância) e um
+    heartbeat renovado periodicamente; só volta a 'pending' o job cujo
+    heartbeat passou de `lease_seconds`, ou seja, cuja execução caiu. Assim
+    duas execuções simultâneas do mesmo lote não tomam os vídeos uma da outra.
+    """
+
+    def __init__(self, db_path, lease_seconds=300):
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.run_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat = None
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' kind TEXT NOT NULL,'
+            ' video TEXT NOT NULL,'
+            ' state TEXT NOT NULL,'
+            ' attempts INTEGER NOT NULL DEFAULT 0,'
+            ' last_error TEXT,'
+            ' output_path TEXT,'
+            ' started REAL,'
+            ' finished REAL,'
+            ' fingerprint TEXT,'
+            ' owner TEXT,'
+            ' heartbeat REAL,'
+            ' PRIMARY KEY (kind, video));'
+            'CREATE TABLE IF NOT EXISTS stage_timings ('
+            ' kind TEXT NOT NULL,'
+            ' video TEXT NOT NULL,'
+            ' stage TEXT NOT NULL,'
+            ' seconds REAL NOT NULL,'
+            ' recorded REAL NOT NULL);'
+            'CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(kind, state);'
+            'CREATE INDEX IF NOT EXISTS idx_stage ON stage_timings(kind, stage);'
+        )
+        # Bases criadas antes do heartbeat não têm as colunas de dono
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(jobs)')}
+        for column, kind in (('owner', 'TEXT'), ('heartbeat', 'REAL')):
+            if column not in columns:
+                self._conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} {kind}')
+        self._conn.commit()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def register(self, kind, videos, fingerprint=None):
+        """
+        Registra os vídeos do lote (os já conhecidos mantêm seu estado).
+
+        Jobs que ficaram 'running' de uma execução interrompida (heartbeat mais
+        antigo que `lease_seconds`) voltam a 'pending'; os de execuções ainda
+        ativas são mantidos.
+        `fingerprint` identifica a configuração do lote (modelo, prompt...): jobs
+        concluídos com outra configuração voltam a 'pending' com tentativas zeradas.
+        """
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO jobs (kind, video, state, fingerprint) VALUES (?, ?, ?, ?)',
+                [(kind, str(v), PENDING, fingerprint) for v in videos]
+            )
+            if fingerprint is not None:
+                self._conn.executemany(
+                    'UPDATE jobs SET state = ?, attempts = 0, fingerprint = ? '
+                    'WHERE kind = ? AND video = ? AND (fingerprint IS NULL OR fingerprint != ?)',
+                    [(PENDING, fingerprint, kind, str(v), fingerprint) for v in videos]
+                )
+            self._conn.execute(
+                'UPDATE jobs SET state = ?, owner = NULL WHERE kind = ? AND state = ? '
+                'AND (heartbeat IS NULL OR heartbeat < ?)',
+                (PENDING, kind, RUNNING, time.time() - self.lease_seconds)
+            )
+            self._conn.commit()
+
+    def unfinished(self, kind, videos, max_attempts=None):
+        """
+        Filtra `videos` mantendo apenas os que ainda não foram concluídos nem
+        estão em execução por outra instância ativa.
+        """
+        rows = self._query('SELECT video, state, attempts, heartbeat FROM jobs WHERE kind = ?', (kind,))
+        status = {video: (state, attempts, heartbeat) for video, state, attempts, heartbeat in rows}
+        alive_since = time.time() - self.lease_seconds
+        result = []
+        for video in videos:
+            state, attempts, heartbeat = status.get(str(video), (PENDING, 0, None))
+            if state == DONE:
+                continue
+            if state == RUNNING and heartbeat is not None and heartbeat >= alive_since:
+                continue
+            if max_attempts and state == FAILED and attempts >= max_attempts:
+                continue
+            result.append(video)
+        return result
+
+    def start(self, kind, video):
+        now = time.time()
+        self._execute(
+            'UPDATE jobs SET state = ?, attempts = attempts + 1, started = ?, finished = NULL, '
+            'owner = ?, heartbeat = ? WHERE kind = ? AND video = ?',
+            (RUNNING, now, self.run_id, now, kind, str(video))
+        )
+        self._ensure_heartbeat()
+
+    def finish(self, kind, video, output_path=None):
+        self._execute(
+            'UPDATE jobs SET state = ?, output_path = ?, last_error = NULL, finished = ? '
+            'WHERE kind = ? AND video = ?',
+            (DONE, str(output_path) if output_path else None, time.time(), kind, str(video))
+        )
+
+    def fail(self, kind, video, error):
+        self._execute(
+            'UPDATE jobs SET state = ?, last_error = ?, finished = ? WHERE kind = ? AND video = ?',
+            (FAILED, str(error)[:2000] if error else None, time.time(), kind, str(video))
+        )
+
+    def record_stage(self, kind, video, stage, seconds):
+        """Registra a duração de uma etapa do processamento de um vídeo."""
+        self._execute(
+            'INSERT INTO stage_timings (kind, video, stage, seconds, recorded) VALUES (?, ?, ?, ?, ?)',
+            (kind, str(video), stage, float(seconds), time.time())
+        )
+
+    def counts(self, kind):
+        """Quantidade de jobs por estado."""
+        rows = self._query('SELECT state, COUNT(*) FROM jobs WHERE kind = ? GROUP BY state', (kind,))
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def failures(self, kind):
+        """Lista (vídeo, tentativas, último erro) dos jobs com falha."""
+        return self._query(
+            'SELECT video, attempts, last_error FROM jobs WHERE kind = ? AND state = ? ORDER BY video',
+            (kind, FAILED)
+        )
+
+    def stage_report(self, kind):
+        """
+        Estatísticas por etapa: {etapa: {'count', 'total', 'mean', 'p95'}}.
+        """
+        rows = self._query(
+            'SELECT stage, seconds FROM stage_timings WHERE kind = ? ORDER BY stage, seconds', (kind,)
+        )
+        grouped = {}
+        for stage, seconds in rows:
+            grouped.setdefault(stage, []).append(seconds)
+
+        report = {}
+        for stage, values in grouped.items():
+            total = sum(values)
+            report[stage] = {
+                'count': len(values),
+                'total': total,
+                'mean': total / len(values),
+                'p95': values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))],
+            }
+        return report
+
+    def print_report(self, kind):
+        """Exibe o resumo de estados e tempos por etapa de um tipo de lote."""
+        counts = self.counts(kind)
+        print(f"\n=== Manifesto ({kind}) ===")
+        print(f"Concluídos: {counts[DONE]} | Falhas: {counts[FAILED]} | "
+              f"Pendentes: {counts[PENDING]} | Em execução: {counts[RUNNING]}")
+        report = self.stage_report(kind)
+        if report:
+            print(f"{'etapa':<12} {'n':>6} {'total(s)':>10} {'média(s)':>9} {'p95(s)':>8}")
+            for stage, s in sorted(report.items()):
+                print(f"{stage:<12} {s['count']:>6} {s['total']:>10.1f} {s['mean']:>9.2f} {s['p95']:>8.2f}")
+
+    # ------------------------------------------------------------------ heartbeat
+
+    def _ensure_heartbeat(self):
+        with self._lock:
+            if self._heartbeat and self._heartbeat.is_alive():
+                return
+            self._stop.clear()
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+            self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            try:
+                self._execute(
+                    'UPDATE jobs SET heartbeat = ? WHERE owner = ? AND state = ?',
+                    (time.time(), self.run_id, RUNNING)
+                )
+            except sqlite3.Error as e:
+                print(f"Aviso: falha ao renovar o heartbeat do manifesto: {e}")
+
+    def close(self):
+        """Para o heartbeat; jobs ainda em execução ficam para a próxima retomada."""
+        self._stop.set()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,136 @@
+import cv2
+import numpy as np
+
+
+class KeyframeSelector:
+    """
+    Seleciona os frames mais informativos de um vídeo dentro de um orçamento.
+
+    Faz uma única passada barata (frames amostrados a `analysis_fps` e reduzidos
+    para `analysis_width` px) calculando, para cada amostra:
+    - mudança de cena: distância de histograma HSV + diferença média de pixels
+      em relação à amostra anterior;
+    - qualidade: nitidez (variância do Laplaciano), zerada em frames escuros
+      ou estourados.
+
+    A linha do tempo é dividida em `budget` janelas com a mesma quantidade de
+    mudança acumulada (trechos com mais movimento recebem mais frames) e, em
+    cada janela, escolhe-se o frame de melhor qualidade. Com orçamento 1, o
+    resultado é o frame mais nítido e bem exposto do vídeo.
+    """
+
+    def __init__(self, analysis_fps=4.0, analysis_width=96, dark_threshold=20, bright_threshold=245):
+        self.analysis_fps = analysis_fps
+        self.analysis_width = analysis_width
+        self.dark_threshold = dark_threshold
+        self.bright_threshold = bright_threshold
+
+    def describe(self):
+        """Parâmetros em forma serializável (usado na chave do cache de frames)."""
+        return {
+            'analysis_fps': self.analysis_fps,
+            'analysis_width': self.analysis_width,
+            'dark_threshold': self.dark_threshold,
+            'bright_threshold': self.bright_threshold,
+        }
+
+    def analyze(self, video_path):
+        """
+        Passada de análise. Retorna (fps, total_frames, amostras), onde cada
+        amostra é um dict com index, change e quality; ou None em caso de falha.
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return None
+
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            stride = max(1, int(round(fps / self.analysis_fps))) if fps > 0 else 1
+
+            samples = []
+            prev_hist = None
+            prev_gray = None
+            pos = 0
+            while cap.grab():
+                if pos % stride == 0:
+                    ret, frame = cap.retrieve()
+                    if ret:
+                        height, width = frame.shape[:2]
+                        small_height = max(1, round(self.analysis_width * height / width))
+                        small = cv2.resize(frame, (self.analysis_width, small_height), interpolation=cv2.INTER_AREA)
+                        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+                        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+                        hist = cv2.calcHist([hsv], [0, 1], None, [16, 8], [0, 180, 0, 256])
+                        cv2.normalize(hist, hist)
+
+                        if prev_hist is None:
+                            change = 0.0
+                        else:
+                            change = (cv2.compareHist(prev_hist, hist, cv2.HISTCMP_BHATTACHARYYA)
+                                      + float(cv2.absdiff(gray, prev_gray).mean()) / 255.0)
+
+                        brightness = float(gray.mean())
+                        if brightness < self.dark_threshold or brightness > self.bright_threshold:
+                            quality = 0.0
+                        else:
+                            quality = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+                        samples.append({'index': pos, 'change': change, 'quality': quality})
+                        prev_hist, prev_gray = hist, gray
+                pos += 1
+        finally:
+            cap.release()
+
+        if not samples:
+            return None
+        # CAP_PROP_FRAME_COUNT pode ser impreciso; usar o que foi efetivamente lido
+        return fps, max(total_frames, pos), samples
+
+    @staticmethod
+    def pick(samples, budget):
+        """Escolhe até `budget` índices de frame a partir das amostras analisadas."""
+        if budget >= len(samples):
+            return [s['index'] for s in samples]
+
+        change = np.array([s['change'] for s in samples], dtype=np.float64)
+        quality = np.array([s['quality'] for s in samples], dtype=np.float64)
+
+        # Um piso de mudança mantém a distribuição uniforme em vídeos estáticos
+        floor = max(change.mean() * 0.25, 1e-6)
+        cumulative = np.cumsum(change + floor)
+        edges = np.searchsorted(cumulative, np.linspace(0, cumulative[-1], budget + 1)[1:-1])
+        windows = np.split(np.arange(len(samples)), edges)
+
+        max_quality = quality.max()
+        score = quality / max_quality if max_quality > 0 else quality
+        # Leve preferência por frames logo após mudanças de cena
+        max_change = change.max()
+        if max_change > 0:
+            score = score + 0.1 * change / max_change
+
+        picked = []
+        for window in windows:
+            if len(window) == 0:
+                continue
+            if max_quality > 0 and quality[window].max() == 0:
+                # Janela toda escura/estourada: ignorar se houver alternativas
+                continue
+            picked.append(samples[int(window[np.argmax(score[window])])]['index'])
+
+        if not picked:
+            picked = [samples[len(samples) // 2]['index']]
+        return sorted(set(picked))
+
+    def select(self, video_path, budget):
+        """
+        Retorna (índices, timestamps em segundos) dos frames escolhidos, ou
+        (None, None) se o vídeo não puder ser analisado.
+        """
+        analysis = self.analyze(video_path)
+        if not analysis:
+            return None, None
+        fps, _, samples = analysis
+        indices = self.pick(samples, max(1, budget))
+        timestamps = [idx / fps if fps > 0 else 0.0 for idx in indices]
+        return indices, timestamps
@@ -5,26 +5,250 @@ from pathlib import Path
 # Adicionar o diretório src ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+# Apenas módulos leves aqui: OpenCV, numpy, PIL, pandas e o SDK do Gemini são
+# importados no primeiro uso (analisador, pipeline, relatório), para que o menu
+# e os comandos rápidos abram sem carregá-los.
 from src.config_manager import ConfigManager
-from src.video_analyzer import VideoAnalyzer
 from src.video_merger import VideoMerger
-from src.report_generator import ReportGenerator
+from src.report_generator import INDEX_FILENAME, ReportGenerator
+from src.rate_limiter import TokenBucketLimiter
+from src.batch_executor import BatchExecutor
+from src.response_cache import ResponseCache
+from src.job_manifest import JobManifest
+from src.model_backends import create_backend
+from src.work_claims import WorkClaims
+from src.context_cache import PromptContextCache
+from src.tracing import RequestTracer, load_spans, summarize_spans, print_summary as print_tracing_summary
+import hashlib
 import time
 
 class Menu:
-    def __init__(self):
-        """Inicializa o menu principal."""
-        self.config_manager = ConfigManager()
+    def __init__(self, config_manager=None):
+        """
+        Inicializa o menu principal.
+
+        `config_manager` permite reaproveitar uma configuração já carregada
+        (ex.: com sobrescritas da CLI não interativa).
+        """
+        self.config_manager = config_manager or ConfigManager()
         self.video_analyzer = None
-        self.video_merger = VideoMerger()
-        self.report_generator = ReportGenerator(self.config_manager.get('output_dir', 'results'))
-        
-        # Inicializar analisador se API key estiver configurada
-        api_key = self.config_manager.get('api_key')
-        if api_key:
-            model_name = self.config_manager.get('model', 'gemini-3-pro-preview')
-            prompt = self.config_manager.get_prompt('video_analysis')
-            self.video_analyzer = VideoAnalyzer(api_key, model_name, prompt)
+        self.video_merger = VideoMerger(self.config_manager.get('ffmpeg_path', 'ffmpeg'),
+                                        workers=self.config_manager.get('ffmpeg_workers', 0),
+                                        threads=self.config_manager.get('ffmpeg_threads', 0),
+                                        subtitle_mode=self.config_manager.get('subtitle_mode', 'burn'))
+        self.report_generator = ReportGenerator(self.config_manager.get('output_dir', 'results'),
+                                                # Padrão em cache_dir: results/ é versionado e não deve mudar a cada relatório
+                                                index_path=(self.config_manager.get('report_index') or
+                                                            os.path.join(self.config_manager.get('cache_dir', 'cache/'),
+                                                                         INDEX_FILENAME)),
+                                                workers=self.config_manager.get('report_workers', 0),
+                                                exports=self.config_manager.get('report_exports', []),
+                                                exports_dir=self.config_manager.get('report_exports_dir') or None)
+        self.job_manifest = None
+        # Analisador criado sob demanda (ver a propriedade video_analyzer)
+        self._video_analyzer = None
+
+    @property
+    def video_analyzer(self):
+        """
+        Analisador de vídeos, criado no primeiro uso se houver API key (ou backend
+        replay). Retorna None quando não há como criá-lo.
+        """
+        if self._video_analyzer is None:
+            api_key = self.config_manager.get('api_key')
+            if api_key or self.config_manager.get('model_backend') == 'replay':
+                self._video_analyzer = self._create_video_analyzer(api_key)
+        return self._video_analyzer
+
+    @video_analyzer.setter
+    def video_analyzer(self, analyzer):
+        self._video_analyzer = analyzer
+
+    def _create_video_analyzer(self, api_key):
+        """Cria o analisador com os parâmetros da configuração atual."""
+        from src.video_analyzer import VideoAnalyzer
+        from src.frame_extractor import FrameExtractor
+        from src.frame_preprocessor import FramePreprocessor
+        from src.keyframe_selector import KeyframeSelector
+        from src.prescreen import ClipPrescreen
+        from src.duplicate_index import DuplicateIndex
+        from src.frame_cache import FrameCache
+
+        model_name = self.config_manager.get('model', 'gemini-3-pro-preview')
+        prompt = self.config_manager.get_prompt('video_analysis')
+        frame_extractor = FrameExtractor(mode=self.config_manager.get('frame_extraction_mode', 'auto'))
+        # Limitador compartilhado por todas as requisições deste analisador
+        rate_limiter = TokenBucketLimiter(
+            requests_per_minute=self.config_manager.get('requests_per_minute', 0),
+            tokens_per_minute=self.config_manager.get('tokens_per_minute', 0)
+        )
+        # Seleção de frames por mudança de cena (opcional; 'uniform' mantém a amostragem uniforme)
+        keyframe_selector = None
+        if self.config_manager.get('frame_selection', 'uniform') == 'scene':
+            keyframe_selector = KeyframeSelector()
+        # Cache de respostas em disco (cache_max_mb = 0 desativa)
+        response_cache = None
+        cache_max_mb = self.config_manager.get('cache_max_mb', 0)
+        if cache_max_mb:
+            response_cache = ResponseCache(self.config_manager.get('cache_dir', 'cache/'),
+                                           max_bytes=int(cache_max_mb * 1024 * 1024))
+        model = create_backend(self.config_manager, api_key, model_name)
+        # Prefixo estático dos prompts registrado uma vez por lote como contexto em cache
+        context_cache = None
+        if self.config_manager.get('context_cache', False):
+            context_cache = PromptContextCache(model, ttl_seconds=self.config_manager.get('context_cache_ttl', 3600))
+        prescreen = ClipPrescreen.from_config(self.config_manager)
+        return VideoAnalyzer(api_key, model_name, prompt, frame_extractor=frame_extractor, model=model,
+                             rate_limiter=rate_limiter, response_cache=response_cache,
+                             frame_preprocessor=FramePreprocessor.from_config(self.config_manager),
+                             keyframe_selector=keyframe_selector,
+                             stream_srt=self.config_manager.get('stream_srt', False),
+                             structured_output=self.config_manager.get('structured_output', True),
+                             tracer=self._create_tracer(),
+                             context_cache=context_cache,
+                             prescreen=prescreen,
+                             duplicate_index=DuplicateIndex.from_config(self.config_manager, prescreen),
+                             frame_cache=FrameCache.from_config(self.config_manager))
+
+    def _create_tracer(self):
+        """Tracer JSONL das chamadas ao modelo (trace_file vazio desativa)."""
+        trace_file = self.config_manager.get('trace_file', '')
+        return RequestTracer(trace_file) if trace_file else None
+
+    def show_trace_summary(self):
+        """Resume os spans gravados: vazão, latência p50/p95, retentativas e custo."""
+        trace_file = self.config_manager.get('trace_file', '')
+        if not trace_file or not os.path.exists(trace_file):
+            print("Nenhum trace de chamadas encontrado (configure 'trace_file').")
+            return
+        run = 'latest' if input("Apenas a última execução? (s/n): ").strip().lower() == 's' else None
+        summary = summarize_spans(
+            load_spans(trace_file, run),
+            self.config_manager.get('price_input_per_mtok'),
+            self.config_manager.get('price_output_per_mtok'),
+        )
+        print_tracing_summary(summary)
+
+    def _get_manifest(self):
+        """Abre (sob demanda) o manifesto persistente dos lotes."""
+        if self.job_manifest is None:
+            self.job_manifest = JobManifest(self.config_manager.get('job_manifest', 'jobs.sqlite'))
+        return self.job_manifest
+
+    def _job_fingerprint(self, prompt):
+        """Identifica a configuração que produz as saídas (modelo + prompt)."""
+        model_name = self.config_manager.get('model', '')
+        return hashlib.sha256(f"{model_name}\0{prompt}".encode('utf-8')).hexdigest()[:16]
+
+    def _pending_videos(self, kind, video_files, fingerprint=None):
+        """Registra o lote no manifesto e retorna apenas os vídeos não concluídos."""
+        manifest = self._get_manifest()
+        manifest.register(kind, video_files, fingerprint)
+        pending = manifest.unfinished(kind, video_files)
+        done = len(video_files) - len(pending)
+        if done:
+            print(f"Retomando lote: {done} vídeos já concluídos (ou em execução por outra instância) "
+                  f"segundo o manifesto, {len(pending)} pendentes.")
+        return pending
+
+    def _run_tracked(self, kind, video_file, func):
+        """
+        Executa func() para um vídeo registrando no manifesto estado, tentativa,
+        erro, caminho de saída e tempo de cada etapa.
+        """
+        manifest = self._get_manifest()
+        manifest.start(kind, video_file)
+        self.video_analyzer.reset_run_state()
+        start = time.perf_counter()
+        try:
+            output = func()
+        except Exception as e:
+            print(f"Erro ao processar {os.path.basename(str(video_file))}: {e}")
+            manifest.fail(kind, video_file, e)
+            return None
+        finally:
+            for stage, seconds in self.video_analyzer.last_timings.items():
+                manifest.record_stage(kind, video_file, stage, seconds)
+            manifest.record_stage(kind, video_file, 'total', time.perf_counter() - start)
+
+        if output:
+            manifest.finish(kind, video_file, output)
+        else:
+            manifest.fail(kind, video_file, self.video_analyzer.last_error or "falha no processamento")
+        return output
+
+    def _print_manifest_summary(self, kind):
+        """Exibe o resumo persistido do lote (estados, falhas e tempos por etapa)."""
+        manifest = self._get_manifest()
+        manifest.print_report(kind)
+        failures = manifest.failures(kind)
+        if failures:
+            print("\nVídeos que falharam:")
+            for video, attempts, error in failures:
+                print(f"- {os.path.basename(video)} ({attempts} tentativa(s)): {error}")
+
+    def _decode_options(self):
+        """Parâmetros de seleção/extração/pré-processamento para a etapa de decodificação em outro processo."""
+        analyzer = self.video_analyzer
+        return {
+            'frame_selection': 'scene' if analyzer.keyframe_selector else 'uniform',
+            'extraction_mode': analyzer.frame_extractor.mode,
+            'preprocess': analyzer.frame_preprocessor.describe() if analyzer.frame_preprocessor else None,
+            'frame_cache': analyzer.frame_cache.options() if analyzer.frame_cache else None,
+        }
+
+    def _reset_cache_stats(self):
+        """Zera as estatísticas dos caches no início de um lote."""
+        if self.video_analyzer.response_cache:
+            self.video_analyzer.response_cache.reset_stats()
+        if self.video_analyzer.context_cache:
+            self.video_analyzer.context_cache.reset_stats()
+        if self.video_analyzer.prescreen:
+            self.video_analyzer.prescreen.reset_stats()
+        if self.video_analyzer.duplicate_index:
+            self.video_analyzer.duplicate_index.reset_stats()
+        if self.video_analyzer.frame_cache:
+            self.video_analyzer.frame_cache.reset_stats()
+
+    def _print_cache_stats(self):
+        """Exibe acertos/faltas dos caches de respostas e de frames e os tokens poupados pelo cache de contexto."""
+        cache = self.video_analyzer.response_cache if self.video_analyzer else None
+        if cache:
+            stats = cache.stats()
+            print(f"Cache de respostas: {stats['hits']} acertos, {stats['misses']} faltas "
+                  f"(taxa de acerto {stats['hit_rate']:.0%}).")
+        context_cache = self.video_analyzer.context_cache if self.video_analyzer else None
+        if context_cache:
+            stats = context_cache.stats()
+            print(f"Cache de contexto: {stats['cached_requests']}/{stats['requests']} requisições com o prefixo "
+                  f"em cache, {stats['tokens_saved']} tokens de entrada não reenviados.")
+        frame_cache = self.video_analyzer.frame_cache if self.video_analyzer else None
+        if frame_cache:
+            stats = frame_cache.stats()
+            if stats['hits'] or stats['misses']:
+                print(f"Cache de frames: {stats['hits']} acertos, {stats['misses']} faltas "
+                      f"(~{stats['decode_saved']:.1f}s de decodificação evitados).")
+
+    def _release_context_cache(self):
+        """Remove os contextos em cache criados durante o lote."""
+        if self.video_analyzer and self.video_analyzer.context_cache:
+            self.video_analyzer.context_cache.release()
+
+    def _print_classification_stats(self):
+        """Exibe a taxa de respostas malformadas e as chamadas evitadas (pré-triagem e quase-duplicados)."""
+        stats = self.video_analyzer.classification_summary()
+        prescreen = stats.get('prescreen')
+        if prescreen and prescreen['screened']:
+            print(f"Pré-triagem local: {prescreen['screened']} frames, {prescreen['skipped']} chamadas à API evitadas "
+                  f"({prescreen['skipped'] / prescreen['screened']:.0%}), {prescreen['seconds']:.1f}s de CPU.")
+        dedup = stats.get('dedup')
+        if dedup and dedup['lookups']:
+            print(f"Quase-duplicados: {dedup['duplicates']} de {dedup['lookups']} vídeos reaproveitaram a "
+                  f"classificação de outro corte ({dedup['indexed']} frames no índice).")
+        if not stats['responses']:
+            return
+        print(f"Respostas de classificação: {stats['responses']}, malformadas {stats['malformed']} "
+              f"({stats['malformed_rate']:.1%}), corrigidas {stats['repaired']}, descartadas {stats['failed']}.")
 
     # ... (existing methods ... skip to classify_animals)
 
@@ -37,10 +261,11 @@ class Menu:
             print("1. Analisar vídeo individual")
             print("2. Analisar todos os vídeos da pasta")
             print("3. Gerar Relatório Excel (de todos JSONs)")
+            print("4. Progresso da classificação distribuída")
             print("0. Voltar ao menu principal")
             print("-"*40)
             
-            choice = input("\nEscolha uma opção (0-3): ").strip()
+            choice = input("\nEscolha uma opção (0-4): ").strip()
             
             if choice == '1':
                 self._classify_single_video()
@@ -48,6 +273,8 @@ class Menu:
                 self._classify_directory_videos()
             elif choice == '3':
                 self._generate_excel_report()
+            elif choice == '4':
+                self.show_claims_progress()
             elif choice == '0':
                 break
             else:
@@ -70,10 +297,11 @@ class Menu:
             print("1. Configurar API Key")
             print("2. Gerar Legendas (Submenu)")
             print("3. Classificação dos Animais (JSON)")
-            print("4. Sair")
+            print("4. Resumo das chamadas à API (latência, tokens e custo)")
+            print("5. Sair")
             print("="*50)
             
-            choice = input("\nEscolha uma opção (1-4): ").strip()
+            choice = input("\nEscolha uma opção (1-5): ").strip()
             
             if choice == '1':
                 self.configure_api_key()
@@ -82,6 +310,8 @@ class Menu:
             elif choice == '3':
                 self.classify_animals()
             elif choice == '4':
+                self.show_trace_summary()
+            elif choice == '5':
                 print("Saindo...")
                 break
             else:
@@ -98,9 +328,7 @@ class Menu:
         new_key = input("Digite sua nova API Key do Google Gemini: ").strip()
         if new_key:
             if self.config_manager.update_api_key(new_key):
-                model_name = self.config_manager.get('model', 'gemini-3-pro-preview')
-                prompt = self.config_manager.get_prompt('video_analysis')
-                self.video_analyzer = VideoAnalyzer(new_key, model_name, prompt)
+                self.video_analyzer = self._create_video_analyzer(new_key)
                 print("API Key configurada com sucesso!")
             else:
                 print("Erro ao salvar API Key.")
@@ -212,15 +440,24 @@ class Menu:
         if proceed != 's':
             return
         
+        self._reset_cache_stats()
+        
+        fingerprint = self._job_fingerprint(self.video_analyzer.prompt_template)
+        pending = self._pending_videos('subtitles', video_files, fingerprint)
+        
         success_count = 0
-        for video_file in video_files:
+        for video_file in pending:
             print(f"\nAnalisando: {video_file.name}")
             output_path = video_file.parent / f"{video_file.stem}_legendas.srt"
             
-            if self.video_analyzer.analyze_video(str(video_file), str(output_path)):
+            if self._run_tracked('subtitles', video_file,
+                                 lambda: self.video_analyzer.analyze_video(str(video_file), str(output_path))):
                 success_count += 1
         
-        print(f"\nProcessamento concluído: {success_count}/{len(video_files)} vídeos analisados com sucesso.")
+        print(f"\nProcessamento concluído: {success_count}/{len(pending)} vídeos analisados com sucesso.")
+        self._print_cache_stats()
+        self._release_context_cache()
+        self._print_manifest_summary('subtitles')
     
     def generate_subtitles_menu(self):
         """Exibe o submenu de geração de legendas."""
@@ -321,22 +558,31 @@ class Menu:
         tmp_dir = self.config_manager.get('tmp_dir')
         os.makedirs(tmp_dir, exist_ok=True)
         
-        success_count = 0
-        for video_file in video_files:
-            print(f"\nProcessando: {video_file.name}")
-            
-            # 1. Analisar vídeo e gerar legendas
-            subtitle_path = Path(tmp_dir) / f"{video_file.stem}_legendas.srt"
-            if self.video_analyzer.analyze_video(str(video_file), str(subtitle_path)):
-                # 2. Adicionar legendas ao vídeo
-                output_path = Path(output_dir) / f"{video_file.stem}_com_legendas.mp4"
-                os.makedirs(output_dir, exist_ok=True)
-                
-                if self.video_merger.add_subtitles_to_video(str(video_file), str(subtitle_path), str(output_path)):
-                    success_count += 1
-                    print(f"Vídeo processado: {output_path.name}")
-        
-        print(f"\nProcessamento em lote concluído: {success_count}/{len(video_files)} vídeos processados com sucesso.")
+        self._reset_cache_stats()
+        
+        fingerprint = self._job_fingerprint(self.video_analyzer.prompt_template)
+        pending = self._pending_videos('batch', video_files, fingerprint)
+        
+        from src.pipeline import VideoPipeline
+        pipeline = VideoPipeline(
+            self.video_analyzer,
+            self.video_merger,
+            num_frames=self.config_manager.get('num_frames', 8),
+            decode_options=self._decode_options(),
+            decode_workers=self.config_manager.get('decode_workers', 2),
+            api_workers=self.config_manager.get('max_workers', 4),
+            ffmpeg_workers=self.config_manager.get('ffmpeg_workers', 0),
+            queue_size=self.config_manager.get('pipeline_queue_size', 8),
+            manifest=self._get_manifest(),
+            kind='batch'
+        )
+        summary = pipeline.run(pending, tmp_dir, output_dir)
+        
+        print(f"\nProcessamento em lote concluído: {len(summary['succeeded'])}/{len(pending)} vídeos processados com sucesso.")
+        pipeline.print_summary(summary)
+        self._print_cache_stats()
+        self._release_context_cache()
+        self._print_manifest_summary('batch')
     
 
 
@@ -391,24 +637,77 @@ class Menu:
         if proceed != 's':
             return
             
-        success_count = 0
-        failed_videos = []
-        
-        for i, video_file in enumerate(video_files):
-            print(f"\n[{i+1}/{len(video_files)}] Classificando: {video_file.name}")
-            if self._run_classification(str(video_file)):
-                success_count += 1
-            else:
-                failed_videos.append(video_file.name)
-            
-            # Pequeno delay para evitar rate limiting (além do retry interno)
-            time.sleep(2)
-                
-        print(f"\nProcessamento concluído: {success_count}/{len(video_files)} vídeos classificados.")
-        if failed_videos:
-            print("\nVídeos que falharam:")
-            for v in failed_videos:
-                print(f"- {v}")
+        self._reset_cache_stats()
+        
+        fingerprint = self._job_fingerprint(self.config_manager.get_prompt('classification'))
+        max_workers = self.config_manager.get('max_workers', 4)
+        claims = self._create_work_claims()
+        if claims:
+            # Modo distribuído: os vídeos são disputados com os outros nós pelo diretório de claims
+            self._get_manifest().register('classify', video_files, fingerprint)
+            print(f"Classificação distribuída (nó {claims.node_id}) com até {max_workers} requisições simultâneas...")
+            summary = self._run_claimed('classify', claims, video_files, self._run_classification)
+            # Vídeos processados por este nó
+            pending = [*summary['succeeded'], *summary['failed']]
+        else:
+            pending = self._pending_videos('classify', video_files, fingerprint)
+            print(f"Classificando com até {max_workers} requisições simultâneas...")
+            executor = BatchExecutor(max_workers)
+            summary = executor.run(
+                pending,
+                lambda v: self._run_tracked('classify', v, lambda: self._run_classification(str(v))),
+                label=lambda v: v.name
+            )
+        
+        success_count = len(summary['succeeded'])
+        elapsed = summary['elapsed']
+        
+        print(f"\nProcessamento concluído: {success_count}/{len(pending)} vídeos classificados "
+              f"em {elapsed:.1f}s ({len(pending) / elapsed * 60 if elapsed > 0 else 0:.1f} vídeos/min).")
+        limiter = self.video_analyzer.rate_limiter
+        if limiter:
+            stats = limiter.stats()
+            print(f"Limitador: {stats['rate_limit_hits']} respostas 429, {stats['total_pause']:.0f}s em pausa.")
+        self._print_cache_stats()
+        self._release_context_cache()
+        self._print_classification_stats()
+        self._print_manifest_summary('classify')
+        if claims:
+            claims.print_progress(claims.progress([v.name for v in video_files]))
+
+    def _create_work_claims(self):
+        """Claims no sistema de arquivos compartilhado (claims_dir vazio = execução local)."""
+        claims_dir = self.config_manager.get('claims_dir', '')
+        if not claims_dir:
+            return None
+        return WorkClaims(
+            claims_dir,
+            node_id=self.config_manager.get('node_id') or None,
+            lease_seconds=self.config_manager.get('claim_lease_seconds', 600),
+            max_attempts=self.config_manager.get('claim_max_attempts', 3),
+        )
+
+    def _run_claimed(self, kind, claims, video_files, func):
+        """Processa os vídeos reivindicados por este nó, registrando-os também no manifesto local."""
+        by_name = {Path(v).name: v for v in video_files}
+        errors = {}
+
+        def process(video):
+            output = self._run_tracked(kind, video, lambda: func(str(video)))
+            if not output:
+                errors[Path(video).name] = self.video_analyzer.last_error
+            return output
+
+        return claims.run(by_name, process, workers=self.config_manager.get('max_workers', 4),
+                          error_for=lambda video: errors.pop(Path(video).name, None))
+
+    def show_claims_progress(self):
+        """Progresso do lote distribuído, lido do diretório de claims (sem coordenador)."""
+        claims = self._create_work_claims()
+        if not claims:
+            print("Execução distribuída desativada (configure 'claims_dir').")
+            return
+        claims.print_progress(claims.progress())
 
     def _run_classification(self, video_path):
         """Método auxiliar para executar a classificação em um arquivo."""
@@ -418,10 +717,12 @@ class Menu:
         base_name = os.path.splitext(os.path.basename(video_path))[0]
         output_path = os.path.join(output_dir, f"{base_name}_classificacao.json")
 
-        # Verificar se já existe para evitar reprocessamento
-        if os.path.exists(output_path):
+        # Evitar reprocessamento pelo nome do arquivo; `reclassify` (ou --force na CLI)
+        # reavalia mesmo assim, e o cache de respostas evita chamar a API para
+        # entradas idênticas às já enviadas.
+        if not self.config_manager.get('reclassify', False) and os.path.exists(output_path):
             print(f"Arquivo já processado, pulando: {os.path.basename(output_path)}")
-            return True
+            return output_path
 
         # Obter prompt de classificação
         prompt = self.config_manager.get_prompt('classification')
@@ -429,5 +730,4 @@ class Menu:
             print("Erro: Prompt de classificação não encontrado em prompt_classificacao.yaml")
             return False
 
-        result = self.video_analyzer.analyze_frame_classification(video_path, output_path, prompt)
-        return result is not None 
\ No newline at end of file
+        return self.video_analyzer.analyze_frame_classification(video_path, output_path, prompt) 
\ No newline at end of file
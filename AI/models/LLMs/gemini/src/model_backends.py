@@ -0,0 +1,277 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from src.rate_limiter import estimate_request_tokens
+
+
+class ModelBackend:
+    """
+    Interface dos backends de modelo usados pelo VideoAnalyzer.
+
+    generate_content(contents) recebe a lista [prompt, frames...] e retorna um
+    objeto com `.text` e, opcionalmente, `.usage_metadata`
+    (prompt_token_count / candidates_token_count). Com stream=True, retorna um
+    iterável de pedaços, cada um com `.text`. `generation_config` substitui a
+    configuração de geração apenas nesta chamada (ex.: saída JSON com esquema).
+
+    Backends com cache de contexto implementam create_context_cache(prefix,
+    ttl_seconds), que retorna um objeto com `.prefix`, usado em
+    generate_content(..., context_cache=handle) no lugar do prefixo do prompt.
+    """
+
+    name = 'base'
+
+    def generate_content(self, contents, stream=False, generation_config=None, context_cache=None):
+        raise NotImplementedError
+
+    def create_context_cache(self, prefix, ttl_seconds):
+        raise NotImplementedError(f"backend '{self.name}' não suporta cache de contexto")
+
+    def delete_context_cache(self, handle):
+        pass
+
+
+class ContextCacheHandle:
+    """Contexto em cache: prefixo registrado e o objeto do serviço (se houver)."""
+
+    def __init__(self, name, prefix, remote=None):
+        self.name = name
+        self.prefix = prefix
+        self.remote = remote
+
+    def full_contents(self, contents):
+        """Conteúdo da requisição com o prefixo em cache de volta no início do texto."""
+        contents = list(contents)
+        first_text = next((i for i, c in enumerate(contents) if isinstance(c, str)), None)
+        if first_text is None:
+            return [self.prefix, *contents]
+        contents[first_text] = self.prefix + "\n\n" + contents[first_text]
+        # O texto volta para o início, como no prompt completo
+        return [contents[first_text], *contents[:first_text], *contents[first_text + 1:]]
+
+
+class GeminiBackend(ModelBackend):
+    """Backend real: google.generativeai.GenerativeModel."""
+
+    name = 'gemini'
+
+    def __init__(self, api_key, model_name, generation_config=None):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self._model = genai.GenerativeModel(model_name, generation_config=generation_config)
+        # Modelos ligados a cada contexto em cache (nome -> GenerativeModel)
+        self._cached_models = {}
+
+    def create_context_cache(self, prefix, ttl_seconds):
+        import datetime
+        from google.generativeai import caching
+
+        model_name = self.model_name if self.model_name.startswith('models/') else f"models/{self.model_name}"
+        remote = caching.CachedContent.create(model=model_name, contents=[prefix],
+                                              ttl=datetime.timedelta(seconds=ttl_seconds))
+        handle = ContextCacheHandle(remote.name, prefix, remote)
+        self._cached_models[handle.name] = self._genai.GenerativeModel.from_cached_content(
+            cached_content=remote, generation_config=self.generation_config
+        )
+        return handle
+
+    def delete_context_cache(self, handle):
+        self._cached_models.pop(handle.name, None)
+        handle.remote.delete()
+
+    def generate_content(self, contents, stream=False, generation_config=None, context_cache=None):
+        model = self._model
+        if context_cache is not None:
+            model = self._cached_models.get(context_cache.name)
+            if model is None:
+                # Contexto já removido (ex.: release() com uma retentativa ainda em espera):
+                # segue sem cache, com o prompt completo
+                model, contents = self._model, context_cache.full_contents(contents)
+        return model.generate_content(contents, stream=stream, generation_config=generation_config)
+
+
+class _UsageMetadata:
+    def __init__(self, prompt_token_count, candidates_token_count, cached_content_token_count=0):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.cached_content_token_count = cached_content_token_count
+
+
+class ReplayResponse:
+    """Resposta do ReplayBackend, com a mesma forma da resposta do SDK."""
+
+    def __init__(self, text, prompt_token_count=0, cached_content_token_count=0):
+        self.text = text
+        self.usage_metadata = _UsageMetadata(prompt_token_count, len(text) // 4, cached_content_token_count)
+
+
+class ReplayBackend(ModelBackend):
+    """
+    Substituto local do Gemini para testes e benchmarks, sem rede nem API key.
+
+    - Prompts de classificação (que pedem JSON) recebem um dos resultados
+      gravados em `responses_dir` (*_classificacao.json), escolhido de forma
+      determinística pelo conteúdo da requisição.
+    - Prompts de legendas recebem um SRT sintético cobrindo a duração
+      informada no prompt.
+
+    Latência, jitter e respostas 429 são configuráveis para simular a API.
+    Também simula o serviço de cache de contexto: prefixos registrados ficam
+    em memória e são contabilizados como tokens em cache nas respostas.
+    """
+
+    name = 'replay'
+
+    def __init__(self, responses_dir='results/', latency=1.0, jitter=0.5, rate_limit_probability=0.0,
+                 seed=None, min_cache_tokens=0):
+        """
+        Args:
+            responses_dir: Diretório com *_classificacao.json gravados.
+            latency: Latência média (s) por requisição.
+            jitter: Variação máxima (s), uniforme, somada à latência.
+            rate_limit_probability: Probabilidade de responder com erro 429.
+            seed: Semente do gerador aleatório (reprodutibilidade).
+            min_cache_tokens: Tamanho mínimo (tokens) aceito pelo cache de contexto simulado.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_probability = rate_limit_probability
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.min_cache_tokens = min_cache_tokens
+        self._context_caches = {}
+
+        self.responses = []
+        for path in sorted(Path(responses_dir).glob('*_classificacao.json')):
+            try:
+                text = path.read_text(encoding='utf-8')
+                json.loads(text)
+                self.responses.append(text)
+            except (OSError, ValueError):
+                continue
+
+        # Estatísticas
+        self.calls = 0
+        self.rate_limited = 0
+
+    @classmethod
+    def from_config(cls, config_manager):
+        return cls(
+            responses_dir=config_manager.get('replay_dir') or config_manager.get('output_dir', 'results/'),
+            latency=config_manager.get('replay_latency', 1.0),
+            jitter=config_manager.get('replay_jitter', 0.5),
+            rate_limit_probability=config_manager.get('replay_429_rate', 0.0),
+        )
+
+    @staticmethod
+    def _digest(contents):
+        digest = hashlib.sha256()
+        for part in contents:
+            if isinstance(part, str):
+                digest.update(part.encode('utf-8'))
+            elif isinstance(part, dict):
+                digest.update(part.get('data', b''))
+            elif hasattr(part, 'tobytes'):
+                digest.update(part.tobytes())
+        return int(digest.hexdigest()[:8], 16)
+
+    @staticmethod
+    def synthetic_srt(duration, block_seconds=4.0):
+        """SRT sintético com um bloco a cada `block_seconds` segundos."""
+        blocks = []
+        start = 0.0
+        index = 1
+        duration = max(duration, block_seconds)
+        while start < duration:
+            end = min(start + block_seconds - 0.5, duration)
+            blocks.append(f"{index}\n{ReplayBackend._ts(start)} --> {ReplayBackend._ts(end)}\n"
+                          f"Legenda simulada {index}.")
+            start += block_seconds
+            index += 1
+        return "\n\n".join(blocks) + "\n"
+
+    @staticmethod
+    def _ts(seconds):
+        millis = int(round(seconds * 1000))
+        hours, millis = divmod(millis, 3600000)
+        minutes, millis = divmod(millis, 60000)
+        secs, millis = divmod(millis, 1000)
+        return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+    def _respond(self, contents, generation_config=None):
+        prompt = next((c for c in contents if isinstance(c, str)), '')
+        wants_json = (generation_config or {}).get('response_mime_type') == 'application/json'
+        if (wants_json or 'json' in prompt.lower()) and self.responses:
+            return self.responses[self._digest(contents) % len(self.responses)]
+        match = re.search(r'dura[çc][ãa]o do v[íi]deo [ée] de (\d+)', prompt)
+        duration = int(match.group(1)) if match else 30
+        return self.synthetic_srt(duration)
+
+    def create_context_cache(self, prefix, ttl_seconds):
+        tokens = estimate_request_tokens(prefix, 0)
+        if tokens < self.min_cache_tokens:
+            raise ValueError(f"400 conteúdo em cache muito pequeno ({tokens} < {self.min_cache_tokens} tokens)")
+        with self._lock:
+            handle = ContextCacheHandle(f"cachedContents/replay-{len(self._context_caches) + 1}", prefix)
+            self._context_caches[handle.name] = handle
+        return handle
+
+    def delete_context_cache(self, handle):
+        with self._lock:
+            self._context_caches.pop(handle.name, None)
+
+    def generate_content(self, contents, stream=False, generation_config=None, context_cache=None):
+        cached_tokens = 0
+        if context_cache is not None:
+            if context_cache.name not in self._context_caches:
+                raise ValueError(f"404 contexto em cache não encontrado: {context_cache.name}")
+            # O modelo "vê" o prefixo em cache antes do conteúdo da requisição
+            cached_tokens = estimate_request_tokens(context_cache.prefix, 0)
+            contents = context_cache.full_contents(contents)
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            rate_limited = self._random.random() < self.rate_limit_probability
+            if rate_limited:
+                self.rate_limited += 1
+
+        if rate_limited:
+            # Respostas 429 costumam ser rápidas
+            time.sleep(min(delay, 0.05))
+            raise RuntimeError("429 Resource has been exhausted (simulado)")
+
+        prompt = next((c for c in contents if isinstance(c, str)), '')
+        text = self._respond(contents, generation_config)
+        if stream:
+            return self._stream(text, delay)
+        time.sleep(delay)
+        return ReplayResponse(text, estimate_request_tokens(prompt, len(contents) - 1), cached_tokens)
+
+    @staticmethod
+    def _stream(text, delay, chunk_size=64):
+        """Entrega o texto em pedaços: 30% da latência até o primeiro, o resto distribuído."""
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or ['']
+        time.sleep(delay * 0.3)
+        per_chunk = delay * 0.7 / len(chunks)
+        for chunk in chunks:
+            yield ReplayResponse(chunk)
+            time.sleep(per_chunk)
+
+    def stats(self):
+        return {'calls': self.calls, 'rate_limited': self.rate_limited}
+
+
+def create_backend(config_manager, api_key, model_name, generation_config=None):
+    """Cria o backend indicado em `model_backend` ('gemini' ou 'replay')."""
+    if config_manager.get('model_backend', 'gemini') == 'replay':
+        return ReplayBackend.from_config(config_manager)
+    return GeminiBackend(api_key, model_name, generation_config)
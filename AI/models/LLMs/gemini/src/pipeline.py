@@ -0,0 +1,315 @@
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from src.frame_cache import FrameCache, sample_plan
+from src.frame_extractor import FrameExtractor
+from src.frame_preprocessor import FramePreprocessor
+from src.keyframe_selector import KeyframeSelector
+
+# Marcador de fim de fila
+_STOP = object()
+
+
+def _init_decode_worker(stdout_to_stderr):
+    """
+    Inicializador dos processos de decodificação. Com o stdout do processo
+    principal desviado para o stderr (ex.: `--summary -` na CLI), as mensagens
+    dos workers — inclusive as de bibliotecas nativas — seguem o mesmo caminho
+    e não se misturam ao JSON do stdout.
+    """
+    if stdout_to_stderr:
+        sys.stdout.flush()
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+        sys.stdout = sys.stderr
+
+
+def decode_for_analysis(video_path, num_frames, options):
+    """
+    Etapa de decodificação (executada no pool de processos): seleciona e extrai
+    os frames e, se configurado, já os reduz/codifica em JPEG para envio.
+
+    Com options['frame_cache'], os frames decodificados são lidos/gravados no
+    FrameCache compartilhado com o VideoAnalyzer (mesma chave).
+
+    Retorna um dict serializável com frames, duração, timestamps, erro e
+    se os frames vieram do cache.
+    """
+    start = time.perf_counter()
+    try:
+        selector = KeyframeSelector() if options.get('frame_selection') == 'scene' else None
+        extraction_mode = options.get('extraction_mode', 'auto')
+        plan = sample_plan(num_frames, 'scene' if selector else 'uniform', extraction_mode,
+                           selector.describe() if selector else None)
+        cache = FrameCache(**options['frame_cache']) if options.get('frame_cache') else None
+
+        cached = cache.get(video_path, plan) if cache else None
+        if cached:
+            frames, info = cached
+        else:
+            frame_indices = None
+            if selector:
+                frame_indices, _ = selector.select(video_path, num_frames)
+            extractor = FrameExtractor(mode=extraction_mode)
+            frames, info = extractor.extract(video_path, num_frames=num_frames, frame_indices=frame_indices)
+            if frames and cache:
+                try:
+                    frames = cache.put(video_path, plan, frames, info)
+                except Exception as e:
+                    # O cache é só uma otimização: os frames já decodificados seguem
+                    print(f"Aviso: falha ao gravar frames no cache: {e}")
+        if not frames:
+            return {'frames': None, 'error': "Falha ao extrair frames do vídeo.",
+                    'decode_time': time.perf_counter() - start}
+
+        preprocess = options.get('preprocess')
+        if preprocess:
+            frames = FramePreprocessor(**preprocess).prepare(frames)
+
+        return {
+            'frames': frames,
+            'duration': info['duration'],
+            'timestamps': info['timestamps'],
+            'error': None,
+            'frame_cache_hit': bool(cached),
+            'decode_time': time.perf_counter() - start,
+        }
+    except Exception as e:
+        return {'frames': None, 'error': f"Erro ao processar o vídeo: {e}",
+                'decode_time': time.perf_counter() - start}
+
+
+class _StageStats:
+    """Tempo ocupado e itens processados de uma etapa do pipeline."""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.busy = 0.0
+        self.items = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.busy += seconds
+            self.items += 1
+
+    def utilization(self, wall):
+        return self.busy / (self.workers * wall) if wall > 0 else 0.0
+
+
+class VideoPipeline:
+    """
+    Pipeline produtor/consumidor para análise + incorporação de legendas.
+
+    Etapas ligadas por filas limitadas (backpressure):
+      1. decodificação: pool de processos (OpenCV fora do GIL principal);
+      2. API: threads que chamam o Gemini via VideoAnalyzer (limitadas pelo
+         TokenBucketLimiter compartilhado);
+      3. ffmpeg: pool de workers para a incorporação das legendas.
+
+    Assim a CPU decodifica o próximo vídeo e o ffmpeg codifica o anterior
+    enquanto a rede aguarda a resposta da API.
+    """
+
+    def __init__(self, video_analyzer, video_merger, num_frames=8, decode_options=None,
+                 decode_workers=2, api_workers=4, ffmpeg_workers=0, queue_size=8,
+                 manifest=None, kind='batch'):
+        """
+        Args:
+            decode_workers / api_workers / ffmpeg_workers: Workers de cada etapa.
+                ffmpeg_workers=0 usa metade dos núcleos (o ffmpeg já usa várias threads).
+            queue_size: Capacidade das filas entre etapas.
+            manifest / kind: JobManifest opcional para registrar estado e tempos.
+        """
+        self.video_analyzer = video_analyzer
+        self.video_merger = video_merger
+        self.num_frames = num_frames
+        self.decode_options = decode_options or {}
+        self.decode_workers = max(1, decode_workers)
+        self.api_workers = max(1, api_workers)
+        self.ffmpeg_workers = ffmpeg_workers or max(1, (os.cpu_count() or 2) // 2)
+        # -threads de cada codificação: os núcleos divididos entre os workers de ffmpeg
+        self.ffmpeg_threads = getattr(video_merger, 'threads', 0) or max(1, (os.cpu_count() or 2) // self.ffmpeg_workers)
+        self.queue_size = max(1, queue_size)
+        self.manifest = manifest
+        self.kind = kind
+
+        self._print_lock = threading.Lock()
+        self._result_lock = threading.Lock()
+
+    def _log(self, message):
+        with self._print_lock:
+            print(message)
+
+    def _record_stage(self, video, stage, seconds):
+        if self.manifest:
+            self.manifest.record_stage(self.kind, video, stage, seconds)
+
+    def _finish(self, video, output=None, error=None):
+        with self._result_lock:
+            if error:
+                self.failed.append((Path(video).name, error))
+            else:
+                self.succeeded.append(Path(video).name)
+        if self.manifest:
+            if error:
+                self.manifest.fail(self.kind, video, error)
+            else:
+                self.manifest.finish(self.kind, video, output)
+        status = f"Falhou ({error})" if error else "Concluído"
+        self._log(f"[pipeline] {status}: {Path(video).name}")
+
+    def _decode_worker(self, pool, videos, api_queue, stats):
+        while True:
+            try:
+                video = videos.get_nowait()
+            except queue.Empty:
+                return
+            if self.manifest:
+                self.manifest.start(self.kind, video)
+            start = time.perf_counter()
+            try:
+                result = pool.submit(decode_for_analysis, str(video), self.num_frames, self.decode_options).result()
+            except Exception as e:
+                # Ex.: BrokenProcessPool; a thread segue para os próximos vídeos
+                self._finish(video, error=f"falha na decodificação: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            stats.add(elapsed)
+            self._record_stage(video, 'extract', elapsed)
+            if result.get('frame_cache_hit'):
+                with self._result_lock:
+                    self.frame_cache_hits += 1
+            if result['error']:
+                self._finish(video, error=result['error'])
+                continue
+            # Bloqueia se a etapa de API estiver atrasada (fila limitada)
+            api_queue.put((video, result))
+
+    def _api_worker(self, api_queue, ffmpeg_queue, subtitle_dir, stats):
+        while True:
+            item = api_queue.get()
+            if item is _STOP:
+                return
+            video, decoded = item
+            subtitle_path = Path(subtitle_dir) / f"{Path(video).stem}_legendas.srt"
+            self.video_analyzer.reset_run_state()
+            start = time.perf_counter()
+            try:
+                output = self.video_analyzer.analyze_extracted(
+                    str(video), decoded['frames'], decoded['duration'], decoded['timestamps'], str(subtitle_path)
+                )
+            except Exception as e:
+                # Uma thread de API encerrada deixaria os decodificadores bloqueados na fila
+                self._finish(video, error=f"falha na análise: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            stats.add(elapsed)
+            self._record_stage(video, 'api', elapsed)
+            if not output:
+                self._finish(video, error=self.video_analyzer.last_error or "falha na análise")
+                continue
+            ffmpeg_queue.put((video, subtitle_path))
+
+    def _ffmpeg_worker(self, ffmpeg_queue, output_dir, stats):
+        while True:
+            item = ffmpeg_queue.get()
+            if item is _STOP:
+                return
+            video, subtitle_path = item
+            output_path = Path(output_dir) / f"{Path(video).stem}_com_legendas.mp4"
+            start = time.perf_counter()
+            try:
+                ok = self.video_merger.add_subtitles_to_video(str(video), str(subtitle_path), str(output_path),
+                                                              threads=self.ffmpeg_threads)
+            except Exception as e:
+                self._finish(video, error=f"falha ao adicionar legendas (ffmpeg): {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            stats.add(elapsed)
+            self._record_stage(video, 'ffmpeg', elapsed)
+            if ok:
+                # No modo soft a saída pode ter virado .mkv (contêiner sem faixa de legenda)
+                self._finish(video, output=ok if isinstance(ok, str) else output_path)
+            else:
+                self._finish(video, error="falha ao adicionar legendas (ffmpeg)")
+
+    def run(self, video_files, subtitle_dir, output_dir):
+        """
+        Processa os vídeos e retorna um resumo com sucessos, falhas, tempo total
+        e a utilização de cada etapa (tempo ocupado / (workers x tempo total)).
+        """
+        os.makedirs(subtitle_dir, exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
+        self.succeeded = []
+        self.failed = []
+        self.frame_cache_hits = 0
+
+        videos = queue.Queue()
+        for video in video_files:
+            videos.put(video)
+        api_queue = queue.Queue(maxsize=self.queue_size)
+        ffmpeg_queue = queue.Queue(maxsize=self.queue_size)
+
+        stats = {
+            'decode': _StageStats('decode', self.decode_workers),
+            'api': _StageStats('api', self.api_workers),
+            'ffmpeg': _StageStats('ffmpeg', self.ffmpeg_workers),
+        }
+
+        start = time.perf_counter()
+        # 'spawn' evita herdar via fork o estado de threads/gRPC do processo principal
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.decode_workers, mp_context=context,
+                                 initializer=_init_decode_worker,
+                                 initargs=(sys.stdout is sys.stderr,)) as pool:
+            decoders = [threading.Thread(target=self._decode_worker, args=(pool, videos, api_queue, stats['decode']))
+                        for _ in range(self.decode_workers)]
+            api_threads = [threading.Thread(target=self._api_worker,
+                                            args=(api_queue, ffmpeg_queue, subtitle_dir, stats['api']))
+                           for _ in range(self.api_workers)]
+            ffmpeg_threads = [threading.Thread(target=self._ffmpeg_worker, args=(ffmpeg_queue, output_dir, stats['ffmpeg']))
+                              for _ in range(self.ffmpeg_workers)]
+            for thread in decoders + api_threads + ffmpeg_threads:
+                thread.start()
+
+            # Encerrar cada etapa quando a anterior terminar
+            for thread in decoders:
+                thread.join()
+            for _ in api_threads:
+                api_queue.put(_STOP)
+            for thread in api_threads:
+                thread.join()
+            for _ in ffmpeg_threads:
+                ffmpeg_queue.put(_STOP)
+            for thread in ffmpeg_threads:
+                thread.join()
+
+        wall = time.perf_counter() - start
+        return {
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'elapsed': wall,
+            'frame_cache_hits': self.frame_cache_hits,
+            'stages': {
+                name: {'workers': s.workers, 'items': s.items, 'busy': s.busy, 'utilization': s.utilization(wall)}
+                for name, s in stats.items()
+            },
+        }
+
+    @staticmethod
+    def print_summary(summary):
+        """Exibe a utilização por etapa ao final da execução."""
+        print(f"\n=== Pipeline: {len(summary['succeeded'])} concluídos, {len(summary['failed'])} falhas "
+              f"em {summary['elapsed']:.1f}s ===")
+        print(f"{'etapa':<8} {'workers':>7} {'itens':>6} {'ocupado(s)':>11} {'utilização':>11}")
+        for name, s in summary['stages'].items():
+            print(f"{name:<8} {s['workers']:>7} {s['items']:>6} {s['busy']:>11.1f} {s['utilization']:>10.0%}")
+        if summary.get('frame_cache_hits'):
+            print(f"Frames lidos do cache (sem decodificar): {summary['frame_cache_hits']} vídeos")
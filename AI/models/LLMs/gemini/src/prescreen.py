@@ -0,0 +1,170 @@
+import threading
+import time
+
+from src.classification_schema import CLASSES
+
+# Textos do zero-shot (o CLIP foi treinado com legendas em inglês); várias
+# descrições por rótulo têm as probabilidades somadas.
+CLASS_PROMPTS = {
+    'Bezerro': ["a photo of a calf", "a photo of a young calf next to cattle"],
+    'Novilha': ["a photo of a heifer", "a photo of a young female cow"],
+    'Novilho': ["a photo of a young steer", "a photo of a young male bovine"],
+    'Garrote': ["a photo of a yearling bull", "a photo of a young bull in a pasture"],
+    'Vaca': ["a photo of a cow", "a photo of a dairy cow"],
+    'Touro': ["a photo of a bull", "a photo of a large adult bull"],
+}
+NO_ANIMAL = 'Sem animal'
+NO_ANIMAL_PROMPTS = [
+    "a photo of an empty pasture with no animals",
+    "a photo of an empty cattle pen",
+    "a photo of an empty field",
+    "a photo of a fence and grass with no animals",
+    "a blurry dark photo with nothing in it",
+]
+
+
+class ClipPrescreen:
+    """
+    Pré-triagem local (CPU) dos frames com CLIP (open-clip), antes da chamada ao Gemini.
+
+    O frame é comparado por zero-shot com as classes de contagem_total e com
+    "nenhum animal". Frames em que "nenhum animal" tem probabilidade de pelo
+    menos `threshold` não são enviados à API: a classificação é gravada vazia
+    e marcada como resultado da pré-triagem. Os demais seguem para o modelo
+    completo. O modelo é carregado no primeiro uso.
+    """
+
+    def __init__(self, model_name='ViT-B-32', pretrained='laion2b_s34b_b79k', threshold=0.85, device='cpu'):
+        self.model_name = model_name
+        self.pretrained = pretrained
+        self.threshold = threshold
+        self.device = device
+        self._model = None
+        self._preprocess = None
+        self._text_features = None
+        self._labels = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @classmethod
+    def from_config(cls, config_manager):
+        """Cria a pré-triagem a partir das chaves prescreen_* (None se desativada)."""
+        if not config_manager.get('prescreen', False):
+            return None
+        return cls(
+            model_name=config_manager.get('prescreen_model', 'ViT-B-32'),
+            pretrained=config_manager.get('prescreen_pretrained', 'laion2b_s34b_b79k'),
+            threshold=config_manager.get('prescreen_threshold', 0.85),
+        )
+
+    def describe(self):
+        return {'model': self.model_name, 'pretrained': self.pretrained, 'threshold': self.threshold}
+
+    def reset_stats(self):
+        self.screened = 0
+        self.skipped = 0
+        self.seconds = 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'screened': self.screened,
+                'skipped': self.skipped,
+                'sent': self.screened - self.skipped,
+                'seconds': self.seconds,
+            }
+
+    def _load(self):
+        """Carrega o modelo e os embeddings de texto (uma vez)."""
+        if self._model is not None:
+            return
+        import open_clip
+        import torch
+
+        print(f"Carregando modelo de pré-triagem {self.model_name} ({self.pretrained})...")
+        model, _, preprocess = open_clip.create_model_and_transforms(
+            self.model_name, pretrained=self.pretrained, device=self.device
+        )
+        model.eval()
+        tokenizer = open_clip.get_tokenizer(self.model_name)
+
+        labels, texts = [], []
+        for label, prompts in [*CLASS_PROMPTS.items(), (NO_ANIMAL, NO_ANIMAL_PROMPTS)]:
+            labels.extend([label] * len(prompts))
+            texts.extend(prompts)
+        with torch.no_grad():
+            features = model.encode_text(tokenizer(texts).to(self.device))
+            features = features / features.norm(dim=-1, keepdim=True)
+
+        self._torch = torch
+        self._preprocess = preprocess
+        self._text_features = features
+        self._labels = labels
+        self._model = model
+
+    def embed(self, images):
+        """Embeddings CLIP normalizados das imagens (PIL), como matriz NumPy (n x d)."""
+        with self._lock:
+            self._load()
+            torch = self._torch
+            batch = torch.stack([self._preprocess(image.convert('RGB')) for image in images]).to(self.device)
+            with torch.no_grad():
+                features = self._model.encode_image(batch)
+                features = features / features.norm(dim=-1, keepdim=True)
+        return features.cpu().numpy()
+
+    def score(self, image):
+        """
+        Probabilidades zero-shot de um frame.
+
+        Returns:
+            dict com 'no_animal' (probabilidade de não haver animal), 'classes'
+            ({classe: probabilidade}) e 'top' (rótulo mais provável).
+        """
+        features = self.embed([image])
+        with self._lock:
+            torch = self._torch
+            image_features = torch.from_numpy(features).to(self._text_features.dtype)
+            logits = 100.0 * image_features @ self._text_features.T
+            probs = logits.softmax(dim=-1)[0].tolist()
+        totals = {}
+        for label, p in zip(self._labels, probs):
+            totals[label] = totals.get(label, 0.0) + p
+        return {
+            'no_animal': totals[NO_ANIMAL],
+            'classes': {name: totals[name] for name in CLASSES},
+            'top': max(totals, key=totals.get),
+        }
+
+    def screen(self, image):
+        """
+        Decide se o frame precisa do modelo completo.
+
+        Returns:
+            (skip, info): skip=True quando o frame claramente não tem animais;
+            info resume as probabilidades (gravado no JSON da classificação).
+        """
+        start = time.perf_counter()
+        scores = self.score(image)
+        skip = scores['no_animal'] >= self.threshold
+        with self._lock:
+            self.screened += 1
+            self.skipped += skip
+            self.seconds += time.perf_counter() - start
+        info = {
+            'modelo': f"{self.model_name}/{self.pretrained}",
+            'prob_sem_animal': round(scores['no_animal'], 4),
+            'classe_provavel': scores['top'],
+            'chamada_api_evitada': skip,
+        }
+        return skip, info
+
+
+def empty_classification(info):
+    """Classificação sem animais gravada quando a pré-triagem dispensa a API."""
+    return {
+        'descricao_ambiente': "Nenhum animal detectado na pré-triagem local (CLIP); frame não enviado ao modelo.",
+        'animais_identificados': [],
+        'contagem_total': {name: 0 for name in CLASSES},
+        'pre_triagem': info,
+    }
@@ -0,0 +1,151 @@
+import threading
+import time
+
+# Custo aproximado de uma imagem na contagem de tokens do Gemini
+TOKENS_PER_IMAGE = 258
+
+
+def estimate_request_tokens(prompt, num_images=0):
+    """Estimativa grosseira dos tokens de entrada de uma requisição (~4 caracteres/token)."""
+    return len(prompt or '') // 4 + TOKENS_PER_IMAGE * num_images
+
+
+def is_rate_limit_error(error):
+    """Identifica erros de cota (HTTP 429) retornados pela API."""
+    message = str(error)
+    return "429" in message or "Resource has been exhausted" in message
+
+
+class TokenBucketLimiter:
+    """
+    Limitador compartilhado entre workers com dois baldes de tokens:
+    requisições por minuto (RPM) e tokens de entrada por minuto (TPM).
+
+    Ao receber um 429, o limitador inteiro é pausado (e a taxa efetiva reduzida
+    pela metade); os workers apenas aguardam em acquire(), sem laços de espera
+    próprios. Cada sucesso recupera a taxa gradualmente (AIMD).
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0,
+                 base_backoff=60, max_backoff=1800, min_rate_scale=0.1):
+        """
+        Args:
+            requests_per_minute: Cota de requisições por minuto (0 = sem limite).
+            tokens_per_minute: Cota de tokens de entrada por minuto (0 = sem limite).
+            base_backoff: Pausa inicial (s) após um 429; dobra a cada 429 consecutivo.
+            max_backoff: Pausa máxima (s).
+            min_rate_scale: Fração mínima da taxa nominal após reduções.
+        """
+        self.requests_per_minute = requests_per_minute or 0
+        self.tokens_per_minute = tokens_per_minute or 0
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_rate_scale = min_rate_scale
+
+        self._cond = threading.Condition()
+        self._request_level = float(self.requests_per_minute)
+        self._token_level = float(self.tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._rate_scale = 1.0
+        self._strikes = 0
+
+        # Estatísticas
+        self.total_wait = 0.0
+        self.total_pause = 0.0
+        self.rate_limit_hits = 0
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        if elapsed <= 0:
+            return
+        self._last_refill = now
+        if self.requests_per_minute:
+            rate = self.requests_per_minute / 60.0 * self._rate_scale
+            self._request_level = min(self.requests_per_minute, self._request_level + elapsed * rate)
+        if self.tokens_per_minute:
+            rate = self.tokens_per_minute / 60.0 * self._rate_scale
+            self._token_level = min(self.tokens_per_minute, self._token_level + elapsed * rate)
+
+    def _time_until_available(self, tokens):
+        waits = [0.0]
+        if self.requests_per_minute and self._request_level < 1:
+            rate = self.requests_per_minute / 60.0 * self._rate_scale
+            waits.append((1 - self._request_level) / rate)
+        if self.tokens_per_minute and self._token_level < tokens:
+            rate = self.tokens_per_minute / 60.0 * self._rate_scale
+            waits.append((tokens - self._token_level) / rate)
+        return max(waits)
+
+    def acquire(self, tokens=0):
+        """Bloqueia até haver cota para uma requisição com `tokens` tokens de entrada."""
+        if self.tokens_per_minute:
+            # Requisições maiores que o balde nunca caberiam: limitar à capacidade
+            tokens = min(tokens, self.tokens_per_minute)
+
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill(now)
+                    wait = self._time_until_available(tokens)
+                    if wait <= 0:
+                        if self.requests_per_minute:
+                            self._request_level -= 1
+                        if self.tokens_per_minute:
+                            self._token_level -= tokens
+                        self.total_wait += time.monotonic() - start
+                        return
+                self._cond.wait(timeout=wait)
+
+    def reconcile(self, estimated_tokens, actual_tokens):
+        """Ajusta o balde de tokens com a contagem real informada pela API."""
+        if not self.tokens_per_minute or actual_tokens is None:
+            return
+        with self._cond:
+            self._token_level -= (actual_tokens - estimated_tokens)
+
+    def record_success(self):
+        """Registra uma requisição bem-sucedida, recuperando a taxa aos poucos."""
+        with self._cond:
+            self._strikes = 0
+            if self._rate_scale < 1.0:
+                self._rate_scale = min(1.0, self._rate_scale + 0.1)
+            self._cond.notify_all()
+
+    def report_rate_limit(self):
+        """
+        Registra um 429 e pausa o limitador. Retorna o tempo (s) até a retomada.
+
+        429s simultâneos de requisições que já estavam em andamento durante uma
+        pausa não aumentam o backoff.
+        """
+        with self._cond:
+            now = time.monotonic()
+            self.rate_limit_hits += 1
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            delay = min(self.base_backoff * (2 ** self._strikes), self.max_backoff)
+            self._strikes += 1
+            self._rate_scale = max(self.min_rate_scale, self._rate_scale * 0.5)
+            self._paused_until = now + delay
+            # Não acumular cota durante a pausa
+            self._request_level = min(self._request_level, 0.0)
+            self._token_level = min(self._token_level, 0.0)
+            self._last_refill = self._paused_until
+            self.total_pause += delay
+            self._cond.notify_all()
+            return delay
+
+    def stats(self):
+        """Resumo do uso do limitador."""
+        return {
+            'rate_limit_hits': self.rate_limit_hits,
+            'total_pause': self.total_pause,
+            'total_wait': self.total_wait,
+            'rate_scale': self._rate_scale,
+        }
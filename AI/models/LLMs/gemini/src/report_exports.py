@@ -0,0 +1,263 @@
+import json
+import os
+import time
+
+from src.classification_schema import CLASSES
+from src.result_index import ANIMAL_COLUMNS, VIDEO_COLUMNS
+
+EXPORT_FORMATS = ('parquet', 'csv')
+MANIFEST_FILENAME = 'manifest.json'
+
+# Linhas lidas do índice por vez (memória limitada mesmo com milhões de animais)
+CHUNK_SIZE = 50000
+
+# Linha que marca um vídeo sem animais na aba "Por Animal"
+NO_ANIMAL_ID = 'N/A'
+
+# Separadores de vários sinais clínicos em um mesmo campo ("Magro; tosse")
+SIGN_SEPARATORS = r'[;,]'
+
+
+def _fetch_frames(cursor, columns, chunk_size=CHUNK_SIZE):
+    """DataFrames de até chunk_size linhas a partir de um cursor do índice."""
+    import pandas as pd
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield pd.DataFrame.from_records(rows, columns=columns)
+
+
+def _typed(df, integer_columns=()):
+    """Tipos fixos por coluna: inteiros (nullable) ou texto, iguais em todos os pedaços."""
+    df = df.copy()
+    for column in df.columns:
+        if column in integer_columns:
+            df[column] = df[column].astype('Int64')
+        else:
+            # Animal_ID mistura números e 'N/A'; Parquet exige um tipo por coluna
+            df[column] = df[column].astype('string')
+    return df
+
+
+class _TableWriter:
+    """Grava uma tabela em pedaços nos formatos pedidos, substituindo o arquivo ao final."""
+
+    def __init__(self, directory, name, formats):
+        self.name = name
+        self.paths = {fmt: os.path.join(directory, f'{name}.{fmt}') for fmt in formats}
+        self._tmp = {fmt: f'{path}.tmp' for fmt, path in self.paths.items()}
+        self._parquet = None
+        self._csv_header = True
+        self.rows = 0
+
+    def write(self, df):
+        if 'parquet' in self.paths:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self._tmp['parquet'], table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        if 'csv' in self.paths:
+            df.to_csv(self._tmp['csv'], mode='w' if self._csv_header else 'a', header=self._csv_header,
+                      index=False)
+            self._csv_header = False
+        self.rows += len(df)
+
+    def _close_parquet(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def close(self, empty=None):
+        """Finaliza os arquivos; `empty` (DataFrame sem linhas) define as colunas de uma tabela vazia."""
+        if not self.rows and empty is not None:
+            self.write(empty)
+        self._close_parquet()
+        for fmt, path in self.paths.items():
+            os.replace(self._tmp[fmt], path)
+
+    def abort(self):
+        self._close_parquet()
+        for tmp in self._tmp.values():
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+class TableExporter:
+    """
+    Exportação colunar (Parquet/CSV) das abas do relatório e de tabelas agregadas.
+
+    Gera, em `output_dir`, por_animal e por_video (as mesmas linhas do Excel) e:
+      - classes_por_ambiente: vídeos e total por classe para cada descrição de ambiente;
+      - sinais_clinicos: frequência de cada sinal (campos com vários sinais são separados);
+      - comportamento_por_grupo: animais por comportamento em cada vídeo de origem
+        (cortes vid0003_cut_001, vid0003_cut_002... formam o grupo vid0003);
+      - animais_por_clipe: animais identificados vs contagem_total de cada vídeo.
+
+    As linhas são lidas do ResultIndex em pedaços e as agregações são feitas com
+    operações vetorizadas do pandas em cada pedaço, somadas ao final. As
+    exportações só são refeitas quando a versão do índice muda (algum JSON novo,
+    alterado ou removido) ou os formatos pedidos mudam.
+    """
+
+    def __init__(self, output_dir, formats=EXPORT_FORMATS):
+        self.output_dir = output_dir
+        self.formats = [fmt for fmt in EXPORT_FORMATS if fmt in formats]
+        unknown = sorted(set(formats) - set(EXPORT_FORMATS))
+        if unknown:
+            print(f"Aviso: formatos de exportação ignorados: {', '.join(unknown)} (use {', '.join(EXPORT_FORMATS)}).")
+
+    def _available_formats(self):
+        formats = list(self.formats)
+        if 'parquet' in formats:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                print("Aviso: pyarrow não instalado; exportação Parquet desativada (pip install pyarrow).")
+                formats.remove('parquet')
+        return formats
+
+    def _manifest(self):
+        try:
+            with open(os.path.join(self.output_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def is_current(self, version, formats):
+        """As exportações em disco correspondem a esta versão do índice e a estes formatos."""
+        manifest = self._manifest()
+        return (bool(version) and manifest.get('version') == version
+                and manifest.get('formats') == formats
+                and all(os.path.exists(os.path.join(self.output_dir, name)) for name in manifest.get('files', [])))
+
+    def export(self, index):
+        """
+        Exporta as tabelas do índice (já sincronizado).
+
+        Returns:
+            Lista dos arquivos gerados (ou já atualizados); vazia se nada foi exportado.
+        """
+        formats = self._available_formats()
+        if not formats:
+            return []
+        version = index.version()
+        if self.is_current(version, formats):
+            files = self._manifest()['files']
+            print(f"Exportações já atualizadas em {self.output_dir} ({len(files)} arquivos).")
+            return [os.path.join(self.output_dir, name) for name in files]
+
+        import pandas as pd
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        start = time.perf_counter()
+        totals = [f'Total_{name}' for name in CLASSES]
+        writers = []
+
+        def writer(name):
+            writers.append(_TableWriter(self.output_dir, name, formats))
+            return writers[-1]
+
+        try:
+            # --- Por vídeo (uma linha por JSON: cabe em memória para as agregações) ---
+            videos_writer = writer('por_video')
+            video_frames = []
+            for df in _fetch_frames(index.video_rows(), VIDEO_COLUMNS):
+                df = _typed(df, integer_columns=['Total_Animais', *totals])
+                videos_writer.write(df)
+                video_frames.append(df[['Video', 'Descricao_Ambiente', 'Total_Animais', *totals]])
+            videos_writer.close(_typed(pd.DataFrame(columns=VIDEO_COLUMNS), ['Total_Animais', *totals]))
+            df_videos = (pd.concat(video_frames, ignore_index=True) if video_frames
+                         else _typed(pd.DataFrame(columns=['Video', 'Descricao_Ambiente', 'Total_Animais', *totals]),
+                                     ['Total_Animais', *totals]))
+            del video_frames
+
+            # --- Por animal (em pedaços; agregações parciais somadas ao final) ---
+            from src.duplicate_index import CUT_SUFFIX
+
+            animals_writer = writer('por_animal')
+            signs, behaviours, identified = [], [], []
+            for df in _fetch_frames(index.animal_rows(), ANIMAL_COLUMNS):
+                df = _typed(df)
+                animals_writer.write(df)
+                df = df[df['Animal_ID'] != NO_ANIMAL_ID]
+                identified.append(df.groupby('Video').size())
+
+                sign = (df['Sinais_Clinicos'].fillna('').str.split(SIGN_SEPARATORS, regex=True).explode()
+                        .str.strip().str.capitalize())
+                signs.append(sign[sign != ''].value_counts())
+
+                group = df['Video'].str.replace(CUT_SUFFIX.pattern, '', regex=True).rename('Grupo_Video')
+                behaviour = df['Comportamento'].fillna('').str.strip().replace('', 'Não informado')
+                behaviours.append(behaviour.groupby([group, behaviour]).size())
+            animals_writer.close(_typed(pd.DataFrame(columns=ANIMAL_COLUMNS)))
+
+            animals_total = int(sum(part.sum() for part in identified))
+            tables = {
+                'classes_por_ambiente': self._classes_by_environment(df_videos, totals),
+                'sinais_clinicos': self._sign_frequencies(signs, animals_total),
+                'comportamento_por_grupo': self._behaviour_counts(behaviours),
+                'animais_por_clipe': self._animals_per_clip(df_videos, identified, CUT_SUFFIX),
+            }
+            for name, table in tables.items():
+                table_writer = writer(name)
+                table_writer.write(table)
+                table_writer.close()
+        except Exception:
+            for table_writer in writers:
+                table_writer.abort()
+            raise
+
+        files = [os.path.basename(path) for table_writer in writers for path in table_writer.paths.values()]
+        with open(os.path.join(self.output_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'formats': formats, 'files': files,
+                       'rows': {w.name: w.rows for w in writers}}, f, ensure_ascii=False, indent=2)
+        print(f"Exportações ({', '.join(formats)}) geradas em {self.output_dir} "
+              f"em {time.perf_counter() - start:.1f}s: {len(tables) + 2} tabelas.")
+        return [os.path.join(self.output_dir, name) for name in files]
+
+    @staticmethod
+    def _classes_by_environment(df_videos, totals):
+        table = df_videos.groupby('Descricao_Ambiente', dropna=False).agg(
+            Videos=('Video', 'size'), Total_Animais=('Total_Animais', 'sum'),
+            **{column: (column, 'sum') for column in totals})
+        return table.sort_values('Total_Animais', ascending=False).reset_index()
+
+    @staticmethod
+    def _sign_frequencies(parts, animals_total):
+        import pandas as pd
+
+        counts = (pd.concat(parts).groupby(level=0).sum() if parts else pd.Series(dtype='int64'))
+        table = counts.sort_values(ascending=False).rename('Animais').rename_axis('Sinal').reset_index()
+        table['Animais'] = table['Animais'].astype('int64')
+        table['Percentual'] = (table['Animais'] / animals_total * 100).round(2) if animals_total else 0.0
+        return table
+
+    @staticmethod
+    def _behaviour_counts(parts):
+        import pandas as pd
+
+        if not parts:
+            return pd.DataFrame({'Grupo_Video': pd.Series(dtype='string'),
+                                 'Comportamento': pd.Series(dtype='string'),
+                                 'Animais': pd.Series(dtype='int64')})
+        counts = pd.concat(parts).groupby(level=[0, 1]).sum().rename('Animais')
+        table = counts.reset_index().sort_values(['Grupo_Video', 'Animais'], ascending=[True, False])
+        table['Animais'] = table['Animais'].astype('int64')
+        return table.reset_index(drop=True)
+
+    @staticmethod
+    def _animals_per_clip(df_videos, parts, cut_suffix):
+        import pandas as pd
+
+        identified = pd.concat(parts).groupby(level=0).sum() if parts else pd.Series(dtype='int64')
+        table = df_videos[['Video', 'Total_Animais']].copy()
+        table.insert(0, 'Grupo_Video', table['Video'].str.replace(cut_suffix.pattern, '', regex=True))
+        table['Animais_Identificados'] = table['Video'].map(identified).fillna(0).astype('int64')
+        # contagem_total e a lista de animais do mesmo JSON deveriam coincidir
+        table['Diferenca'] = (table['Total_Animais'].fillna(0).astype('int64') - table['Animais_Identificados'])
+        return table.sort_values(['Grupo_Video', 'Video']).reset_index(drop=True)
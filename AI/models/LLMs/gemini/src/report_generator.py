@@ -1,116 +1,176 @@
+import multiprocessing
 import os
-import json
-import pandas as pd
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from src.report_exports import TableExporter
+from src.result_index import ANIMAL_COLUMNS, VIDEO_COLUMNS, ResultIndex, parse_results
+
+INDEX_FILENAME = 'report_index.sqlite'
+EXPORTS_DIRNAME = 'analytics'
+
+# Limite de linhas de uma planilha do Excel (inclui o cabeçalho)
+EXCEL_MAX_ROWS = 1048576
+
+
+class ParallelParser:
+    """
+    Leitura dos JSONs de classificação em um pool de processos.
+
+    Chamado por ResultIndex.sync com um lote de caminhos. O pool só é criado
+    quando um lote tem ao menos `min_parallel` arquivos: relatórios
+    incrementais com poucas mudanças não pagam a criação dos processos.
+    """
+
+    def __init__(self, workers=0, min_parallel=500):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_parallel = min_parallel
+        self._pool = None
+
+    def __call__(self, paths):
+        if self.workers <= 1 or len(paths) < self.min_parallel:
+            return parse_results(paths)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        # Alguns pedaços por worker equilibram arquivos de tamanhos diferentes
+        size = max(1, len(paths) // (self.workers * 4))
+        chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+        return [parsed for chunk in self._pool.map(parse_results, chunks) for parsed in chunk]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def write_sheet(workbook, title, columns, rows, max_rows=EXCEL_MAX_ROWS):
+    """
+    Grava as linhas em uma planilha de um workbook write-only, sem mantê-las em memória.
+
+    Acima de `max_rows` (cabeçalho incluído), continua em "<title> (2)",
+    "<title> (3)"... com o cabeçalho repetido.
+
+    Returns:
+        (linhas gravadas, nomes das planilhas).
+    """
+    sheets, count = [], 0
+    sheet, used = None, max_rows
+    for row in rows:
+        if used >= max_rows:
+            sheets.append(title if not sheets else f"{title} ({len(sheets) + 1})")
+            sheet = workbook.create_sheet(sheets[-1])
+            sheet.append(columns)
+            used = 1
+        sheet.append(row)
+        used += 1
+        count += 1
+    if not sheets:
+        workbook.create_sheet(title).append(columns)
+        sheets.append(title)
+    return count, sheets
+
+
 class ReportGenerator:
-    def __init__(self, results_dir):
+    def __init__(self, results_dir, index_path=None, workers=0, exports=(), exports_dir=None):
         """
         Inicializa o gerador de relatórios.
-        
+
         Args:
             results_dir: Diretório onde estão os arquivos JSON de classificação.
+            index_path: Índice SQLite dos resultados já lidos (padrão: dentro de results_dir;
+                o Menu usa cache_dir/report_index.sqlite).
+            workers: Processos para ler os JSONs (0 = um por núcleo; 1 = sem pool).
+            exports: Formatos das exportações colunares ('parquet', 'csv'); vazio desativa.
+            exports_dir: Diretório das exportações (padrão: results_dir/analytics).
         """
         self.results_dir = results_dir
+        self.index_path = index_path
+        self.workers = workers
+        self.exports = list(exports or [])
+        self.exports_dir = exports_dir
+        self.exported = []
+
+    def _open_index(self):
+        return ResultIndex(self.index_path or os.path.join(self.results_dir, INDEX_FILENAME))
+
+    def update_index(self, index):
+        """Lê apenas os JSONs novos ou alterados desde o último relatório."""
+        parser = ParallelParser(self.workers)
+        try:
+            stats = index.sync(self.results_dir, parse=parser)
+        finally:
+            parser.close()
+        read = stats['new'] + stats['changed']
+        print(f"Índice de resultados: {stats['new']} novos, {stats['changed']} alterados, "
+              f"{stats['removed']} removidos, {stats['unchanged']} sem mudança"
+              + (f" ({read} lidos em {stats['parse_time']:.1f}s)" if read else "") + ".")
+        if stats['errors']:
+            print(f"Aviso: {stats['errors']} arquivos com erro (relidos apenas se forem alterados).")
+        return stats
 
     def generate_excel_report(self, output_filename=None):
         """
-        Lê todos os JSONs de classificação e gera um arquivo Excel consolidado.
+        Gera um arquivo Excel consolidado a partir dos JSONs de classificação.
         Dois formatos de aba: "Por Animal" (detalhado) e "Por Vídeo" (resumo).
+
+        As linhas vêm do índice persistente (ResultIndex): apenas os JSONs
+        novos ou alterados desde o relatório anterior são lidos. A escrita usa
+        o modo write-only do openpyxl, linha a linha a partir do índice, com
+        memória constante; abas acima do limite do Excel são divididas.
         """
         if not os.path.exists(self.results_dir):
             print(f"Erro: Diretório de resultados não encontrado: {self.results_dir}")
             return None
-            
-        json_files = list(Path(self.results_dir).glob('*_classificacao.json'))
-        
-        if not json_files:
-            print("Nenhum arquivo de classificação encontrado para gerar relatório.")
-            return None
-            
-        print(f"Processando {len(json_files)} arquivos para o relatório...")
-        
-        rows_animals = []
-        rows_videos = []
-        
-        for json_file in json_files:
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                video_name = json_file.stem.replace('_classificacao', '')
-                
-                # --- Dados por Vídeo (Resumo) ---
-                total_counts = data.get('contagem_total', {})
-                total_animais = sum(total_counts.get(k, 0) for k in ['Bezerro', 'Novilha', 'Novilho', 'Garrote', 'Vaca', 'Touro'])
-                
-                row_video = {
-                    'Video': video_name,
-                    'Descricao_Ambiente': data.get('descricao_ambiente', ''),
-                    'Total_Animais': total_animais,
-                    'Total_Bezerro': total_counts.get('Bezerro', 0),
-                    'Total_Novilha': total_counts.get('Novilha', 0),
-                    'Total_Novilho': total_counts.get('Novilho', 0),
-                    'Total_Garrote': total_counts.get('Garrote', 0),
-                    'Total_Vaca': total_counts.get('Vaca', 0),
-                    'Total_Touro': total_counts.get('Touro', 0),
-                    'Arquivo_JSON': json_file.name
-                }
-                rows_videos.append(row_video)
-                
-                # --- Dados por Animal (Detalhado) ---
-                animals = data.get('animais_identificados', [])
-                if not animals:
-                    # Se não houver animais, cria uma linha vazia para o vídeo constar
-                     row_animal = {
-                        'Video': video_name,
-                        'Descricao_Ambiente': data.get('descricao_ambiente', ''),
-                        'Animal_ID': 'N/A',
-                        'Classe': 'Nenhum animal identificado',
-                        'Sexo': '',
-                        'Sinais_Clinicos': '',
-                        'Comportamento': '',
-                        'Descricao_Animal': ''
-                    }
-                     rows_animals.append(row_animal)
-                else:
-                    for animal in animals:
-                        row_animal = {
-                            'Video': video_name,
-                            'Descricao_Ambiente': data.get('descricao_ambiente', ''),
-                            'Animal_ID': animal.get('id', ''),
-                            'Classe': animal.get('classe', ''),
-                            'Sexo': animal.get('sexo', ''),
-                            'Sinais_Clinicos': animal.get('sinais_clinicos', ''),
-                            'Comportamento': animal.get('comportamento', ''),
-                            'Descricao_Animal': animal.get('descricao_animal', '')
-                        }
-                        rows_animals.append(row_animal)
-                        
-            except Exception as e:
-                print(f"Erro ao processar {json_file.name}: {e}")
-        
-        if not rows_videos:
-            print("Nenhum dado válido extraído.")
-            return None
-            
-        # Converter para DataFrames
-        df_videos = pd.DataFrame(rows_videos)
-        df_animals = pd.DataFrame(rows_animals)
-        
+
         # Gerar nome do arquivo se não informado
         if not output_filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_filename = os.path.join(self.results_dir, f"relatorio_classificacao_{timestamp}.xlsx")
-            
+
+        index = self._open_index()
         try:
-            with pd.ExcelWriter(output_filename, engine='openpyxl') as writer:
-                df_animals.to_excel(writer, sheet_name='Por Animal', index=False)
-                df_videos.to_excel(writer, sheet_name='Por Video (Resumo)', index=False)
-                
-            print(f"Relatório gerado com sucesso: {output_filename}")
-            return output_filename
+            stats = self.update_index(index)
+            if not stats['new'] + stats['changed'] + stats['unchanged']:
+                print("Nenhum arquivo de classificação encontrado para gerar relatório.")
+                return None
+
+            total_videos, total_animals = index.counts()
+            if not total_videos:
+                print("Nenhum dado válido extraído.")
+                return None
+            print(f"Gerando relatório com {total_videos} vídeos e {total_animals} linhas de animais...")
+
+            try:
+                # openpyxl é importado apenas aqui: o restante da ferramenta não depende dele
+                from openpyxl import Workbook
+
+                workbook = Workbook(write_only=True)
+                _, animal_sheets = write_sheet(workbook, 'Por Animal', ANIMAL_COLUMNS, index.animal_rows())
+                _, video_sheets = write_sheet(workbook, 'Por Video (Resumo)', VIDEO_COLUMNS, index.video_rows())
+                workbook.save(output_filename)
+            except Exception as e:
+                print(f"Erro ao salvar Excel: {e}")
+                return None
+
+            self.export_tables(index)
+        finally:
+            index.close()
+
+        if len(animal_sheets) + len(video_sheets) > 2:
+            print(f"Abas divididas pelo limite de {EXCEL_MAX_ROWS} linhas do Excel: "
+                  f"{', '.join(animal_sheets + video_sheets)}")
+        print(f"Relatório gerado com sucesso: {output_filename}")
+        return output_filename
+
+    def export_tables(self, index):
+        """Exportações Parquet/CSV e tabelas agregadas (refeitas só se o índice mudou)."""
+        self.exported = []
+        if not self.exports:
+            return []
+        exporter = TableExporter(self.exports_dir or os.path.join(self.results_dir, EXPORTS_DIRNAME), self.exports)
+        try:
+            self.exported = exporter.export(index)
         except Exception as e:
-            print(f"Erro ao salvar Excel: {e}")
-            return None
+            print(f"Erro ao exportar tabelas: {e}")
+        return self.exported
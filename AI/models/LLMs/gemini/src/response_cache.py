@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    Cache em disco das respostas do Gemini, endereçado pelo conteúdo da requisição.
+
+    A chave é o SHA-256 de (bytes dos frames enviados, prompt renderizado, nome
+    do modelo, configuração de geração). Assim, mudar o prompt ou o modelo gera
+    uma nova chamada, enquanto renomear um vídeo reaproveita a resposta.
+
+    As respostas ficam em um SQLite; quando o tamanho total passa de `max_bytes`,
+    as entradas menos usadas recentemente são removidas (LRU).
+    """
+
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, 'responses.sqlite')
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' response TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' created REAL NOT NULL,'
+            ' last_access REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)')
+        self._conn.commit()
+        # Tamanho total mantido em memória: somado uma vez aqui e atualizado a cada put/remoção
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _update_with_part(digest, part):
+        """Alimenta o hash com uma parte da requisição (texto, imagem PIL ou blob)."""
+        if isinstance(part, str):
+            digest.update(b'text\0' + part.encode('utf-8'))
+        elif isinstance(part, (bytes, bytearray)):
+            digest.update(b'bytes\0' + bytes(part))
+        elif isinstance(part, dict):
+            digest.update(b'blob\0' + str(part.get('mime_type', '')).encode('utf-8') + b'\0')
+            digest.update(part.get('data', b''))
+        elif hasattr(part, 'tobytes'):
+            # PIL.Image: modo e dimensões entram na chave junto com os pixels
+            digest.update(f"image\0{part.mode}\0{part.size}\0".encode('utf-8'))
+            digest.update(part.tobytes())
+        else:
+            digest.update(b'repr\0' + repr(part).encode('utf-8'))
+        digest.update(b'\0')
+
+    @classmethod
+    def make_key(cls, contents, model_name, generation_config=None):
+        """Calcula a chave de cache de uma requisição."""
+        digest = hashlib.sha256()
+        digest.update(f"model\0{model_name}\0".encode('utf-8'))
+        config = json.dumps(generation_config or {}, sort_keys=True, default=str)
+        digest.update(f"config\0{config}\0".encode('utf-8'))
+        for part in contents:
+            cls._update_with_part(digest, part)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Retorna a resposta em cache (ou None), atualizando o acesso e as estatísticas."""
+        with self._lock:
+            row = self._conn.execute('SELECT response FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response):
+        """Armazena uma resposta e aplica a política de remoção por tamanho."""
+        size = len(response.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, response, size, created, last_access) VALUES (?, ?, ?, ?, ?)',
+                (key, response, size, now, now)
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        excess = self._total_bytes - self.max_bytes
+        removed = 0
+        keys = []
+        for key, size in self._conn.execute('SELECT key, size FROM responses ORDER BY last_access ASC'):
+            if removed >= excess:
+                break
+            keys.append((key,))
+            removed += size
+        self._conn.executemany('DELETE FROM responses WHERE key = ?', keys)
+        self._total_bytes -= removed
+
+    def size_bytes(self):
+        """Tamanho total das respostas armazenadas."""
+        with self._lock:
+            return self._total_bytes
+
+    def stats(self):
+        """Estatísticas de acertos/faltas desde a criação do cache."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
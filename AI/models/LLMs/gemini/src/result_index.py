@@ -0,0 +1,252 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+from src.classification_schema import CLASSES
+
+RESULT_SUFFIX = '_classificacao.json'
+
+# Colunas das abas do relatório
+VIDEO_COLUMNS = ['Video', 'Descricao_Ambiente', 'Total_Animais', *[f'Total_{name}' for name in CLASSES],
+                 'Duplicata_De', 'Grupo_Duplicatas', 'Arquivo_JSON']
+ANIMAL_COLUMNS = ['Video', 'Descricao_Ambiente', 'Animal_ID', 'Classe', 'Sexo', 'Sinais_Clinicos',
+                  'Comportamento', 'Descricao_Animal']
+
+
+def _cell(value):
+    """Valores fora do esperado (listas, objetos) viram texto para caber em uma célula."""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def parse_result(json_path):
+    """
+    Lê um JSON de classificação e monta suas linhas do relatório.
+
+    Returns:
+        (linha_video, linhas_animais, erro); em caso de erro, as linhas são None.
+    """
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        json_name = os.path.basename(json_path)
+        video_name = json_name[:-len(RESULT_SUFFIX)] if json_name.endswith(RESULT_SUFFIX) else json_name
+        environment = _cell(data.get('descricao_ambiente', ''))
+
+        # --- Dados por Vídeo (Resumo) ---
+        total_counts = data.get('contagem_total', {})
+        # Cortes quase idênticos reaproveitam a classificação de outro (duplicata_de)
+        duplicate_of = (data.get('duplicata_de') or {}).get('video', '')
+        row_video = {
+            'Video': video_name,
+            'Descricao_Ambiente': environment,
+            'Total_Animais': sum(total_counts.get(name, 0) for name in CLASSES),
+            **{f'Total_{name}': total_counts.get(name, 0) for name in CLASSES},
+            'Duplicata_De': duplicate_of,
+            'Grupo_Duplicatas': duplicate_of or video_name,
+            'Arquivo_JSON': json_name,
+        }
+
+        # --- Dados por Animal (Detalhado) ---
+        animals = data.get('animais_identificados', [])
+        if not animals:
+            # Se não houver animais, cria uma linha vazia para o vídeo constar
+            rows_animals = [{
+                'Video': video_name,
+                'Descricao_Ambiente': environment,
+                'Animal_ID': 'N/A',
+                'Classe': 'Nenhum animal identificado',
+                'Sexo': '',
+                'Sinais_Clinicos': '',
+                'Comportamento': '',
+                'Descricao_Animal': '',
+            }]
+        else:
+            rows_animals = [{
+                'Video': video_name,
+                'Descricao_Ambiente': environment,
+                'Animal_ID': _cell(animal.get('id', '')),
+                'Classe': _cell(animal.get('classe', '')),
+                'Sexo': _cell(animal.get('sexo', '')),
+                'Sinais_Clinicos': _cell(animal.get('sinais_clinicos', '')),
+                'Comportamento': _cell(animal.get('comportamento', '')),
+                'Descricao_Animal': _cell(animal.get('descricao_animal', '')),
+            } for animal in animals]
+        return row_video, rows_animals, None
+    except Exception as e:
+        return None, None, str(e)
+
+
+def parse_results(paths):
+    """parse_result para uma lista de caminhos (unidade de trabalho dos processos do relatório)."""
+    return [parse_result(path) for path in paths]
+
+
+def _columns(columns):
+    return ', '.join(f'"{name}"' for name in columns)
+
+
+class ResultIndex:
+    """
+    Índice persistente (SQLite) dos resultados de classificação já lidos.
+
+    Cada arquivo *_classificacao.json é registrado com mtime e tamanho, junto
+    das linhas que gera nas abas "Por Vídeo" e "Por Animal". A cada relatório,
+    apenas os JSONs novos ou alterados são lidos; as linhas de arquivos
+    alterados ou removidos são substituídas/apagadas. Assim o custo de um
+    relatório depende do que mudou desde o anterior, e não do histórico inteiro.
+    """
+
+    # Arquivos lidos por transação (durabilidade sem um commit por arquivo)
+    BATCH_SIZE = 1000
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' error TEXT,'
+            ' ingested REAL NOT NULL);'
+            f'CREATE TABLE IF NOT EXISTS videos (path TEXT NOT NULL, {_columns(VIDEO_COLUMNS)});'
+            f'CREATE TABLE IF NOT EXISTS animals (path TEXT NOT NULL, seq INTEGER NOT NULL, {_columns(ANIMAL_COLUMNS)});'
+            'CREATE INDEX IF NOT EXISTS idx_videos_path ON videos(path);'
+            'CREATE INDEX IF NOT EXISTS idx_animals_path ON animals(path);'
+            # Mesma ordem das abas: a leitura percorre o índice, sem ordenar em memória
+            'CREATE INDEX IF NOT EXISTS idx_videos_order ON videos("Grupo_Duplicatas", "Duplicata_De", "Video");'
+            'CREATE INDEX IF NOT EXISTS idx_animals_order ON animals("Video", path, seq);'
+            'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);'
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def scan(results_dir):
+        """Arquivos de resultado do diretório: {nome: (mtime_ns, tamanho)}."""
+        files = {}
+        with os.scandir(results_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(RESULT_SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def changes(self, results_dir):
+        """(arquivos novos/alterados, arquivos removidos, quantidade sem mudança)."""
+        current = self.scan(results_dir)
+        known = {path: (mtime_ns, size) for path, mtime_ns, size
+                 in self._conn.execute('SELECT path, mtime_ns, size FROM files')}
+        changed = sorted(path for path, stamp in current.items() if known.get(path) != stamp)
+        removed = sorted(set(known) - set(current))
+        return [(path, *current[path]) for path in changed], removed, len(current) - len(changed)
+
+    def sync(self, results_dir, parse=None):
+        """
+        Atualiza o índice com os JSONs novos/alterados de results_dir.
+
+        `parse(caminhos)` recebe uma lista de caminhos e retorna, na mesma ordem,
+        (linha_video, linhas_animais, erro); por padrão lê um a um com parse_result.
+
+        Returns:
+            dict com new, changed, removed, unchanged, errors e parse_time (s).
+        """
+        self._bind(results_dir)
+        changed, removed, unchanged = self.changes(results_dir)
+        known = {row[0] for row in self._conn.execute('SELECT path FROM files')}
+        stats = {
+            'new': sum(1 for path, _, _ in changed if path not in known),
+            'changed': sum(1 for path, _, _ in changed if path in known),
+            'removed': len(removed),
+            'unchanged': unchanged,
+            'errors': 0,
+            'parse_time': 0.0,
+        }
+
+        if removed:
+            self._delete(removed)
+            self._conn.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in removed])
+            self._conn.commit()
+
+        parse = parse or parse_results
+        for start in range(0, len(changed), self.BATCH_SIZE):
+            batch = changed[start:start + self.BATCH_SIZE]
+            began = time.perf_counter()
+            parsed = parse([os.path.join(results_dir, path) for path, _, _ in batch])
+            stats['parse_time'] += time.perf_counter() - began
+            self._store(batch, parsed, stats)
+
+        if changed or removed:
+            # Nova versão do conteúdo: exportações derivadas do índice ficam desatualizadas
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (uuid.uuid4().hex,))
+            self._conn.commit()
+        return stats
+
+    def version(self):
+        """Identificador do conteúdo atual do índice (muda a cada sync com mudanças)."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else ''
+
+    def _bind(self, results_dir):
+        """O índice vale para um único diretório: trocar de diretório o reconstrói."""
+        results_dir = os.path.abspath(results_dir)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'results_dir'").fetchone()
+        if row and row[0] == results_dir:
+            return
+        self._conn.executescript('DELETE FROM files; DELETE FROM videos; DELETE FROM animals;')
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('results_dir', ?)", (results_dir,))
+        self._conn.execute("DELETE FROM meta WHERE key = 'version'")
+        self._conn.commit()
+
+    def _delete(self, paths):
+        params = [(path,) for path in paths]
+        self._conn.executemany('DELETE FROM videos WHERE path = ?', params)
+        self._conn.executemany('DELETE FROM animals WHERE path = ?', params)
+
+    def _store(self, batch, parsed, stats):
+        """Substitui as linhas dos arquivos do lote em uma única transação."""
+        now = time.time()
+        video_rows, animal_rows, file_rows = [], [], []
+        for (path, mtime_ns, size), (video_row, rows, error) in zip(batch, parsed):
+            if error:
+                stats['errors'] += 1
+                print(f"Erro ao processar {path}: {error}")
+            else:
+                video_rows.append((path, *[video_row[c] for c in VIDEO_COLUMNS]))
+                animal_rows.extend((path, seq, *[row[c] for c in ANIMAL_COLUMNS]) for seq, row in enumerate(rows))
+            # Arquivos com erro também são registrados: só são relidos se mudarem
+            file_rows.append((path, mtime_ns, size, error, now))
+        self._delete([path for path, _, _ in batch])
+        self._conn.executemany(
+            f'INSERT INTO videos VALUES ({", ".join("?" * (len(VIDEO_COLUMNS) + 1))})', video_rows)
+        self._conn.executemany(
+            f'INSERT INTO animals VALUES ({", ".join("?" * (len(ANIMAL_COLUMNS) + 2))})', animal_rows)
+        self._conn.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)', file_rows)
+        self._conn.commit()
+
+    def counts(self):
+        """Quantidade de vídeos e de linhas de animais indexadas."""
+        videos = self._conn.execute('SELECT COUNT(*) FROM videos').fetchone()[0]
+        animals = self._conn.execute('SELECT COUNT(*) FROM animals').fetchone()[0]
+        return videos, animals
+
+    def video_rows(self):
+        """Linhas da aba "Por Vídeo", com os quase-duplicados logo abaixo da origem."""
+        return self._conn.execute(
+            f'SELECT {_columns(VIDEO_COLUMNS)} FROM videos '
+            'ORDER BY "Grupo_Duplicatas", "Duplicata_De", "Video"'
+        )
+
+    def animal_rows(self):
+        """Linhas da aba "Por Animal", por vídeo e na ordem do JSON."""
+        return self._conn.execute(f'SELECT {_columns(ANIMAL_COLUMNS)} FROM animals ORDER BY "Video", path, seq')
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,89 @@
+import re
+import time
+
+_TIMESTAMP = r'\d{2}:\d{2}:\d{2},\d{3}'
+
+# Cabeçalho de um bloco SRT: índice e linha de tempo
+_HEADER = rf'[ \t]*(\d+)[ \t]*\n[ \t]*({_TIMESTAMP})[ \t]*-->[ \t]*({_TIMESTAMP})[ \t]*\n'
+
+# Início do bloco seguinte (sem grupos), para modelos que omitem a linha em branco
+_NEXT_HEADER = rf'[ \t]*\d+[ \t]*\n[ \t]*{_TIMESTAMP}[ \t]*-->'
+
+# Bloco SRT completo: cabeçalho e texto, terminado por linha em branco ou
+# pelo cabeçalho do bloco seguinte
+BLOCK_PATTERN = re.compile(rf'(?:^|\n){_HEADER}(.+?)\n(?:[ \t]*\n|(?={_NEXT_HEADER}))', re.S)
+
+# Último bloco da resposta: termina no fim do texto (usado só em close())
+LAST_BLOCK_PATTERN = re.compile(rf'(?:^|\n){_HEADER}(.+?)\s*\Z', re.S)
+
+
+class SrtStreamWriter:
+    """
+    Escreve legendas SRT de forma incremental a partir de uma resposta em streaming.
+
+    Os pedaços de texto recebidos são acumulados até formarem um bloco SRT
+    completo (terminado por linha em branco ou pelo início do bloco seguinte);
+    '\r\n' é normalizado mesmo quando chega dividido entre dois pedaços. Cada
+    bloco é renumerado e anexado ao arquivo imediatamente. Se a resposta for
+    interrompida, o arquivo contém apenas blocos completos e válidos.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self._buffer = ''
+        # '\r' no fim de um pedaço: pode ser a metade de um '\r\n' que chega no próximo
+        self._pending_cr = ''
+        self._file = open(output_path, 'w', encoding='utf-8')
+        self._start = time.perf_counter()
+        self.blocks_written = 0
+        self.time_to_first_block = None
+
+    def _write_block(self, start, end, text):
+        # Remove cercas de markdown que o modelo às vezes inclui
+        text = re.sub(r'```\w*', '', text).strip()
+        if not text:
+            return
+        self.blocks_written += 1
+        if self.blocks_written > 1:
+            self._file.write('\n')
+        self._file.write(f"{self.blocks_written}\n{start} --> {end}\n{text}\n")
+        self._file.flush()
+        if self.time_to_first_block is None:
+            self.time_to_first_block = time.perf_counter() - self._start
+
+    def _drain(self):
+        while True:
+            match = BLOCK_PATTERN.search(self._buffer)
+            if not match:
+                return
+            _, start, end, text = match.groups()
+            self._write_block(start, end, text)
+            # Mantém a quebra de linha final para ancorar o próximo bloco
+            self._buffer = self._buffer[match.end() - 1:]
+
+    def feed(self, text):
+        """Recebe um pedaço da resposta e grava os blocos que se completaram."""
+        text = self._pending_cr + text
+        self._pending_cr = ''
+        if text.endswith('\r'):
+            text, self._pending_cr = text[:-1], '\r'
+        self._buffer += text.replace('\r\n', '\n')
+        self._drain()
+
+    def close(self, complete=True):
+        """
+        Finaliza o arquivo. Com complete=True (resposta terminou normalmente),
+        o último bloco, que só termina com o fim da resposta, é gravado aqui;
+        com complete=False (resposta interrompida) ele é descartado.
+        """
+        if complete:
+            self._buffer += self._pending_cr.replace('\r', '\n')
+            self._drain()
+            match = LAST_BLOCK_PATTERN.search(self._buffer)
+            if match:
+                _, start, end, text = match.groups()
+                self._write_block(start, end, text)
+        self._buffer = ''
+        self._pending_cr = ''
+        self._file.close()
+        return self.blocks_written
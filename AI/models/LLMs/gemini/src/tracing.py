@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+# USD por 1M tokens (entrada, saída) na API paga do Gemini, prompts até 200k tokens.
+# Fonte: https://ai.google.dev/gemini-api/docs/pricing (valores de 2025; conferir
+# antes de usar em orçamento). Modelos com versão no nome (ex.: "-preview-05-20")
+# usam o preço do prefixo mais longo da tabela.
+MODEL_PRICES_PER_MTOK = {
+    'gemini-2.5-pro': (1.25, 10.0),
+    'gemini-2.5-flash': (0.30, 2.50),
+    'gemini-2.5-flash-lite': (0.10, 0.40),
+    'gemini-2.0-flash': (0.10, 0.40),
+    'gemini-2.0-flash-lite': (0.075, 0.30),
+    'gemini-1.5-pro': (1.25, 5.0),
+    'gemini-1.5-flash': (0.075, 0.30),
+}
+
+
+class RequestTracer:
+    """
+    Registra cada chamada ao modelo como um span JSONL (uma linha por chamada).
+
+    Campos: ts, run, video, stage, model, bytes_uploaded, input_tokens,
+    output_tokens, tokens_estimated, latency, attempts, retry_delays,
+    queue_wait, cache_hit, stream e error. Cada linha é gravada imediatamente,
+    então o arquivo pode ser acompanhado durante um lote longo.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Identifica a execução, para resumir apenas o lote mais recente
+        self.run_id = time.strftime('%Y%m%d_%H%M%S') + '_' + uuid.uuid4().hex[:6]
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def emit(self, span):
+        span = {'run': self.run_id, **span}
+        line = json.dumps(span, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def load_spans(path, run=None):
+    """Lê os spans do arquivo; run='latest' mantém apenas a última execução."""
+    spans = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spans.append(json.loads(line))
+            except ValueError:
+                # Linha truncada (processo interrompido durante a escrita)
+                continue
+    if run == 'latest' and spans:
+        run = spans[-1].get('run')
+    if run:
+        spans = [s for s in spans if s.get('run') == run]
+    return spans
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def model_prices(model):
+    """(entrada, saída) em USD por 1M tokens do modelo, ou None se não estiver na tabela."""
+    name = (model or '').lower().removeprefix('models/')
+    matches = [prefix for prefix in MODEL_PRICES_PER_MTOK if name.startswith(prefix)]
+    return MODEL_PRICES_PER_MTOK[max(matches, key=len)] if matches else None
+
+
+def summarize_spans(spans, price_input_per_mtok=None, price_output_per_mtok=None):
+    """
+    Agrega os spans em vazão, latência p50/p95, tokens, retentativas e custo.
+
+    Retorna {'total': {...}, 'stages': {etapa: {...}}}. O custo usa os preços
+    por milhão de tokens de entrada/saída informados; sem eles (None), o preço
+    do modelo de cada span (MODEL_PRICES_PER_MTOK). Chamadas de modelos fora
+    da tabela ficam sem custo e são contadas em 'unpriced'.
+    """
+    def span_cost(span):
+        prices = model_prices(span.get('model'))
+        price_in = price_input_per_mtok if price_input_per_mtok is not None else (prices or (0.0, 0.0))[0]
+        price_out = price_output_per_mtok if price_output_per_mtok is not None else (prices or (0.0, 0.0))[1]
+        return ((span.get('input_tokens') or 0) * price_in + (span.get('output_tokens') or 0) * price_out) / 1e6
+
+    explicit = price_input_per_mtok is not None and price_output_per_mtok is not None
+
+    def aggregate(group):
+        calls = [s for s in group if not s.get('cache_hit')]
+        ok = [s for s in calls if not s.get('error')]
+        latencies = [s['latency'] for s in ok if s.get('latency') is not None]
+        input_tokens = sum(s.get('input_tokens') or 0 for s in calls)
+        output_tokens = sum(s.get('output_tokens') or 0 for s in calls)
+        cost = sum(span_cost(s) for s in calls)
+        videos = {s.get('video') for s in group if s.get('video')}
+        starts = [s['ts'] for s in group if s.get('ts') is not None]
+        ends = [s['ts'] + (s.get('latency') or 0) for s in group if s.get('ts') is not None]
+        wall = max(ends) - min(starts) if starts else 0.0
+        return {
+            'spans': len(group),
+            'calls': len(calls),
+            'cache_hits': len(group) - len(calls),
+            'errors': len(calls) - len(ok),
+            'videos': len(videos),
+            'wall': wall,
+            'calls_per_min': len(calls) / wall * 60 if wall > 0 else 0.0,
+            'videos_per_min': len(videos) / wall * 60 if wall > 0 else 0.0,
+            'p50': _percentile(latencies, 0.5),
+            'p95': _percentile(latencies, 0.95),
+            'retries': sum(max(0, (s.get('attempts') or 1) - 1) for s in calls),
+            'retry_delay': sum(sum(s.get('retry_delays') or []) for s in calls),
+            'queue_wait': sum(s.get('queue_wait') or 0 for s in calls),
+            'bytes_uploaded': sum(s.get('bytes_uploaded') or 0 for s in calls),
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'estimated': sum(1 for s in calls if s.get('tokens_estimated')),
+            'cost': cost,
+            'unpriced': 0 if explicit else sum(1 for s in calls if model_prices(s.get('model')) is None),
+            'cost_per_video': cost / len(videos) if videos else 0.0,
+        }
+
+    stages = {}
+    for span in spans:
+        stages.setdefault(span.get('stage') or '-', []).append(span)
+    return {
+        'total': aggregate(spans),
+        'stages': {name: aggregate(group) for name, group in sorted(stages.items())},
+    }
+
+
+def print_summary(summary):
+    """Exibe o resumo dos spans por etapa e no total."""
+    total = summary['total']
+    if not total['spans']:
+        print("Nenhuma chamada registrada.")
+        return
+    print(f"\n=== Chamadas ao modelo: {total['calls']} ({total['cache_hits']} do cache, "
+          f"{total['errors']} com erro), {total['videos']} vídeos em {total['wall']:.0f}s ===")
+    print(f"{'etapa':<10} {'chamadas':>8} {'cache':>6} {'erros':>6} {'p50(s)':>7} {'p95(s)':>7} "
+          f"{'retent.':>7} {'espera(s)':>9} {'tok.entrada':>11} {'tok.saída':>10} {'custo':>9}")
+    rows = list(summary['stages'].items()) + [('total', total)]
+    for name, s in rows:
+        print(f"{name:<10} {s['calls']:>8} {s['cache_hits']:>6} {s['errors']:>6} {s['p50']:>7.2f} {s['p95']:>7.2f} "
+              f"{s['retries']:>7} {s['retry_delay'] + s['queue_wait']:>9.0f} {s['input_tokens']:>11} "
+              f"{s['output_tokens']:>10} {s['cost']:>9.4f}")
+    print(f"Vazão: {total['calls_per_min']:.1f} chamadas/min, {total['videos_per_min']:.1f} vídeos/min | "
+          f"Custo por vídeo: {total['cost_per_video']:.4f} | Upload: {total['bytes_uploaded'] / 1024 / 1024:.1f} MB")
+    if total['estimated']:
+        print(f"Obs.: {total['estimated']} chamadas sem contagem de tokens da API (valores estimados).")
+    if total['unpriced']:
+        print(f"Obs.: {total['unpriced']} chamadas de modelos sem preço conhecido (custo não somado; "
+              f"use price_input_per_mtok / price_output_per_mtok).")
+
+
+def main():
+    """Resumo de um arquivo de spans: python -m src.tracing traces/requests.jsonl"""
+    parser = argparse.ArgumentParser(description="Resumo das chamadas ao modelo registradas em JSONL")
+    parser.add_argument('trace_file', nargs='?', default='traces/requests.jsonl')
+    parser.add_argument('--run', help="ID da execução ou 'latest' (padrão: todas)")
+    parser.add_argument('--price-input', type=float, default=None,
+                        help="Preço por 1M tokens de entrada (padrão: o do modelo de cada chamada)")
+    parser.add_argument('--price-output', type=float, default=None,
+                        help="Preço por 1M tokens de saída (padrão: o do modelo de cada chamada)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.trace_file):
+        print(f"Arquivo de trace não encontrado: {args.trace_file}")
+        return 1
+
+    from src.config_manager import ConfigManager
+    config = ConfigManager()
+    price_input = args.price_input if args.price_input is not None else config.get('price_input_per_mtok')
+    price_output = args.price_output if args.price_output is not None else config.get('price_output_per_mtok')
+    print_summary(summarize_spans(load_spans(args.trace_file, args.run), price_input, price_output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
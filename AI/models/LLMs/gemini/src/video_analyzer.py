@@ -1,73 +1,187 @@
 import os
-import google.generativeai as genai
-import cv2
-import numpy as np
+import json
 import re
+import threading
 import time
 from PIL import Image
-import io
+
+from src.frame_extractor import FrameExtractor
+from src.frame_cache import sample_plan
+from src.rate_limiter import estimate_request_tokens, is_rate_limit_error
+from src.model_backends import GeminiBackend
+from src.srt_stream import SrtStreamWriter
+from src.context_cache import dynamic_text, split_prompt
+from src.classification_schema import (CLASSIFICATION_GENERATION_CONFIG, build_repair_prompt,
+                                       parse_classification)
+from src.prescreen import empty_classification
 
 class VideoAnalyzer:
-    def __init__(self, api_key, model_name='gemini-3-pro-preview', prompt_template=None):
-        """Inicializa o analisador de vídeos com a API key do Gemini."""
+    def __init__(self, api_key, model_name='gemini-3-pro-preview', prompt_template=None, frame_extractor=None,
+                 rate_limiter=None, max_retries=6, response_cache=None, generation_config=None,
+                 frame_preprocessor=None, keyframe_selector=None, model=None, stream_srt=False,
+                 structured_output=True, tracer=None, context_cache=None, prescreen=None,
+                 duplicate_index=None, frame_cache=None):
+        """
+        Inicializa o analisador de vídeos com a API key do Gemini.
+
+        `model` permite injetar outro backend (ex.: ReplayBackend para testes e
+        benchmarks sem rede); por padrão usa o Gemini.
+        """
         self.api_key = api_key
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model_name)
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.model = model or GeminiBackend(api_key, model_name, generation_config)
         
         # Prompt para análise de vídeos
         self.prompt_template = prompt_template or "Descreva este vídeo."
 
+        # Motor de extração de frames (sequencial ou por seek, conforme o vídeo)
+        self.frame_extractor = frame_extractor or FrameExtractor()
+        # Seleção de frames por mudança de cena/qualidade (None = amostragem uniforme)
+        self.keyframe_selector = keyframe_selector
+        # Frames decodificados em cache, por hash do vídeo + plano de amostragem (opcional, FrameCache)
+        self.frame_cache = frame_cache
+        # Informações da última extração, por thread (o analisador é compartilhado em lotes concorrentes)
+        self._local = threading.local()
+
+        # Limitador de taxa compartilhado entre workers (opcional)
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+
+        # Cache de respostas endereçado por conteúdo (opcional)
+        self.response_cache = response_cache
+
+        # Redução/recorte/JPEG dos frames antes do envio (opcional)
+        self.frame_preprocessor = frame_preprocessor
+
+        # Legendas em streaming: blocos SRT gravados à medida que chegam
+        self.stream_srt = stream_srt
+
+        # Classificação com saída JSON restrita ao esquema (validada na resposta)
+        self.structured_output = structured_output
+
+        # Spans JSONL de cada chamada ao modelo (opcional, RequestTracer)
+        self.tracer = tracer
+
+        # Prefixos de prompt registrados como contexto em cache (opcional, PromptContextCache)
+        self.context_cache = context_cache
+
+        # Pré-triagem local dos frames de classificação (opcional, ClipPrescreen)
+        self.prescreen = prescreen
+
+        # Índice de embeddings para reaproveitar a classificação de cortes quase idênticos (opcional)
+        self.duplicate_index = duplicate_index
+
+        # Bytes enviados e latência de cada requisição ao modelo
+        self.request_stats = []
+        # Respostas de classificação: total, malformadas, corrigidas e descartadas
+        self.classification_stats = {'responses': 0, 'malformed': 0, 'repaired': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def last_extraction(self):
+        return getattr(self._local, 'last_extraction', None)
+
+    @last_extraction.setter
+    def last_extraction(self, info):
+        self._local.last_extraction = info
+
+    @property
+    def last_timings(self):
+        """Tempo (s) por etapa da última análise desta thread: extract, api."""
+        return dict(getattr(self._local, 'timings', {}))
+
+    @property
+    def last_error(self):
+        """Mensagem do último erro da análise desta thread (None se bem-sucedida)."""
+        return getattr(self._local, 'last_error', None)
+
+    def reset_run_state(self):
+        """Zera tempos e erro da thread atual (chamado no início de cada análise)."""
+        self._local.timings = {}
+        self._local.last_error = None
+
+    def _add_timing(self, stage, seconds):
+        timings = self._local.__dict__.setdefault('timings', {})
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+    def _fail(self, message):
+        self._local.last_error = message
+        print(message)
+
     def extract_frames(self, video_path, num_frames=8):
         """Extrai frames representativos do vídeo usando OpenCV."""
+        start = time.perf_counter()
         try:
-            # Abrir o vídeo
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                print(f"Erro: Não foi possível abrir o vídeo {video_path}")
-                return None, 0
-            
-            # Obter informações sobre o vídeo
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            duration = total_frames / fps if fps > 0 else 0
-            
-            print(f"Vídeo: {total_frames} frames, {fps} FPS, duração: {duration:.2f} segundos")
-            
-            if total_frames <= 0:
-                print("Aviso: O vídeo parece estar vazio ou danificado")
-                return None, 0
-                
-            # Calcular os pontos para extração de frames
-            frame_indices = [int(i * total_frames / num_frames) for i in range(num_frames)]
-            
-            # Extrair e converter frames
-            frames = []
-            for idx in frame_indices:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-                ret, frame = cap.read()
-                if ret:
-                    # Converter BGR para RGB (formato esperado pelo Gemini)
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    # Converter para imagem PIL
-                    pil_image = Image.fromarray(frame_rgb)
-                    frames.append(pil_image)
-                else:
-                    print(f"Aviso: Não foi possível ler o frame {idx}")
-            
-            cap.release()
-            
+            return self._extract_frames(video_path, num_frames)
+        finally:
+            self._add_timing('extract', time.perf_counter() - start)
+
+    def sample_plan(self, num_frames):
+        """Plano de amostragem (seleção + extração) usado como chave do cache de frames."""
+        selector = self.keyframe_selector
+        return sample_plan(num_frames, 'scene' if selector else 'uniform', self.frame_extractor.mode,
+                           selector.describe() if selector else None)
+
+    def _extract_frames(self, video_path, num_frames):
+        try:
+            plan = self.sample_plan(num_frames)
+            start = time.perf_counter()
+            cached = self.frame_cache.get(video_path, plan) if self.frame_cache else None
+            if cached:
+                frames, info = cached
+                info['mode'] = f"cache/{info['mode']}"
+                info['decode_time'] = time.perf_counter() - start
+            else:
+                frames, info = self._decode_frames(video_path, num_frames)
+                if frames and self.frame_cache:
+                    try:
+                        frames = self.frame_cache.put(video_path, plan, frames, info)
+                    except Exception as e:
+                        # O cache é só uma otimização: os frames já decodificados seguem
+                        print(f"Aviso: falha ao gravar frames no cache: {e}")
+            self.last_extraction = info
+
+            print(f"Vídeo: {info['total_frames']} frames, {info['fps']} FPS, duração: {info['duration']:.2f} segundos")
+
             # Verificar se conseguimos extrair frames suficientes
             if not frames:
                 print("Erro: Não foi possível extrair frames do vídeo")
                 return None, 0
-                
-            print(f"Extraídos {len(frames)} frames do vídeo")
-            return frames, duration
-            
+
+            print(f"Extraídos {len(frames)} frames do vídeo "
+                  f"(modo: {info['mode']}, GOP~{info['gop']}, decodificação: {info['decode_time']:.2f}s)")
+            return frames, info['duration']
+
         except Exception as e:
             print(f"Erro ao processar o vídeo: {e}")
             return None, 0
 
+    def _decode_frames(self, video_path, num_frames):
+        """Seleção (opcional) e decodificação dos frames com OpenCV."""
+        frame_indices = None
+        if self.keyframe_selector:
+            frame_indices, _ = self.keyframe_selector.select(video_path, num_frames)
+            if frame_indices is None:
+                print("Aviso: Seleção de keyframes falhou, usando amostragem uniforme")
+        return self.frame_extractor.extract(video_path, num_frames=num_frames, frame_indices=frame_indices)
+
+    @staticmethod
+    def format_timestamp(seconds):
+        """Formata segundos no padrão de timestamp SRT (HH:MM:SS,mmm)."""
+        millis = int(round(seconds * 1000))
+        hours, millis = divmod(millis, 3600000)
+        minutes, millis = divmod(millis, 60000)
+        secs, millis = divmod(millis, 1000)
+        return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+    def _frame_timestamps_note(self, timestamps):
+        """Texto informando ao modelo o instante de cada frame enviado."""
+        if not timestamps:
+            return ""
+        lines = [f"- Frame {i}: {self.format_timestamp(t)}" for i, t in enumerate(timestamps, 1)]
+        return "\n\nOs frames enviados, na ordem, correspondem aos seguintes instantes do vídeo:\n" + "\n".join(lines)
+
     def extract_srt_content(self, response_text):
         """Extrai apenas o conteúdo SRT da resposta."""
         # Tenta encontrar conteúdo SRT usando regex
@@ -98,28 +212,42 @@ class VideoAnalyzer:
 
     def analyze_video(self, video_path, output_path=None):
         """Analisa o vídeo e gera legendas no formato SRT."""
+        self.reset_run_state()
         print("Extraindo frames do vídeo...")
         frames, duration = self.extract_frames(video_path)
         if not frames:
-            print("Falha ao extrair frames do vídeo.")
+            self._fail("Falha ao extrair frames do vídeo.")
             return None
         
         print(f"Vídeo carregado. Duração: {duration:.2f} segundos")
+        timestamps = (self.last_extraction or {}).get('timestamps')
+        return self.analyze_extracted(video_path, frames, duration, timestamps, output_path)
+
+    def analyze_extracted(self, video_path, frames, duration, timestamps=None, output_path=None):
+        """
+        Gera legendas SRT a partir de frames já extraídos (PIL ou blobs já
+        pré-processados). Usado diretamente pelo pipeline em lote, em que a
+        decodificação ocorre em outro processo.
+        """
+        # Determinar o caminho de saída
+        if not output_path:
+            base_name = os.path.splitext(os.path.basename(video_path))[0]
+            output_path = f"{base_name}_legendas.srt"
         
         # Criar prompt específico para este vídeo
-        prompt = self.prompt_template.format(duration=int(duration))
-        
+        contents, context = self._build_request(self.prompt_template, self._prepare_frames(frames),
+                                                values={'duration': int(duration)},
+                                                suffix=self._frame_timestamps_note(timestamps))
         print("Analisando vídeo com Gemini...")
+        if self.stream_srt:
+            return self._analyze_streaming(video_path, contents, output_path, context)
+        
         try:
-            response = self.model.generate_content([prompt, *frames])
+            response_text = self._generate_text(contents, video_path, stage='subtitles', context=context,
+                                                validate=self._looks_like_srt)
             
             # Extrair apenas o conteúdo SRT da resposta
-            srt_content = self.extract_srt_content(response.text)
-            
-            # Determinar o caminho de saída
-            if not output_path:
-                base_name = os.path.splitext(os.path.basename(video_path))[0]
-                output_path = f"{base_name}_legendas.srt"
+            srt_content = self.extract_srt_content(response_text)
             
             # Salvar arquivo SRT
             with open(output_path, 'w', encoding='utf-8') as f:
@@ -128,93 +256,462 @@ class VideoAnalyzer:
             print(f"Legendas geradas com sucesso: {output_path}")
             return output_path
         except Exception as e:
-            print(f"Erro ao analisar o vídeo: {e}")
+            self._fail(f"Erro ao analisar o vídeo: {e}")
             return None
 
+    def _analyze_streaming(self, video_path, contents, output_path, context=None):
+        """
+        Consome a resposta em streaming, gravando cada bloco SRT assim que se
+        completa. Em caso de falha no meio da resposta, os blocos já completos
+        permanecem no arquivo.
+        """
+        writer = SrtStreamWriter(output_path)
+        complete = False
+        try:
+            self._generate_text(contents, video_path, on_chunk=writer.feed, stage='subtitles', context=context,
+                                validate=self._looks_like_srt)
+            complete = True
+        except Exception as e:
+            self._fail(f"Erro ao analisar o vídeo: {e}")
+        finally:
+            blocks = writer.close(complete=complete)
+
+        if writer.time_to_first_block is not None:
+            self._add_timing('first_subtitle', writer.time_to_first_block)
+            print(f"Primeira legenda gravada após {writer.time_to_first_block:.2f}s")
+
+        if not complete:
+            if blocks:
+                print(f"Resposta interrompida: {blocks} blocos válidos mantidos em {output_path}")
+            return None
+
+        print(f"Legendas geradas com sucesso: {output_path} ({blocks} blocos)")
+        return output_path
+
+    def _build_request(self, template, parts, values=None, suffix=''):
+        """
+        Monta o conteúdo da requisição: [prompt, *parts].
+
+        Com cache de contexto, o prefixo estático do template fica no contexto
+        registrado e o prompt enviado traz apenas os campos variáveis (`values`)
+        e o `suffix`. Sem `values`, o template é usado sem formatação.
+
+        Returns:
+            (contents, context): context é o handle do contexto em cache ou None.
+        """
+        if self.context_cache:
+            prefix, fields = split_prompt(template) if values is not None else (template, [])
+            context = self.context_cache.handle_for(prefix)
+            self.context_cache.record_request(context)
+            if context is not None:
+                text = (dynamic_text(fields, values or {}) + suffix).strip()
+                return ([text] if text else []) + list(parts), context
+
+        prompt = template.format(**values) if values is not None else template
+        return [prompt + suffix, *parts], None
+
+    def _prepare_frames(self, frames):
+        """Aplica o pré-processamento configurado aos frames a enviar (blobs já codificados passam direto)."""
+        if not self.frame_preprocessor:
+            return frames
+        return [self.frame_preprocessor.encode(self.frame_preprocessor.process(f))
+                if isinstance(f, Image.Image) else f for f in frames]
+
+    @staticmethod
+    def _payload_bytes(contents):
+        """Bytes enviados na requisição (texto + blobs de imagem codificados)."""
+        total = 0
+        for part in contents:
+            if isinstance(part, str):
+                total += len(part.encode('utf-8'))
+            elif isinstance(part, dict):
+                total += len(part.get('data', b''))
+            elif isinstance(part, Image.Image):
+                # Imagem PIL sem pré-processamento: o SDK a codifica; usamos o tamanho bruto
+                total += len(part.tobytes())
+        return total
+
+    def _record_request(self, video_path, payload_bytes, latency, attempts):
+        entry = {
+            'video': os.path.basename(video_path) if video_path else None,
+            'bytes_uploaded': payload_bytes,
+            'latency': latency,
+            'attempts': attempts,
+        }
+        with self._stats_lock:
+            self.request_stats.append(entry)
+        print(f"Requisição: {payload_bytes / 1024:.1f} KB enviados, latência {latency:.2f}s")
+
+    def _generate_content(self, contents, video_path=None, stream=False, generation_config=None, span=None,
+                          context=None):
+        """
+        Chama o modelo com retentativas em caso de cota excedida (429).
+        Com stream=True retorna a resposta iterável (pedaços com `.text`);
+        `generation_config` substitui a configuração de geração nesta chamada.
+        Se `span` for informado, recebe bytes enviados, tentativas, esperas e latência.
+        `context` é o contexto em cache que substitui o prefixo do prompt.
+
+        Com um rate_limiter compartilhado, um 429 pausa apenas o limitador e a
+        retentativa aguarda a cota em acquire(); sem limitador, mantém-se a
+        espera local com delays fixos (1min, 15min, 30min e depois dobrando).
+        """
+        prompt = next((c for c in contents if isinstance(c, str)), '')
+        estimated_tokens = estimate_request_tokens(prompt, len(contents) - 1)
+
+        max_retries = self.max_retries
+        # Delays específicos: 1min (60s), 15min (900s), 30min (1800s). Depois dobra.
+        retry_delays = [60, 900, 1800]
+
+        payload_bytes = self._payload_bytes(contents)
+        span = span if span is not None else {}
+        span.update(bytes_uploaded=payload_bytes, attempts=0, retry_delays=[], queue_wait=0.0)
+
+        for attempt in range(max_retries):
+            span['attempts'] = attempt + 1
+            if self.rate_limiter:
+                wait_start = time.perf_counter()
+                self.rate_limiter.acquire(estimated_tokens)
+                span['queue_wait'] += time.perf_counter() - wait_start
+            try:
+                start = time.perf_counter()
+                options = {}
+                if stream:
+                    options['stream'] = True
+                if generation_config:
+                    options['generation_config'] = generation_config
+                if context is not None:
+                    options['context_cache'] = context
+                response = self.model.generate_content(contents, **options)
+                span['latency'] = time.perf_counter() - start
+                self._record_request(video_path, payload_bytes, span['latency'], attempt + 1)
+                if self.rate_limiter:
+                    if not stream:
+                        # Em streaming, a contagem de tokens só existe ao final da resposta
+                        usage = getattr(response, 'usage_metadata', None)
+                        self.rate_limiter.reconcile(estimated_tokens, getattr(usage, 'prompt_token_count', None))
+                    self.rate_limiter.record_success()
+                return response
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                if attempt >= max_retries - 1:
+                    print(f"Cota de API excedida. Máximo de tentativas ({max_retries}) atingido.")
+                    raise
+
+                print(f"Cota de API excedida (429). Tentativa {attempt + 1}/{max_retries} falhou.")
+                if self.rate_limiter:
+                    delay = self.rate_limiter.report_rate_limit()
+                    span['retry_delays'].append(delay)
+                    print(f"Limitador pausado por {delay:.0f} segundos; requisições em fila aguardam a retomada.")
+                    continue
+
+                # Calcular delay baseado na tentativa
+                if attempt < len(retry_delays):
+                    delay = retry_delays[attempt]
+                else:
+                    # Dobrar o último delay se passar da lista pré-definida
+                    # O último da lista é 1800, então: 3600, 7200...
+                    delay = retry_delays[-1] * (2 ** (attempt - len(retry_delays) + 1))
+
+                span['retry_delays'].append(delay)
+                print(f"Aguardando {delay} segundos (aprox. {delay/60:.1f} minutos) antes da próxima tentativa...")
+
+                # Mostrar contagem regressiva para esperas longas (> 1 min)
+                if delay > 60:
+                    remaining = delay
+                    while remaining > 0:
+                        if remaining % 60 == 0:
+                            print(f"Aguardando... {remaining/60:.0f} minutos restantes.")
+                        time.sleep(1)
+                        remaining -= 1
+                else:
+                    time.sleep(delay)
+
+    def _generate_text(self, contents, video_path=None, on_chunk=None, generation_config=None, stage='generate',
+                       context=None, validate=None):
+        """
+        Retorna o texto da resposta do modelo, consultando antes o cache de respostas.
+
+        Com `on_chunk`, a resposta é pedida em streaming e cada pedaço de texto
+        é repassado à função assim que chega (uma resposta em cache é repassada inteira).
+        Cada chamada (inclusive acertos de cache) gera um span no tracer, com a etapa `stage`.
+        `context` é o contexto em cache (prefixo do prompt) montado por _build_request.
+        `validate(texto) -> bool` decide o que entra no cache: respostas vazias ou
+        inválidas não são gravadas (uma nova execução chama a API de novo), e
+        entradas antigas que não passam na validação são ignoradas.
+        """
+        span = {
+            'ts': time.time(),
+            'video': os.path.basename(video_path) if video_path else None,
+            'stage': stage,
+            'model': self.model_name,
+            'cache_hit': False,
+            'stream': bool(on_chunk),
+            'context_cache': context is not None,
+        }
+        key = None
+        if self.response_cache:
+            key_contents = [context.prefix, *contents] if context is not None else contents
+            key = self.response_cache.make_key(key_contents, self.model_name,
+                                               generation_config or self.generation_config)
+            cached = self.response_cache.get(key)
+            if cached is not None and not self._cacheable(cached, validate):
+                print("Resposta em cache inválida; chamando a API novamente.")
+                cached = None
+            if cached is not None:
+                print("Resposta encontrada no cache (nenhuma chamada à API).")
+                span.update(cache_hit=True, latency=0.0)
+                self._emit_span(span)
+                if on_chunk:
+                    on_chunk(cached)
+                return cached
+
+        start = time.perf_counter()
+        response = None
+        try:
+            if on_chunk:
+                parts = []
+                response = self._generate_content(contents, video_path, stream=True, span=span, context=context)
+                for chunk in response:
+                    parts.append(chunk.text)
+                    on_chunk(chunk.text)
+                text = ''.join(parts)
+            else:
+                response = self._generate_content(contents, video_path, generation_config=generation_config,
+                                                  span=span, context=context)
+                text = response.text
+        except Exception as e:
+            span.update(latency=time.perf_counter() - start, error=str(e)[:500])
+            self._emit_span(span)
+            raise
+        finally:
+            self._add_timing('api', time.perf_counter() - start)
+
+        # Latência até o fim da resposta (em streaming, inclui todos os pedaços)
+        span['latency'] = time.perf_counter() - start
+        self._add_usage(span, response, contents, text)
+        if context is not None:
+            self.context_cache.record_saved(context, span.get('cached_tokens'))
+        self._emit_span(span)
+        if self.response_cache and self._cacheable(text, validate):
+            self.response_cache.put(key, text)
+        return text
+
+    @staticmethod
+    def _cacheable(text, validate):
+        return bool(text and text.strip()) and (validate is None or validate(text))
+
+    @staticmethod
+    def _valid_classification(text):
+        """Resposta que passa no esquema de classificação (validação para o cache)."""
+        return not parse_classification(text)[1]
+
+    @staticmethod
+    def _looks_like_srt(text):
+        """Resposta com ao menos uma linha de tempo SRT (validação para o cache)."""
+        return '-->' in text
+
+    @staticmethod
+    def _add_usage(span, response, contents, text):
+        """Tokens de entrada/saída da resposta; sem usage_metadata, usa estimativas."""
+        usage = getattr(response, 'usage_metadata', None)
+        input_tokens = getattr(usage, 'prompt_token_count', None)
+        output_tokens = getattr(usage, 'candidates_token_count', None)
+        span['tokens_estimated'] = input_tokens is None
+        if input_tokens is None:
+            prompt = next((c for c in contents if isinstance(c, str)), '')
+            input_tokens = estimate_request_tokens(prompt, len(contents) - 1)
+            output_tokens = len(text) // 4
+        span['input_tokens'] = input_tokens
+        span['output_tokens'] = output_tokens or 0
+        span['cached_tokens'] = getattr(usage, 'cached_content_token_count', None)
+
+    def _emit_span(self, span):
+        if self.tracer:
+            self.tracer.emit(span)
+
     def analyze_frame_classification(self, video_path, output_path=None, prompt_template=None):
         """
-        Classifica animais no primeiro frame do vídeo e retorna JSON.
+        Classifica animais em um frame do vídeo e retorna JSON.
+
+        Com keyframe_selector, usa o frame mais nítido e bem exposto do vídeo;
+        sem ele, o primeiro frame. Com duplicate_index, um corte quase idêntico
+        a outro já classificado reaproveita o resultado dele; com prescreen,
+        frames claramente sem animais não são enviados ao modelo.
         """
-        print("Extraindo frame inicial...")
+        self.reset_run_state()
+        print("Extraindo frame para classificação...")
         # Extrair apenas 1 frame
         frames, duration = self.extract_frames(video_path, num_frames=1)
         if not frames:
-            print("Falha ao extrair frame do vídeo.")
+            self._fail("Falha ao extrair frame do vídeo.")
             return None
             
         print(f"Frame extraído. Iniciando classificação...")
         
         # Usar prompt específico ou o padrão da instância
         prompt = prompt_template or self.prompt_template
+        base_name = os.path.splitext(os.path.basename(video_path))[0]
+        saved = None
         
-        max_retries = 6
-        # Delays específicos: 1min (60s), 15min (900s), 30min (1800s). Depois dobra.
-        retry_delays = [60, 900, 1800]
-        
-        for attempt in range(max_retries):
+        try:
+            data = self._reuse_duplicate(base_name, frames[0])
+            if data is None:
+                skip, prescreen_info = self._prescreen(frames[0])
+                if skip:
+                    print(f"Pré-triagem: nenhum animal (p={prescreen_info['prob_sem_animal']:.2f}), "
+                          f"chamada à API evitada.")
+                    data = empty_classification(prescreen_info)
+                else:
+                    data = self._classify(video_path, prompt, self._prepare_frames(frames[:1]))
+                    if data is None:
+                        return None
+                    if prescreen_info:
+                        data['pre_triagem'] = prescreen_info
+            
+            # Determinar o caminho de saída
+            if not output_path:
+                output_path = f"{base_name}_classificacao.json"
+            
+            # Salvar o frame analisado (imagem)
             try:
-                # Configurar para JSON se possível via prompt, mas o Gemini Flash pode precisar de instrução explícita
-                response = self.model.generate_content([prompt, frames[0]])
-                
-                json_content = response.text
-                # Limpar markdown ```json ... ``` se houver
-                json_content = re.sub(r'^```json\s*', '', json_content)
-                json_content = re.sub(r'\s*```$', '', json_content)
-                
-                # Determinar o caminho de saída
-                if not output_path:
-                    base_name = os.path.splitext(os.path.basename(video_path))[0]
-                    output_path = f"{base_name}_classificacao.json"
-                
-                # Salvar o frame analisado (imagem)
-                try:
-                    # Derivar nome da imagem do nome do json
-                    image_path = output_path.replace('.json', '.jpg')
-                    # Se não terminar com .json (caso raro), forçar extensão
-                    if image_path == output_path:
-                        image_path = output_path + '.jpg'
-                        
-                    frames[0].save(image_path)
-                    print(f"Frame salvo em: {image_path}")
-                except Exception as e:
-                    print(f"Erro ao salvar frame: {e}")
-                
-                # Salvar arquivo JSON
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write(json_content)
-                
-                print(f"Classificação salva com sucesso: {output_path}")
-                return output_path
-                
-            except Exception as e:
-                is_rate_limit = "429" in str(e) or "Resource has been exhausted" in str(e)
-                if is_rate_limit and attempt < max_retries - 1:
-                    # Calcular delay baseado na tentativa
-                    if attempt < len(retry_delays):
-                        delay = retry_delays[attempt]
-                    else:
-                        # Dobrar o último delay se passar da lista pré-definida
-                        # O último da lista é 1800, então: 3600, 7200...
-                        delay = retry_delays[-1] * (2 ** (attempt - len(retry_delays) + 1))
-                    
-                    print(f"Cota de API excedida (429). Tentativa {attempt + 1}/{max_retries} falhou.")
-                    print(f"Aguardando {delay} segundos (aprox. {delay/60:.1f} minutos) antes da próxima tentativa...")
+                # Derivar nome da imagem do nome do json
+                image_path = output_path.replace('.json', '.jpg')
+                # Se não terminar com .json (caso raro), forçar extensão
+                if image_path == output_path:
+                    image_path = output_path + '.jpg'
                     
-                    # Mostrar contagem regressiva para esperas longas (> 1 min)
-                    if delay > 60:
-                        remaining = delay
-                        while remaining > 0:
-                            if remaining % 60 == 0:
-                                print(f"Aguardando... {remaining/60:.0f} minutos restantes.")
-                            time.sleep(1)
-                            remaining -= 1
-                    else:
-                        time.sleep(delay)
+                frames[0].save(image_path)
+                print(f"Frame salvo em: {image_path}")
+            except Exception as e:
+                print(f"Erro ao salvar frame: {e}")
+            
+            # Salvar arquivo JSON (já validado e normalizado)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            
+            print(f"Classificação salva com sucesso: {output_path}")
+            saved = output_path
+            return output_path
+            
+        except Exception as e:
+            self._fail(f"Erro ao classificar animais: {e}")
+            return None
+        finally:
+            if self.duplicate_index:
+                if saved:
+                    self.duplicate_index.commit(base_name, os.path.abspath(saved))
                 else:
-                    if is_rate_limit:
-                         print(f"Cota de API excedida. Máximo de tentativas ({max_retries}) atingido.")
-                    else:
-                        print(f"Erro ao classificar animais: {e}")
-                    return None
-        
-        return None 
\ No newline at end of file
+                    self.duplicate_index.discard(base_name)
+
+    def _reuse_duplicate(self, name, frame):
+        """
+        Classificação de um corte quase idêntico já classificado (ou None).
+
+        Se o corte semelhante ainda estiver em classificação em outra thread,
+        aguarda o resultado dele. Sem quase-duplicado, o vídeo fica registrado
+        no índice até o commit/discard em analyze_frame_classification.
+        """
+        index = self.duplicate_index
+        if not index:
+            return None
+        start = time.perf_counter()
+        try:
+            vector = index.embed(frame)
+            while True:
+                source, similarity, pending = index.match(name, vector)
+                if pending is None:
+                    break
+                print(f"Quase-duplicado de {pending.name} (em classificação); aguardando o resultado...")
+                pending.event.wait()
+                if pending.output:
+                    source = pending.output
+                    break
+            index.record(source is not None)
+            if source is None:
+                return None
+            with open(source, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Busca de quase-duplicados falhou, classificando normalmente: {e}")
+            return None
+        finally:
+            self._add_timing('dedup', time.perf_counter() - start)
+
+        # Aponta sempre para o vídeo originalmente classificado
+        origin = (data.get('duplicata_de') or {}).get('video')
+        if not origin:
+            origin = os.path.basename(source).replace('_classificacao.json', '')
+        data.pop('pre_triagem', None)
+        data['duplicata_de'] = {
+            'video': origin,
+            'similaridade': round(similarity, 4),
+            'metodo': index.embedder.name,
+        }
+        print(f"Quase-duplicado de {origin} (similaridade {similarity:.3f}): resultado reaproveitado, "
+              f"chamada à API evitada.")
+        return data
+
+    def _prescreen(self, frame):
+        """Pré-triagem local do frame: (dispensar API?, resumo das probabilidades ou None)."""
+        if not self.prescreen:
+            return False, None
+        start = time.perf_counter()
+        try:
+            return self.prescreen.screen(frame)
+        except Exception as e:
+            # Ex.: open-clip ausente ou falha ao baixar os pesos; segue sem pré-triagem
+            print(f"Pré-triagem indisponível, desativada para este lote: {e}")
+            self.prescreen = None
+            return False, None
+        finally:
+            self._add_timing('prescreen', time.perf_counter() - start)
+
+    def _classify(self, video_path, prompt, parts):
+        """
+        Pede a classificação e valida a resposta no esquema esperado.
+
+        Se a resposta for malformada, faz uma única retentativa de correção,
+        somente texto (sem reenviar a imagem). Retorna o dict validado ou None.
+        """
+        generation_config = CLASSIFICATION_GENERATION_CONFIG if self.structured_output else None
+        contents, context = self._build_request(prompt, parts)
+        # Só respostas que passam no esquema vão para o cache
+        valid = self._valid_classification
+        response_text = self._generate_text(contents, video_path, generation_config=generation_config,
+                                            stage='classify', context=context, validate=valid)
+        data, errors = parse_classification(response_text)
+
+        malformed = bool(errors)
+        if malformed:
+            print(f"Resposta malformada ({'; '.join(errors[:3])}). Solicitando correção...")
+            repair_contents = [build_repair_prompt(response_text, errors)]
+            data, errors = parse_classification(
+                self._generate_text(repair_contents, video_path, generation_config=generation_config,
+                                    stage='repair', validate=valid)
+            )
+
+        with self._stats_lock:
+            stats = self.classification_stats
+            stats['responses'] += 1
+            stats['malformed'] += malformed
+            stats['repaired'] += malformed and not errors
+            stats['failed'] += bool(errors)
+
+        if errors:
+            self._fail(f"Resposta de classificação inválida após correção: {'; '.join(errors[:3])}")
+            return None
+        if malformed:
+            print("Resposta corrigida com sucesso.")
+        return data
+
+    def classification_summary(self):
+        """Totais das respostas de classificação e taxa de respostas malformadas."""
+        with self._stats_lock:
+            stats = dict(self.classification_stats)
+        stats['malformed_rate'] = stats['malformed'] / stats['responses'] if stats['responses'] else 0.0
+        if self.prescreen:
+            stats['prescreen'] = self.prescreen.stats()
+        if self.duplicate_index:
+            stats['dedup'] = self.duplicate_index.stats()
+        return stats
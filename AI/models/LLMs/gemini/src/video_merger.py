@@ -1,61 +1,379 @@
 import os
 import subprocess
 import glob
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-class VideoMerger:
-    def __init__(self):
-        """Inicializa o mesclador de vídeos."""
+VIDEO_EXTENSIONS = ['*.mp4', '*.avi', '*.mov', '*.mkv']
+
+# Threads do libx264 por codificação conforme a altura do vídeo. Em vídeos
+# pequenos o ganho de mais threads é baixo, então compensa rodar mais
+# codificações em paralelo; em vídeos grandes, menos codificações com mais threads.
+THREADS_BY_HEIGHT = [(480, 2), (720, 3), (1080, 4), (1440, 6)]
+MAX_THREADS = 8
+
+# Codec da faixa de legenda por contêiner no modo soft
+SOFT_SUBTITLE_CODECS = {'.mp4': 'mov_text', '.m4v': 'mov_text', '.mov': 'mov_text', '.mkv': 'srt', '.webm': 'webvtt'}
+SUBTITLE_LANGUAGE = 'por'
+
+# Muxes simultâneos no modo soft (limitados pelo disco, não pela CPU)
+SOFT_MUX_WORKERS = 4
+
+# Intervalo (s) entre as linhas de progresso do lote
+PROGRESS_INTERVAL = 2.0
+
+
+def probe_video(video_path):
+    """Largura, altura, quantidade de frames e fps do vídeo (zeros se não for possível ler)."""
+    info = {'width': 0, 'height': 0, 'frames': 0, 'fps': 0.0}
+    try:
+        # OpenCV é importado apenas aqui: abrir o menu não depende dele
+        import cv2
+
+        cap = cv2.VideoCapture(str(video_path))
+        try:
+            if cap.isOpened():
+                info = {
+                    'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                    'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                    'frames': max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT))),
+                    'fps': float(cap.get(cv2.CAP_PROP_FPS) or 0.0),
+                }
+        finally:
+            cap.release()
+    except Exception:
         pass
-    
+    return info
+
+
+def threads_for_height(height):
+    """Threads do encoder sugeridas para a altura do vídeo."""
+    for max_height, threads in THREADS_BY_HEIGHT:
+        if height <= max_height:
+            return threads
+    return MAX_THREADS
 
-    
-    def add_subtitles_to_video(self, video_path, subtitle_path, output_path):
+
+class _BurnInProgress:
+    """Progresso das codificações em andamento, lido do `-progress` do ffmpeg."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.frames = 0
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def start(self, key, name, total_frames):
+        with self._lock:
+            self._active[key] = {'name': name, 'frame': 0, 'fps': 0.0, 'total': total_frames}
+
+    def update(self, key, values):
+        with self._lock:
+            state = self._active.get(key)
+            if state is not None:
+                state['frame'] = values.get('frame', state['frame'])
+                state['fps'] = values.get('fps', state['fps'])
+
+    def finish(self, key, frames):
+        with self._lock:
+            self._active.pop(key, None)
+            self.done += 1
+            self.frames += frames
+
+    def line(self):
+        with self._lock:
+            parts = []
+            for state in self._active.values():
+                percent = f"{100 * state['frame'] / state['total']:.0f}%" if state['total'] else f"{state['frame']} frames"
+                parts.append(f"{state['name']} {percent} ({state['fps']:.0f} fps)")
+            fps = sum(state['fps'] for state in self._active.values())
+            return f"[{self.done}/{self.total}] {fps:.0f} fps no total | " + " | ".join(parts)
+
+
+class VideoMerger:
+    def __init__(self, ffmpeg_path='ffmpeg', workers=0, threads=0, subtitle_mode='burn'):
+        """
+        Inicializa o mesclador de vídeos.
+
+        Args:
+            ffmpeg_path: Executável do FFmpeg.
+            workers: Codificações simultâneas no lote (0 = conforme núcleos e resolução).
+            threads: Threads de cada codificação (-threads; 0 = conforme núcleos e resolução).
+            subtitle_mode: 'burn' (desenha as legendas, recodificando) ou 'soft'
+                (faixa de legenda com -c copy; recorre ao burn-in se o contêiner não aceitar).
+        """
+        self.ffmpeg_path = ffmpeg_path or 'ffmpeg'
+        self.workers = workers
+        self.threads = threads
+        self.subtitle_mode = subtitle_mode if subtitle_mode in ('burn', 'soft') else 'burn'
+        self._print_lock = threading.Lock()
+
+    def _log(self, message):
+        with self._print_lock:
+            print(message)
+
+    def plan(self, heights, cores=None):
+        """
+        Codificações simultâneas e threads por codificação para um lote.
+
+        Sem configuração, as threads vêm da resolução típica (mediana) dos
+        vídeos e o número de codificações preenche os núcleos.
+
+        Returns:
+            (workers, threads)
+        """
+        cores = cores or os.cpu_count() or 1
+        heights = sorted(h for h in heights if h) or [0]
+        if self.threads:
+            threads = self.threads
+        elif self.workers:
+            threads = max(1, cores // self.workers)
+        else:
+            threads = min(cores, threads_for_height(heights[len(heights) // 2]))
+        workers = self.workers or max(1, cores // threads)
+        return workers, threads
+
+    def add_subtitles_to_video(self, video_path, subtitle_path, output_path, threads=None, on_progress=None,
+                               mode=None):
         """
         Adiciona legendas a um vídeo usando FFmpeg.
-        
+
         Args:
             video_path: Caminho para o vídeo
             subtitle_path: Caminho para o arquivo de legendas (.srt)
             output_path: Caminho para o vídeo de saída com legendas
+            threads: Threads do encoder (-threads); None usa o plano de um único vídeo
+            on_progress: Função chamada com os valores do `-progress` (frame, fps, progress)
+            mode: 'burn' (legenda desenhada no vídeo, recodifica) ou 'soft' (faixa de
+                legenda, sem recodificar); None usa o modo do mesclador
+
+        Returns:
+            Caminho do vídeo gerado (no modo soft pode ser um .mkv ao lado de
+            output_path, se o contêiner pedido não aceitar a faixa) ou False.
         """
         try:
             if not os.path.exists(video_path):
                 print(f"Vídeo não encontrado: {video_path}")
                 return False
-            
+
             if not os.path.exists(subtitle_path):
                 print(f"Arquivo de legendas não encontrado: {subtitle_path}")
                 return False
-            
-            # Comando FFmpeg para adicionar legendas
+
+            if (mode or self.subtitle_mode) == 'soft':
+                written = self._mux_subtitles(video_path, subtitle_path, output_path, on_progress)
+                if written:
+                    return written
+                self._log(f"Faixa de legenda não suportada para {os.path.basename(video_path)}; "
+                          f"incorporando no vídeo (burn-in)")
+
+            return self._burn_in(video_path, subtitle_path, output_path, threads, on_progress)
+
+        except Exception as e:
+            self._log(f"Erro durante a adição de legendas: {e}")
+            return False
+
+    def _burn_in(self, video_path, subtitle_path, output_path, threads, on_progress):
+        """Desenha as legendas nos frames (filtro subtitles), recodificando o vídeo."""
+        if threads is None:
+            _, threads = self.plan([probe_video(video_path)['height']])
+
+        # Comando FFmpeg para adicionar legendas
+        cmd = [
+            self.ffmpeg_path,
+            '-nostats',
+            '-i', video_path,
+            '-vf', f'subtitles={subtitle_path}',
+            '-c:a', 'copy',
+            '-threads', str(threads),
+            '-progress', 'pipe:1',
+            output_path,
+            '-y'
+        ]
+
+        self._log(f"Adicionando legendas ao vídeo: {os.path.basename(video_path)} ({threads} threads)")
+        result = self._run_ffmpeg(cmd, on_progress)
+
+        if result['returncode'] == 0:
+            self._log(f"Legendas adicionadas com sucesso: {output_path}")
+            return output_path
+        else:
+            self._log(f"Erro ao adicionar legendas: {result['stderr']}")
+            return False
+
+    def _mux_subtitles(self, video_path, subtitle_path, output_path, on_progress):
+        """
+        Adiciona o .srt como faixa de legenda, copiando vídeo e áudio (-c:v/-c:a copy).
+
+        Tenta o contêiner de output_path (mov_text em MP4/MOV, WebVTT em WebM)
+        e, se ele não aceitar a faixa ou os codecs copiados, um .mkv ao lado.
+
+        Returns:
+            Caminho gerado ou None.
+        """
+        targets = []
+        if Path(output_path).suffix.lower() in SOFT_SUBTITLE_CODECS:
+            targets.append(str(output_path))
+        if Path(output_path).suffix.lower() != '.mkv':
+            targets.append(str(Path(output_path).with_suffix('.mkv')))
+
+        for target in targets:
             cmd = [
-                'ffmpeg',
+                self.ffmpeg_path,
+                '-v', 'error',
+                '-nostats',
                 '-i', video_path,
-                '-vf', f'subtitles={subtitle_path}',
-                '-c:a', 'copy',
-                output_path,
+                '-i', subtitle_path,
+                '-map', '0:v', '-map', '0:a?', '-map', '1:0',
+                '-c:v', 'copy', '-c:a', 'copy',
+                '-c:s', SOFT_SUBTITLE_CODECS[Path(target).suffix.lower()],
+                '-metadata:s:s:0', f'language={SUBTITLE_LANGUAGE}',
+                '-disposition:s:0', 'default',
+                '-progress', 'pipe:1',
+                target,
                 '-y'
             ]
-            
-            print(f"Adicionando legendas ao vídeo: {os.path.basename(video_path)}")
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print(f"Legendas adicionadas com sucesso: {output_path}")
-                return True
-            else:
-                print(f"Erro ao adicionar legendas: {result.stderr}")
-                return False
-                
-        except Exception as e:
-            print(f"Erro durante a adição de legendas: {e}")
-            return False
-    
+            self._log(f"Adicionando faixa de legenda ao vídeo: {os.path.basename(video_path)} "
+                      f"({Path(target).suffix[1:]}, sem recodificar)")
+            result = self._run_ffmpeg(cmd, on_progress)
+            if result['returncode'] == 0:
+                self._log(f"Legendas adicionadas com sucesso: {target}")
+                return target
+            reason = result['stderr'].splitlines()[0] if result['stderr'] else ''
+            self._log(f"Contêiner {Path(target).suffix} não aceitou a faixa de legenda: {reason}")
+            if os.path.exists(target):
+                os.remove(target)
+        return None
+
+    def _run_ffmpeg(self, cmd, on_progress=None):
+        """
+        Executa o ffmpeg lendo o `-progress pipe:1` (blocos chave=valor
+        terminados em progress=continue/end) a cada atualização.
+
+        Returns:
+            dict com returncode, stderr (últimas linhas), frames e fps finais.
+        """
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL,
+                                   text=True, errors='replace')
+        # stderr é drenado em paralelo para o ffmpeg não travar com o pipe cheio
+        stderr_tail = deque(maxlen=40)
+        drain = threading.Thread(target=lambda: stderr_tail.extend(process.stderr), daemon=True)
+        drain.start()
+
+        values = {'frame': 0, 'fps': 0.0}
+        for line in process.stdout:
+            key, _, value = line.strip().partition('=')
+            if key == 'frame':
+                values['frame'] = int(value or 0)
+            elif key == 'fps':
+                try:
+                    values['fps'] = float(value)
+                except ValueError:
+                    pass
+            elif key == 'progress':
+                if on_progress:
+                    on_progress(dict(values, progress=value))
+        process.wait()
+        drain.join()
+        return {'returncode': process.returncode, 'stderr': ''.join(stderr_tail).strip(), **values}
+
+    def burn_in_many(self, jobs, on_done=None):
+        """
+        Incorpora legendas em vários vídeos com um pool de codificações simultâneas.
+
+        Args:
+            jobs: Lista de (vídeo, legenda .srt, saída).
+            on_done: Função chamada com (job, sucesso) ao fim de cada vídeo.
+
+        Returns:
+            dict com 'succeeded', 'failed' (lista de (nome, erro)), 'elapsed',
+            'frames', 'fps' (frames processados / tempo total), 'workers', 'threads'
+            (None no modo soft) e 'outputs' (vídeo de entrada -> vídeo gerado).
+        """
+        jobs = [tuple(str(p) for p in job) for job in jobs]
+        infos = {job[0]: probe_video(job[0]) for job in jobs}
+        if self.subtitle_mode == 'soft':
+            # Sem recodificação o custo é E/S: alguns muxes simultâneos, threads não se aplicam
+            # (um eventual burn-in de fallback planeja as próprias threads)
+            workers, threads = max(1, min(len(jobs), self.workers or SOFT_MUX_WORKERS)), None
+            self._log(f"Adicionando faixas de legenda em {len(jobs)} vídeos (sem recodificar): "
+                      f"{workers} simultâneos")
+        else:
+            workers, threads = self.plan([info['height'] for info in infos.values()])
+            if workers > len(jobs):
+                # Poucos vídeos: menos codificações, cada uma com mais threads
+                workers = max(1, len(jobs))
+                if not self.threads:
+                    threads = max(threads, min(MAX_THREADS, (os.cpu_count() or 1) // workers))
+            self._log(f"Incorporando legendas em {len(jobs)} vídeos: {workers} codificações simultâneas, "
+                      f"{threads} threads cada ({os.cpu_count() or 1} núcleos)")
+
+        progress = _BurnInProgress(len(jobs))
+        succeeded, failed, outputs = [], [], {}
+        stop = threading.Event()
+
+        def report():
+            while not stop.wait(PROGRESS_INTERVAL):
+                self._log(progress.line())
+
+        def burn(key, job):
+            video, subtitle, output = job
+            progress.start(key, os.path.basename(video), infos[video]['frames'])
+            frames = {'frame': 0}
+
+            def on_progress(values):
+                frames['frame'] = values['frame']
+                progress.update(key, values)
+
+            ok = False
+            try:
+                ok = self.add_subtitles_to_video(video, subtitle, output, threads=threads,
+                                                 on_progress=on_progress)
+                return ok
+            finally:
+                # Com -c copy o ffmpeg não informa frames: contam os do vídeo copiado
+                progress.finish(key, frames['frame'] or (infos[video]['frames'] if ok else 0))
+
+        start = time.perf_counter()
+        reporter = threading.Thread(target=report, daemon=True)
+        reporter.start()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(burn, key, job): job for key, job in enumerate(jobs)}
+                for future in as_completed(futures):
+                    job = futures[future]
+                    name = os.path.basename(job[0])
+                    try:
+                        ok = future.result()
+                        error = None if ok else "falha ao adicionar legendas (ffmpeg)"
+                    except Exception as e:
+                        ok, error = False, str(e)
+                    if ok:
+                        succeeded.append(name)
+                        outputs[job[0]] = ok
+                    else:
+                        failed.append((name, error))
+                    if on_done:
+                        on_done(job, ok)
+        finally:
+            stop.set()
+            reporter.join()
+
+        elapsed = time.perf_counter() - start
+        fps = progress.frames / elapsed if elapsed > 0 else 0.0
+        self._log(f"Incorporação concluída: {len(succeeded)}/{len(jobs)} vídeos, {progress.frames} frames "
+                  f"em {elapsed:.1f}s ({fps:.0f} fps no total)")
+        return {'succeeded': succeeded, 'failed': failed, 'elapsed': elapsed, 'frames': progress.frames,
+                'fps': fps, 'workers': workers, 'threads': threads, 'outputs': outputs}
+
     def process_videos_with_subtitles(self, video_dir, subtitle_dir, output_dir):
         """
         Processa todos os vídeos em um diretório, adicionando legendas correspondentes.
-        
+
         Args:
             video_dir: Diretório contendo os vídeos
             subtitle_dir: Diretório contendo as legendas
@@ -64,31 +382,30 @@ class VideoMerger:
         try:
             # Criar diretório de saída se não existir
             os.makedirs(output_dir, exist_ok=True)
-            
+
             # Encontrar vídeos
             video_files = []
-            for ext in ['*.mp4', '*.avi', '*.mov', '*.mkv']:
+            for ext in VIDEO_EXTENSIONS:
                 video_files.extend(glob.glob(os.path.join(video_dir, ext)))
-            
+
             if not video_files:
                 print(f"Nenhum vídeo encontrado em {video_dir}")
                 return False
-            
-            success_count = 0
-            for video_file in video_files:
-                video_name = os.path.splitext(os.path.basename(video_file))[0]
+
+            jobs = []
+            for video_file in sorted(video_files):
+                video_name = Path(video_file).stem
                 subtitle_file = os.path.join(subtitle_dir, f"{video_name}_legendas.srt")
-                
+
                 if os.path.exists(subtitle_file):
-                    output_file = os.path.join(output_dir, f"{video_name}_com_legendas.mp4")
-                    if self.add_subtitles_to_video(video_file, subtitle_file, output_file):
-                        success_count += 1
+                    jobs.append((video_file, subtitle_file, os.path.join(output_dir, f"{video_name}_com_legendas.mp4")))
                 else:
                     print(f"Legendas não encontradas para: {video_name}")
-            
+
+            success_count = len(self.burn_in_many(jobs)['succeeded']) if jobs else 0
             print(f"Processamento concluído: {success_count}/{len(video_files)} vídeos processados")
             return success_count > 0
-            
+
         except Exception as e:
             print(f"Erro durante o processamento: {e}")
-            return False 
\ No newline at end of file
+            return False
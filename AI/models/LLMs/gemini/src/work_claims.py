@@ -0,0 +1,388 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+CLAIM = '.claim'
+DONE = '.done'
+FAILED = '.failed'
+RECLAIM = '.reclaim'
+
+# Trava de recuperação (criada e removida em milissegundos); mais antiga que isso é resto de uma queda
+RECLAIM_LOCK_SECONDS = 60
+
+
+class WorkClaims:
+    """
+    Distribuição de vídeos entre várias máquinas por um sistema de arquivos compartilhado.
+
+    Cada nó reivindica um vídeo criando `<nome>.claim` com O_CREAT|O_EXCL no
+    diretório de claims (atômico também em NFSv3+/SMB): apenas um nó consegue
+    criar o arquivo. O dono renova o lease atualizando o mtime do claim
+    (heartbeat); um claim sem renovação há mais de `lease_seconds` é de um nó
+    que caiu e pode ser recuperado por outro. Ao concluir, o nó grava
+    `<nome>.done`; falhas ficam em `<nome>.failed` com o número de tentativas.
+
+    Não há coordenador: o progresso é lido diretamente desses arquivos. Os
+    relógios dos nós devem estar sincronizados (NTP) bem abaixo do lease.
+    """
+
+    def __init__(self, claims_dir, node_id=None, lease_seconds=600, max_attempts=3):
+        os.makedirs(claims_dir, exist_ok=True)
+        self.claims_dir = claims_dir
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        self._held = {}            # nome -> token do claim
+        self._queue = []
+        self._cursor = 0
+        self._pass_claims = 0
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    # ------------------------------------------------------------------ arquivos
+
+    def _path(self, name, suffix):
+        return os.path.join(self.claims_dir, name + suffix)
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path, data):
+        """Grava via arquivo temporário + rename, para nunca expor JSON pela metade."""
+        tmp = f"{path}.{self.node_id}.{uuid.uuid4().hex[:6]}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _create_claim(self, name):
+        token = uuid.uuid4().hex
+        try:
+            fd = os.open(self._path(name, CLAIM), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'node': self.node_id, 'token': token, 'claimed': time.time()}, f)
+        return token
+
+    def _age(self, path):
+        try:
+            return time.time() - os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _try_reclaim(self, name):
+        """Recupera um claim expirado; a trava .reclaim garante um único nó por vez."""
+        lock_path = self._path(name, RECLAIM)
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            age = self._age(lock_path)
+            if age is not None and age > RECLAIM_LOCK_SECONDS:
+                self._remove(lock_path)
+            return None
+        os.close(fd)
+        try:
+            # Confere de novo sob a trava: o dono pode ter renovado nesse meio tempo
+            age = self._age(self._path(name, CLAIM))
+            if age is None or age <= self.lease_seconds:
+                return None
+            previous = self._read_json(self._path(name, CLAIM)) or {}
+            self._remove(self._path(name, CLAIM))
+            token = self._create_claim(name)
+            if token:
+                print(f"[claims] Claim expirado de {previous.get('node', '?')} recuperado: {name}")
+            return token
+        finally:
+            self._remove(lock_path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    # ------------------------------------------------------------------ API
+
+    def is_done(self, name):
+        return os.path.exists(self._path(name, DONE))
+
+    def _exhausted(self, name):
+        failed = self._read_json(self._path(name, FAILED))
+        return bool(failed and self.max_attempts and failed.get('attempts', 0) >= self.max_attempts)
+
+    def claim(self, name):
+        """Tenta reivindicar um vídeo (pelo nome do arquivo). Retorna True se este nó ficou com ele."""
+        if self.is_done(name) or self._exhausted(name):
+            return False
+        token = self._create_claim(name)
+        if token is None:
+            age = self._age(self._path(name, CLAIM))
+            if age is not None and age > self.lease_seconds:
+                token = self._try_reclaim(name)
+        if token is None:
+            return False
+        # Concluído por outro nó entre a verificação e o claim
+        if self.is_done(name):
+            self._remove(self._path(name, CLAIM))
+            return False
+        with self._lock:
+            self._held[name] = token
+        self._ensure_heartbeat()
+        return True
+
+    def owns(self, name):
+        """Confere se o claim no disco ainda é deste nó (não foi recuperado por outro)."""
+        with self._lock:
+            token = self._held.get(name)
+        data = self._read_json(self._path(name, CLAIM))
+        return bool(token and data and data.get('token') == token)
+
+    def complete(self, name, output=None):
+        """Marca o vídeo como concluído e libera o claim."""
+        if not self.owns(name):
+            print(f"[claims] Aviso: o lease de {name} expirou e foi recuperado por outro nó; "
+                  f"o resultado pode ter sido processado duas vezes.")
+        self._write_json(self._path(name, DONE), {
+            'node': self.node_id, 'finished': time.time(), 'output': str(output) if output else None,
+        })
+        self._release(name)
+
+    def fail(self, name, error):
+        """Registra a falha (tentativas acumuladas entre todos os nós) e libera o claim."""
+        failed = self._read_json(self._path(name, FAILED)) or {}
+        self._write_json(self._path(name, FAILED), {
+            'node': self.node_id,
+            'attempts': failed.get('attempts', 0) + 1,
+            'last_error': str(error)[:2000] if error else None,
+            'finished': time.time(),
+        })
+        self._release(name)
+
+    def _release(self, name):
+        if self.owns(name):
+            self._remove(self._path(name, CLAIM))
+        with self._lock:
+            self._held.pop(name, None)
+
+    # ------------------------------------------------------------------ fila
+
+    def reset_queue(self, names):
+        """
+        Define os vídeos que este nó vai percorrer. Cada nó começa em um ponto
+        diferente da lista (pelo node_id), reduzindo a disputa pelos mesmos claims.
+        """
+        names = sorted(names)
+        done = {entry[:-len(DONE)] for entry in os.listdir(self.claims_dir) if entry.endswith(DONE)}
+        names = [n for n in names if n not in done]
+        if names:
+            offset = int(uuid.uuid5(uuid.NAMESPACE_DNS, self.node_id).hex[:8], 16) % len(names)
+            names = names[offset:] + names[:offset]
+        with self._lock:
+            self._queue = names
+            self._cursor = 0
+            self._pass_claims = 0
+        self._stop.clear()
+
+    def next_claim(self):
+        """
+        Reivindica o próximo vídeo disponível da fila (seguro entre threads).
+        Após percorrer a fila, faz novas passadas pelos vídeos ainda não
+        concluídos: os que estão com outros nós são aguardados até terminarem
+        ou terem o lease expirado (e então recuperados). Retorna o nome ou None
+        quando não há mais nada a fazer.
+        """
+        while True:
+            idle = False
+            with self._lock:
+                if self._cursor >= len(self._queue):
+                    remaining = [n for n in self._queue
+                                 if n not in self._held and not self.is_done(n) and not self._exhausted(n)]
+                    if not remaining:
+                        return None
+                    # Nenhum claim na última passada: tudo está com outros nós
+                    idle = not self._pass_claims
+                    self._queue = remaining
+                    self._cursor = 0
+                    self._pass_claims = 0
+                name = self._queue[self._cursor]
+                self._cursor += 1
+            if idle and self._stop.wait(min(5.0, self.lease_seconds / 4)):
+                return None
+            if self.claim(name):
+                with self._lock:
+                    self._pass_claims += 1
+                return name
+
+    def run(self, items_by_name, func, workers=4, error_for=None):
+        """
+        Processa os itens com `workers` threads, cada uma reivindicando o próximo
+        vídeo livre até não restar nenhum. `func(item)` retorna a saída (falso =
+        falha) ou levanta exceção; `error_for(item)` descreve a falha.
+
+        Returns:
+            dict com 'succeeded', 'failed' (lista de (nome, erro)) e 'elapsed',
+            como o BatchExecutor (apenas os vídeos processados por este nó).
+        """
+        self.reset_queue(items_by_name)
+        succeeded, failed = [], []
+        results_lock = threading.Lock()
+
+        def worker():
+            while True:
+                name = self.next_claim()
+                if name is None:
+                    return
+                item = items_by_name[name]
+                try:
+                    output = func(item)
+                    error = None if output else (error_for(item) if error_for else None) or "falha no processamento"
+                except Exception as e:
+                    output, error = None, str(e)
+                if error:
+                    self.fail(name, error)
+                else:
+                    self.complete(name, output)
+                with results_lock:
+                    if error:
+                        failed.append((name, error))
+                    else:
+                        succeeded.append(name)
+                    done = len(succeeded) + len(failed)
+                print(f"[{self.node_id}] {done} processados neste nó: "
+                      f"{'Falhou' if error else 'Concluído'}: {name}")
+
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                try:
+                    for future in [pool.submit(worker) for _ in range(max(1, workers))]:
+                        future.result()
+                except BaseException:
+                    # Ctrl-C: threads ociosas param de aguardar os outros nós
+                    self._stop.set()
+                    raise
+        finally:
+            self.close()
+        return {'succeeded': succeeded, 'failed': failed, 'elapsed': time.perf_counter() - start}
+
+    # ------------------------------------------------------------------ heartbeat
+
+    def _ensure_heartbeat(self):
+        with self._lock:
+            if self._heartbeat and self._heartbeat.is_alive():
+                return
+            self._stop.clear()
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+            self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            with self._lock:
+                held = list(self._held)
+            for name in held:
+                if self.owns(name):
+                    try:
+                        os.utime(self._path(name, CLAIM))
+                    except FileNotFoundError:
+                        pass
+
+    def close(self):
+        """Para o heartbeat e libera os claims ainda mantidos (ex.: Ctrl-C)."""
+        self._stop.set()
+        with self._lock:
+            held = list(self._held)
+        for name in held:
+            self._release(name)
+
+    # ------------------------------------------------------------------ progresso
+
+    def progress(self, names=None, window_seconds=600):
+        """
+        Situação do lote lida dos arquivos de claim, sem coordenador.
+
+        Returns:
+            dict com total, done, running, stale, failed, pending, rate (vídeos/min
+            na janela recente), eta (s) e por nó (done/running/last_seen).
+        """
+        now = time.time()
+        entries = os.listdir(self.claims_dir)
+        by_suffix = {CLAIM: set(), DONE: set(), FAILED: set()}
+        for entry in entries:
+            for suffix in by_suffix:
+                if entry.endswith(suffix):
+                    by_suffix[suffix].add(entry[:-len(suffix)])
+        names = set(names) if names is not None else set().union(*by_suffix.values())
+
+        nodes = {}
+        done = by_suffix[DONE] & names
+        recent = 0
+        for name in done:
+            data = self._read_json(self._path(name, DONE)) or {}
+            node = nodes.setdefault(data.get('node', '?'), {'done': 0, 'running': 0, 'last_seen': 0})
+            node['done'] += 1
+            finished = data.get('finished') or 0
+            node['last_seen'] = max(node['last_seen'], finished)
+            if now - finished <= window_seconds:
+                recent += 1
+
+        running = stale = 0
+        for name in (by_suffix[CLAIM] & names) - done:
+            age = self._age(self._path(name, CLAIM))
+            if age is None:
+                continue
+            if age > self.lease_seconds:
+                stale += 1
+                continue
+            running += 1
+            data = self._read_json(self._path(name, CLAIM)) or {}
+            node = nodes.setdefault(data.get('node', '?'), {'done': 0, 'running': 0, 'last_seen': 0})
+            node['running'] += 1
+            node['last_seen'] = max(node['last_seen'], now - age)
+
+        failed = 0
+        for name in (by_suffix[FAILED] & names) - done:
+            data = self._read_json(self._path(name, FAILED)) or {}
+            if self.max_attempts and data.get('attempts', 0) >= self.max_attempts:
+                failed += 1
+
+        total = len(names)
+        pending = total - len(done) - running - failed
+        rate = recent / (window_seconds / 60)
+        return {
+            'total': total,
+            'done': len(done),
+            'running': running,
+            'stale': stale,
+            'failed': failed,
+            'pending': pending,
+            'rate': rate,
+            'eta': pending / rate * 60 if rate > 0 else None,
+            'nodes': nodes,
+        }
+
+    @staticmethod
+    def print_progress(progress):
+        """Exibe o progresso geral e por nó."""
+        eta = f"{progress['eta'] / 60:.0f} min" if progress['eta'] is not None else "-"
+        print(f"\n=== Progresso distribuído: {progress['done']}/{progress['total']} concluídos ===")
+        print(f"Em execução: {progress['running']} | Expirados: {progress['stale']} | "
+              f"Falhas definitivas: {progress['failed']} | Pendentes: {progress['pending']}")
+        print(f"Vazão recente: {progress['rate']:.1f} vídeos/min | Estimativa para terminar: {eta}")
+        if progress['nodes']:
+            print(f"{'nó':<32} {'concluídos':>10} {'em execução':>12} {'última atividade':>17}")
+            for node, s in sorted(progress['nodes'].items()):
+                last = time.strftime('%H:%M:%S', time.localtime(s['last_seen'])) if s['last_seen'] else '-'
+                print(f"{node:<32} {s['done']:>10} {s['running']:>12} {last:>17}")
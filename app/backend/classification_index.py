@@ -0,0 +1,313 @@
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from models import ClassifiedAnimal, ClassifiedClip
+
+
+RESULT_SUFFIX = "_classificacao.json"
+
+# Resultados da ferramenta de classificação (AI/models/LLMs/gemini/results)
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parents[2] / "AI" / "models" / "LLMs" / "gemini" / "results"
+
+# Cortes de um mesmo vídeo: vid0003_cut_001 ... vid0003_cut_005
+CUT_SUFFIX = re.compile(r"_cut_\d+$")
+
+# Separadores de vários sinais clínicos em um mesmo campo ("Magro; tosse")
+SIGN_SEPARATORS = re.compile(r"[;,]")
+
+# Campos com índice invertido (filtros da API)
+INDEXED_FIELDS = ("classe", "sexo", "sinais_clinicos", "video", "grupo")
+
+
+def _normalize(value) -> str:
+    return str(value or "").strip().lower()
+
+
+def _signs(value) -> List[str]:
+    """Sinais clínicos de um campo de texto, separados por ',' ou ';'"""
+    return [sign.strip() for sign in SIGN_SEPARATORS.split(str(value or "")) if sign.strip()]
+
+
+@dataclass
+class _ResultFile:
+    """Um *_classificacao.json já carregado"""
+    stamp: Tuple[int, int]  # (mtime_ns, tamanho)
+    clip: Optional[ClassifiedClip]
+    handles: List[int] = field(default_factory=list)
+
+
+class ClassificationIndex:
+    """
+    Índice em memória dos resultados de classificação (JSON + frame .jpg).
+
+    Cada animal recebe um handle inteiro e é registrado em índices invertidos
+    (valor normalizado -> conjunto de handles) por classe, sexo, sinal
+    clínico, vídeo e vídeo de origem. Um filtro é a interseção dos conjuntos
+    de cada campo (união entre os valores de um mesmo campo), começando pelo
+    menor, então o custo depende dos resultados e não do total de animais.
+
+    refresh() compara mtime e tamanho dos arquivos com a última leitura e só
+    relê os JSONs novos ou alterados; os removidos saem dos índices.
+    """
+
+    def __init__(self, results_dir: str | Path = DEFAULT_RESULTS_DIR):
+        self.results_dir = Path(results_dir)
+        self._lock = threading.RLock()
+        self._files: Dict[str, _ResultFile] = {}
+        self._animals: Dict[int, ClassifiedAnimal] = {}
+        self._order: Dict[int, Tuple[str, int]] = {}
+        self._index: Dict[str, Dict[str, Set[int]]] = {name: {} for name in INDEXED_FIELDS}
+        self._labels: Dict[str, Dict[str, str]] = {name: {} for name in INDEXED_FIELDS}
+        # Nome do corte ou do vídeo de origem (normalizado) -> clipes, inclusive sem animais
+        self._clips_by_video: Dict[str, Set[str]] = {}
+        # Ordem completa em cache (consultas sem filtro), invalidada a cada mudança
+        self._sorted_handles: Optional[List[int]] = None
+        self._sorted_clips: Optional[List[str]] = None
+        self._next_handle = 0
+
+    # --- Carga incremental ---
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        if not self.results_dir.is_dir():
+            return {}
+        files = {}
+        with os.scandir(self.results_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(RESULT_SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def refresh(self) -> Dict[str, int]:
+        """Relê os JSONs novos ou alterados e remove os apagados"""
+        current = self._scan()
+        with self._lock:
+            known = {name: loaded.stamp for name, loaded in self._files.items()}
+        changed = [name for name, stamp in current.items() if known.get(name) != stamp]
+        removed = [name for name in known if name not in current]
+
+        # Leitura fora do lock: consultas continuam atendidas durante a carga
+        parsed = {name: self._parse(name) for name in changed}
+
+        with self._lock:
+            for name in removed + changed:
+                if name in self._files:
+                    self._unregister(self._files.pop(name))
+            for name in changed:
+                clip, animals = parsed[name]
+                loaded = _ResultFile(stamp=current[name], clip=clip)
+                if clip:
+                    for key in {_normalize(clip.video), _normalize(clip.group)}:
+                        self._clips_by_video.setdefault(key, set()).add(clip.video)
+                    for seq, animal in enumerate(animals):
+                        loaded.handles.append(self._register(animal, seq))
+                self._files[name] = loaded
+            if changed or removed:
+                self._sorted_handles = None
+                self._sorted_clips = None
+
+        return {
+            "new": sum(1 for name in changed if name not in known),
+            "changed": sum(1 for name in changed if name in known),
+            "removed": len(removed),
+        }
+
+    def _frame_url(self, video: str) -> Optional[str]:
+        if (self.results_dir / f"{video}_classificacao.jpg").exists():
+            return f"/api/classifications/frames/{video}"
+        return None
+
+    def _parse(self, name: str) -> Tuple[Optional[ClassifiedClip], List[ClassifiedAnimal]]:
+        try:
+            with open(self.results_dir / name, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # Arquivo ainda sendo gravado ou inválido: relido quando mudar
+            return None, []
+        # JSON válido com outro formato (ex.: lista) também é ignorado até mudar
+        if not isinstance(data, dict):
+            return None, []
+        totals = data.get("contagem_total") or {}
+        identified = data.get("animais_identificados") or []
+        duplicate = data.get("duplicata_de") or {}
+        if not isinstance(totals, dict) or not isinstance(identified, list):
+            return None, []
+
+        video = name[:-len(RESULT_SUFFIX)]
+        group = CUT_SUFFIX.sub("", video)
+        frame_url = self._frame_url(video)
+        counts = {str(k): int(v or 0) for k, v in totals.items()
+                  if isinstance(v, (int, float))}
+        animals = [
+            ClassifiedAnimal(
+                key=f"{video}:{seq}",
+                video=video,
+                group=group,
+                animalId=str(animal.get("id", seq + 1)),
+                classe=str(animal.get("classe") or ""),
+                sexo=str(animal.get("sexo") or ""),
+                sinaisClinicos=str(animal.get("sinais_clinicos") or ""),
+                comportamento=str(animal.get("comportamento") or ""),
+                descricao=str(animal.get("descricao_animal") or ""),
+                frameUrl=frame_url,
+            )
+            for seq, animal in enumerate(identified)
+            if isinstance(animal, dict)
+        ]
+        clip = ClassifiedClip(
+            video=video,
+            group=group,
+            descricaoAmbiente=str(data.get("descricao_ambiente") or ""),
+            contagemTotal=counts,
+            totalAnimais=sum(counts.values()),
+            animaisIdentificados=len(animals),
+            duplicataDe=str(duplicate["video"]) if isinstance(duplicate, dict) and duplicate.get("video") else None,
+            frameUrl=frame_url,
+        )
+        return clip, animals
+
+    def _keys(self, animal: ClassifiedAnimal) -> Iterable[Tuple[str, str]]:
+        yield "classe", animal.classe
+        yield "sexo", animal.sexo
+        for sign in _signs(animal.sinaisClinicos):
+            yield "sinais_clinicos", sign
+        yield "video", animal.video
+        yield "grupo", animal.group
+
+    def _register(self, animal: ClassifiedAnimal, seq: int) -> int:
+        handle = self._next_handle
+        self._next_handle += 1
+        self._animals[handle] = animal
+        self._order[handle] = (animal.video, seq)
+        for name, value in self._keys(animal):
+            key = _normalize(value)
+            if key:
+                self._index[name].setdefault(key, set()).add(handle)
+                self._labels[name].setdefault(key, value.strip())
+        return handle
+
+    def _unregister(self, loaded: _ResultFile):
+        if loaded.clip:
+            for key in {_normalize(loaded.clip.video), _normalize(loaded.clip.group)}:
+                videos = self._clips_by_video.get(key)
+                if videos is not None:
+                    videos.discard(loaded.clip.video)
+                    if not videos:
+                        del self._clips_by_video[key]
+        for handle in loaded.handles:
+            animal = self._animals.pop(handle)
+            del self._order[handle]
+            for name, value in self._keys(animal):
+                key = _normalize(value)
+                postings = self._index[name].get(key)
+                if postings is None:
+                    continue
+                postings.discard(handle)
+                if not postings:
+                    del self._index[name][key]
+                    self._labels[name].pop(key, None)
+
+    # --- Consultas ---
+
+    def _match(self, filters: Dict[str, Optional[List[str]]]) -> Optional[Set[int]]:
+        """Handles que atendem aos filtros (None = sem filtro de animal)"""
+        sets = []
+        for name, values in filters.items():
+            if not values:
+                continue
+            postings: Set[int] = set()
+            for value in values:
+                postings |= self._index[name].get(_normalize(value), set())
+            sets.append(postings)
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = set(sets[0])
+        for postings in sets[1:]:
+            result &= postings
+            if not result:
+                break
+        return result
+
+    def _videos(self, video: Optional[List[str]]) -> Optional[Set[str]]:
+        """Clipes pedidos pelo nome do corte ou do vídeo de origem (None = sem filtro)"""
+        if not video:
+            return None
+        videos: Set[str] = set()
+        for value in video:
+            videos |= self._clips_by_video.get(_normalize(value), set())
+        return videos
+
+    def query_animals(self, classe: Optional[List[str]] = None, sexo: Optional[List[str]] = None,
+                      sinal: Optional[List[str]] = None, video: Optional[List[str]] = None,
+                      offset: int = 0, limit: int = 50) -> Tuple[int, List[ClassifiedAnimal]]:
+        """Animais filtrados, ordenados por vídeo e ordem no JSON"""
+        with self._lock:
+            videos = self._videos(video)
+            if videos is not None and not videos:
+                return 0, []
+            handles = self._match({"classe": classe, "sexo": sexo, "sinais_clinicos": sinal,
+                                   "video": sorted(videos) if videos else None})
+            if handles is None:
+                if self._sorted_handles is None:
+                    self._sorted_handles = sorted(self._animals, key=self._order.__getitem__)
+                ordered = self._sorted_handles
+            else:
+                ordered = sorted(handles, key=self._order.__getitem__)
+            return len(ordered), [self._animals[h] for h in ordered[offset:offset + limit]]
+
+    def query_clips(self, classe: Optional[List[str]] = None, sexo: Optional[List[str]] = None,
+                    sinal: Optional[List[str]] = None, video: Optional[List[str]] = None,
+                    offset: int = 0, limit: int = 50) -> Tuple[int, List[ClassifiedClip]]:
+        """
+        Clipes com ao menos um animal que atende aos filtros de animal; sem
+        esses filtros, todos os clipes (inclusive sem animais) do vídeo pedido.
+        """
+        with self._lock:
+            handles = self._match({"classe": classe, "sexo": sexo, "sinais_clinicos": sinal})
+            videos = self._videos(video)
+            if handles is not None:
+                matched = {self._animals[h].video for h in handles}
+                videos = matched if videos is None else videos & matched
+            if videos is None:
+                if self._sorted_clips is None:
+                    self._sorted_clips = sorted(loaded.clip.video for loaded in self._files.values() if loaded.clip)
+                ordered = self._sorted_clips
+            else:
+                ordered = sorted(videos)
+            return len(ordered), [self._files[f"{name}{RESULT_SUFFIX}"].clip for name in ordered[offset:offset + limit]]
+
+    def get_clip(self, video: str) -> Optional[ClassifiedClip]:
+        with self._lock:
+            loaded = self._files.get(f"{video}{RESULT_SUFFIX}")
+            return loaded.clip if loaded else None
+
+    def clip_animals(self, video: str) -> List[ClassifiedAnimal]:
+        with self._lock:
+            loaded = self._files.get(f"{video}{RESULT_SUFFIX}")
+            return [self._animals[h] for h in loaded.handles] if loaded else []
+
+    def frame_path(self, video: str) -> Optional[Path]:
+        """Frame salvo de um clipe indexado (o nome nunca vira caminho sem estar no índice)"""
+        if self.get_clip(video) is None:
+            return None
+        path = self.results_dir / f"{video}_classificacao.jpg"
+        return path if path.exists() else None
+
+    def facets(self) -> Dict[str, Dict[str, int]]:
+        """Quantidade de animais por valor de cada campo filtrável"""
+        with self._lock:
+            return {
+                name: {self._labels[name][key]: len(postings) for key, postings in sorted(self._index[name].items())}
+                for name in ("classe", "sexo", "sinais_clinicos", "grupo")
+            }
+
+    def counts(self) -> Tuple[int, int]:
+        """(clipes, animais) indexados"""
+        with self._lock:
+            return sum(1 for loaded in self._files.values() if loaded.clip), len(self._animals)
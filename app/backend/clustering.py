@@ -0,0 +1,138 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from models import Animal, AnimalStatus, Location, MapCluster
+
+
+# Nível mais fino da grade (aprox. 20 m de célula no equador)
+MAX_ZOOM = 22
+
+
+@dataclass
+class _CellAggregate:
+    """Agregado de uma célula da grade em um nível de zoom"""
+    count: int = 0
+    lat_sum: float = 0.0
+    lng_sum: float = 0.0
+    worst_status: AnimalStatus = AnimalStatus.Healthy
+    herd_counts: Dict[int, int] = field(default_factory=dict)
+    animal_id: int | None = None
+
+    def merge(self, other: "_CellAggregate"):
+        """Acumula outra célula (filha) neste agregado"""
+        self.count += other.count
+        self.lat_sum += other.lat_sum
+        self.lng_sum += other.lng_sum
+        if other.worst_status > self.worst_status:
+            self.worst_status = other.worst_status
+        for herd_id, n in other.herd_counts.items():
+            self.herd_counts[herd_id] = self.herd_counts.get(herd_id, 0) + n
+        # Só mantém o ID quando a célula tem exatamente um animal
+        self.animal_id = other.animal_id if self.count == 1 else None
+
+
+class GridClusterIndex:
+    """
+    Índice hierárquico de clusters sobre a localização dos animais.
+
+    A grade usa células de 360 / 2^zoom graus (mesma progressão dos tiles do
+    mapa). Os animais são agregados no nível mais fino e cada nível superior é
+    obtido fundindo as 4 células filhas, de modo que a reconstrução a cada
+    tick custa O(animais + células). A consulta percorre as coordenadas de
+    célula do viewport (ou as células ocupadas do nível, se forem menos).
+    """
+
+    def __init__(self, max_zoom: int = MAX_ZOOM):
+        self.max_zoom = max_zoom
+        self.levels: List[Dict[Tuple[int, int], _CellAggregate]] = []
+
+    @staticmethod
+    def _cell_size(zoom: int) -> float:
+        return 360.0 / (2 ** zoom)
+
+    def _cell_of(self, location: Location, zoom: int) -> Tuple[int, int]:
+        size = self._cell_size(zoom)
+        return int((location.lng + 180.0) // size), int((location.lat + 90.0) // size)
+
+    def build(self, animals: List[Animal]):
+        """Recalcula todos os níveis a partir das posições atuais"""
+        finest: Dict[Tuple[int, int], _CellAggregate] = {}
+        for animal in animals:
+            key = self._cell_of(animal.location, self.max_zoom)
+            cell = finest.get(key)
+            if cell is None:
+                cell = finest[key] = _CellAggregate()
+            cell.merge(_CellAggregate(
+                count=1,
+                lat_sum=animal.location.lat,
+                lng_sum=animal.location.lng,
+                worst_status=animal.status,
+                herd_counts={animal.herdId: 1},
+                animal_id=animal.id,
+            ))
+
+        levels = [finest]
+        for _ in range(self.max_zoom):
+            parent: Dict[Tuple[int, int], _CellAggregate] = {}
+            for (cx, cy), cell in levels[-1].items():
+                key = (cx >> 1, cy >> 1)
+                agg = parent.get(key)
+                if agg is None:
+                    agg = parent[key] = _CellAggregate()
+                agg.merge(cell)
+            levels.append(parent)
+
+        # levels[0] passa a ser o zoom 0
+        levels.reverse()
+        self.levels = levels
+
+    def query(self, zoom: int, south: float, west: float, north: float, east: float) -> List[MapCluster]:
+        """Retorna os clusters do nível `zoom` que intersectam o viewport"""
+        # Referência local: build() em outra thread substitui a lista inteira
+        levels = self.levels
+        if not levels:
+            return []
+
+        zoom = max(0, min(zoom, self.max_zoom))
+        size = self._cell_size(zoom)
+        cells = levels[zoom]
+        last = 2 ** zoom - 1
+
+        def clamp(value: float, offset: float) -> int:
+            return max(0, min(last, int((value + offset) // size)))
+
+        # Viewport que cruza o antimeridiano é tratado como dois intervalos
+        lng_ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        cx_ranges = [(clamp(w, 180.0), clamp(e, 180.0)) for w, e in lng_ranges]
+        min_cy, max_cy = clamp(south, 90.0), clamp(north, 90.0)
+
+        viewport_cells = (max_cy - min_cy + 1) * sum(hi - lo + 1 for lo, hi in cx_ranges)
+        if viewport_cells <= len(cells):
+            # Percorre só as coordenadas de célula dentro do viewport
+            visible = []
+            for lo, hi in cx_ranges:
+                for cx in range(lo, hi + 1):
+                    for cy in range(min_cy, max_cy + 1):
+                        cell = cells.get((cx, cy))
+                        if cell is not None:
+                            visible.append(((cx, cy), cell))
+        else:
+            # Viewport com mais células que as ocupadas (zoom alto, área grande)
+            visible = [((cx, cy), cell) for (cx, cy), cell in cells.items()
+                       if min_cy <= cy <= max_cy and any(lo <= cx <= hi for lo, hi in cx_ranges)]
+
+        clusters = []
+        for (cx, cy), cell in visible:
+            clusters.append(MapCluster(
+                location=Location(lat=cell.lat_sum / cell.count, lng=cell.lng_sum / cell.count),
+                count=cell.count,
+                worstStatus=cell.worst_status,
+                herdCounts=dict(cell.herd_counts),
+                animalId=cell.animal_id,
+                bounds=[
+                    Location(lat=cy * size - 90.0, lng=cx * size - 180.0),
+                    Location(lat=(cy + 1) * size - 90.0, lng=(cx + 1) * size - 180.0),
+                ],
+            ))
+
+        return clusters
@@ -3,7 +3,8 @@ import random
 import os
 from pathlib import Path
 from typing import List, Dict
-from models import Animal, Herd, AnimalStatus, Location
+from models import Animal, Herd, AnimalStatus, Location, MapCluster
+from clustering import GridClusterIndex
 
 
 class DataManager:
@@ -15,7 +16,9 @@ class DataManager:
         self.herds: List[Herd] = []
         self.videos_dir = Path(__file__).parent / "videos"
         self.available_videos = self._get_available_videos()
+        self.cluster_index = GridClusterIndex()
         self._load_data()
+        self.cluster_index.build(self.animals)
 
     def _get_available_videos(self) -> List[str]:
         """Retorna lista de vídeos disponíveis na pasta videos/"""
@@ -134,6 +137,15 @@ class DataManager:
             # Atualiza alertas
             self.animals[i] = self._check_alerts(animal)
 
+    def rebuild_clusters(self):
+        """
+        Recalcula os clusters do mapa (uma vez por tick, após simulate_update).
+
+        Pode rodar fora do event loop (asyncio.to_thread): só lê as posições,
+        e o índice novo substitui o anterior de uma vez ao final.
+        """
+        self.cluster_index.build(self.animals)
+
     def get_animals(self) -> List[Animal]:
         """Retorna lista de animais"""
         return self.animals
@@ -149,3 +161,7 @@ class DataManager:
     def get_herd_by_id(self, herd_id: int) -> Herd | None:
         """Retorna um rebanho específico pelo ID"""
         return next((h for h in self.herds if h.id == herd_id), None)
+
+    def get_clusters(self, zoom: int, south: float, west: float, north: float, east: float) -> List[MapCluster]:
+        """Retorna os clusters pré-calculados do viewport no nível de zoom"""
+        return self.cluster_index.query(zoom, south, west, north, east)
@@ -1,19 +1,30 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
 import asyncio
 import os
 from pathlib import Path
 from typing import List
 
-from models import Animal, Herd, DataResponse, AnimalsResponse, HerdsResponse
+from models import (Animal, Herd, DataResponse, AnimalsResponse, HerdsResponse, ClustersResponse,
+                    ClassifiedAnimalsPage, ClassifiedClipsPage, ClassifiedClipDetail, ClassificationFacets)
 from data_manager import DataManager
+from clustering import MAX_ZOOM
+from classification_index import ClassificationIndex, DEFAULT_RESULTS_DIR
+from thumbnails import ThumbnailCache, DEFAULT_CACHE_DIR, THUMBNAIL_SIZES
 
 
 # Gerenciador de dados global
 data_manager: DataManager | None = None
 
+# Resultados da classificação de vídeos (JSON + frames da ferramenta Gemini)
+classification_index: ClassificationIndex | None = None
+thumbnail_cache: ThumbnailCache | None = None
+
+# Intervalo (s) entre verificações de novos resultados
+CLASSIFICATION_REFRESH_SECONDS = float(os.getenv("CLASSIFICATION_REFRESH_SECONDS", "5"))
+
 
 async def simulate_data_updates():
     """Task assíncrona para simular atualizações dos dados"""
@@ -21,25 +32,46 @@ async def simulate_data_updates():
         await asyncio.sleep(2)  # Atualiza a cada 2 segundos
         if data_manager:
             data_manager.simulate_update()
+            # Reconstrução dos níveis da grade fora do event loop; a próxima
+            # simulação só começa depois dela, então as posições não mudam durante a leitura
+            await asyncio.to_thread(data_manager.rebuild_clusters)
+
+
+async def watch_classification_results():
+    """Task assíncrona que incorpora resultados novos/alterados ao índice"""
+    while True:
+        await asyncio.sleep(CLASSIFICATION_REFRESH_SECONDS)
+        if classification_index:
+            try:
+                await asyncio.to_thread(classification_index.refresh)
+            except Exception as e:
+                # Um erro inesperado não pode encerrar a task: o índice pararia de atualizar
+                print(f"Erro ao atualizar o índice de classificações: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gerencia o ciclo de vida da aplicação"""
-    global data_manager
+    global data_manager, classification_index, thumbnail_cache
 
     # Startup: Inicializa dados e inicia simulação
     data_manager = DataManager()
-    task = asyncio.create_task(simulate_data_updates())
+    classification_index = ClassificationIndex(os.getenv("CLASSIFICATION_RESULTS_DIR", DEFAULT_RESULTS_DIR))
+    thumbnail_cache = ThumbnailCache(os.getenv("THUMBNAIL_CACHE_DIR", DEFAULT_CACHE_DIR))
+    await asyncio.to_thread(classification_index.refresh)
+    tasks = [asyncio.create_task(simulate_data_updates()),
+             asyncio.create_task(watch_classification_results())]
 
     yield
 
-    # Shutdown: Cancela a task de simulação
-    task.cancel()
-    try:
-        await task
-    except asyncio.CancelledError:
-        pass
+    # Shutdown: Cancela as tasks de simulação e de atualização do índice
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
 
 
 # Cria aplicação FastAPI
@@ -80,6 +112,12 @@ async def root():
             "data": "/api/data",
             "animal_by_id": "/api/animals/{animal_id}",
             "herd_by_id": "/api/herds/{herd_id}",
+            "map_clusters": "/api/map/clusters?zoom=&south=&west=&north=&east=",
+            "classified_animals": "/api/classifications/animals?classe=&sexo=&sinal=&video=&offset=&limit=",
+            "classified_clips": "/api/classifications/clips?classe=&sexo=&sinal=&video=&offset=&limit=",
+            "classified_clip": "/api/classifications/clips/{video}",
+            "classification_facets": "/api/classifications/facets",
+            "classification_frame": "/api/classifications/frames/{video}?width=",
             "docs": "/docs"
         }
     }
@@ -141,16 +179,111 @@ async def get_herd(herd_id: int):
     return herd
 
 
+@app.get("/api/map/clusters", response_model=ClustersResponse)
+async def get_map_clusters(
+    zoom: int = Query(..., ge=0, le=MAX_ZOOM),
+    south: float = Query(-90.0, ge=-90.0, le=90.0),
+    west: float = Query(-180.0, ge=-180.0, le=180.0),
+    north: float = Query(90.0, ge=-90.0, le=90.0),
+    east: float = Query(180.0, ge=-180.0, le=180.0),
+):
+    """Retorna clusters de animais do viewport (contagem e pior status por cluster)"""
+    if not data_manager:
+        raise HTTPException(status_code=500, detail="Data manager not initialized")
+
+    if south > north:
+        raise HTTPException(status_code=400, detail="south must be <= north")
+
+    return ClustersResponse(
+        zoom=zoom,
+        clusters=data_manager.get_clusters(zoom, south, west, north, east)
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Endpoint de health check"""
     return {
         "status": "healthy",
         "animals_count": len(data_manager.get_animals()) if data_manager else 0,
-        "herds_count": len(data_manager.get_herds()) if data_manager else 0
+        "herds_count": len(data_manager.get_herds()) if data_manager else 0,
+        "classified_clips_count": classification_index.counts()[0] if classification_index else 0
     }
 
 
+def _classifications() -> ClassificationIndex:
+    if not classification_index:
+        raise HTTPException(status_code=500, detail="Classification index not initialized")
+    return classification_index
+
+
+@app.get("/api/classifications/animals", response_model=ClassifiedAnimalsPage)
+async def get_classified_animals(
+    classe: List[str] | None = Query(None),
+    sexo: List[str] | None = Query(None),
+    sinal: List[str] | None = Query(None),
+    video: List[str] | None = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Animais classificados filtrados (valores repetidos de um filtro são alternativas; filtros diferentes se somam)"""
+    total, items = _classifications().query_animals(classe, sexo, sinal, video, offset, limit)
+    return ClassifiedAnimalsPage(total=total, offset=offset, limit=limit, items=items)
+
+
+@app.get("/api/classifications/clips", response_model=ClassifiedClipsPage)
+async def get_classified_clips(
+    classe: List[str] | None = Query(None),
+    sexo: List[str] | None = Query(None),
+    sinal: List[str] | None = Query(None),
+    video: List[str] | None = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Clipes com ao menos um animal que atende aos filtros (video aceita o corte ou o vídeo de origem)"""
+    total, items = _classifications().query_clips(classe, sexo, sinal, video, offset, limit)
+    return ClassifiedClipsPage(total=total, offset=offset, limit=limit, items=items)
+
+
+@app.get("/api/classifications/clips/{video}", response_model=ClassifiedClipDetail)
+async def get_classified_clip(video: str):
+    """Resultado da classificação de um clipe com seus animais"""
+    index = _classifications()
+    clip = index.get_clip(video)
+    if not clip:
+        raise HTTPException(status_code=404, detail=f"Clip {video} not found")
+
+    return ClassifiedClipDetail(clip=clip, animals=index.clip_animals(video))
+
+
+@app.get("/api/classifications/facets", response_model=ClassificationFacets)
+async def get_classification_facets():
+    """Valores disponíveis para os filtros, com a quantidade de animais"""
+    index = _classifications()
+    clips, animals = index.counts()
+    return ClassificationFacets(clips=clips, animals=animals, **index.facets())
+
+
+@app.get("/api/classifications/frames/{video}")
+async def get_classification_frame(video: str, request: Request,
+                                   width: int | None = Query(None, ge=1, le=THUMBNAIL_SIZES[-1])):
+    """Frame classificado do clipe; com width, miniatura JPEG do cache"""
+    frame_path = _classifications().frame_path(video)
+    if not frame_path:
+        raise HTTPException(status_code=404, detail=f"Frame for {video} not found")
+
+    if width is None:
+        return FileResponse(path=frame_path, media_type="image/jpeg")
+
+    data, key = await asyncio.to_thread(thumbnail_cache.get, frame_path, width)
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=data, media_type="image/jpeg", headers=headers)
+
+
 @app.get("/api/videos/{filename}")
 async def get_video(filename: str, request: Request):
     """Serve vídeo de animal com suporte a range requests para streaming"""
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from enum import IntEnum
 
 
@@ -67,3 +67,77 @@ class DataResponse(BaseModel):
     """Resposta completa com animais e rebanhos"""
     animals: List[Animal]
     herds: List[Herd]
+
+
+class MapCluster(BaseModel):
+    """Cluster de animais em uma célula da grade do mapa"""
+    location: Location  # centróide dos animais do cluster
+    count: int
+    worstStatus: AnimalStatus
+    herdCounts: Dict[int, int]  # herdId -> quantidade de animais
+    animalId: Optional[int] = None  # preenchido quando o cluster tem um único animal
+    bounds: List[Location]  # [sudoeste, nordeste] da célula
+
+
+class ClustersResponse(BaseModel):
+    """Resposta da API com os clusters do viewport"""
+    zoom: int
+    clusters: List[MapCluster]
+
+
+class ClassifiedAnimal(BaseModel):
+    """Animal identificado pela classificação de um clipe"""
+    key: str  # "<vídeo>:<posição no JSON>"
+    video: str
+    group: str  # vídeo de origem (sem o sufixo _cut_NNN)
+    animalId: str
+    classe: str
+    sexo: str
+    sinaisClinicos: str
+    comportamento: str
+    descricao: str
+    frameUrl: Optional[str] = None
+
+
+class ClassifiedClip(BaseModel):
+    """Resultado da classificação de um clipe"""
+    video: str
+    group: str
+    descricaoAmbiente: str
+    contagemTotal: Dict[str, int]
+    totalAnimais: int
+    animaisIdentificados: int
+    duplicataDe: Optional[str] = None  # clipe do qual a classificação foi reaproveitada
+    frameUrl: Optional[str] = None
+
+
+class ClassifiedAnimalsPage(BaseModel):
+    """Página de animais classificados"""
+    total: int
+    offset: int
+    limit: int
+    items: List[ClassifiedAnimal]
+
+
+class ClassifiedClipsPage(BaseModel):
+    """Página de clipes classificados"""
+    total: int
+    offset: int
+    limit: int
+    items: List[ClassifiedClip]
+
+
+class ClassifiedClipDetail(BaseModel):
+    """Clipe com seus animais"""
+    clip: ClassifiedClip
+    animals: List[ClassifiedAnimal]
+
+
+class ClassificationFacets(BaseModel):
+    """Quantidade de animais por valor de cada filtro"""
+    clips: int
+    animals: int
+    classe: Dict[str, int]
+    sexo: Dict[str, int]
+    sinais_clinicos: Dict[str, int]
+    grupo: Dict[str, int]
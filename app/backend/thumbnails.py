@@ -0,0 +1,79 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple
+
+from PIL import Image
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".cache" / "thumbnails"
+
+# Larguras servidas: pedidos são arredondados para a próxima, limitando as variantes em disco
+THUMBNAIL_SIZES = (160, 320, 640, 1024)
+
+
+class ThumbnailCache:
+    """
+    Miniaturas JPEG dos frames dos resultados, em dois níveis:
+    memória (LRU com até `max_items` imagens) e disco (`cache_dir`).
+
+    A chave inclui mtime e tamanho do frame de origem, então um frame
+    regravado gera uma nova miniatura; as antigas do mesmo frame são apagadas.
+    """
+
+    def __init__(self, cache_dir: str | Path = DEFAULT_CACHE_DIR, max_items: int = 512, quality: int = 85):
+        self.cache_dir = Path(cache_dir)
+        self.max_items = max_items
+        self.quality = quality
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def snap_width(width: int) -> int:
+        """Menor largura servida que comporta a pedida"""
+        return next((size for size in THUMBNAIL_SIZES if size >= width), THUMBNAIL_SIZES[-1])
+
+    def _key(self, source: Path, width: int) -> Tuple[str, str]:
+        stat = source.stat()
+        return source.stem, f"{source.stem}_{width}_{stat.st_mtime_ns}_{stat.st_size}"
+
+    def get(self, source: Path, width: int) -> Tuple[bytes, str]:
+        """(JPEG da miniatura, ETag) do frame com a largura (arredondada) pedida"""
+        width = self.snap_width(width)
+        stem, key = self._key(source, width)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data, key
+
+        path = self.cache_dir / f"{key}.jpg"
+        try:
+            data = path.read_bytes()
+        except OSError:
+            data = self._render(source, width)
+            # Remove miniaturas de versões anteriores do mesmo frame nesta largura
+            for old in self.cache_dir.glob(f"{stem}_{width}_*.jpg"):
+                old.unlink(missing_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+        return data, key
+
+    def _render(self, source: Path, width: int) -> bytes:
+        with Image.open(source) as image:
+            image = image.convert("RGB")
+            if image.width > width:
+                image.thumbnail((width, width * image.height // image.width), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+        return buffer.getvalue()
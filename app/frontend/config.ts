@@ -14,6 +14,8 @@ export const API_ENDPOINTS = {
   data: `${API_BASE_URL}/api/data`,
   animalById: (id: number) => `${API_BASE_URL}/api/animals/${id}`,
   herdById: (id: number) => `${API_BASE_URL}/api/herds/${id}`,
+  mapClusters: (zoom: number, south: number, west: number, north: number, east: number) =>
+    `${API_BASE_URL}/api/map/clusters?zoom=${zoom}&south=${south}&west=${west}&north=${north}&east=${east}`,
   health: `${API_BASE_URL}/health`,
 };
 